@@ -0,0 +1,287 @@
+import logging
+import math
+import re
+
+import jwt
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.status import (
+    HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    HTTP_429_TOO_MANY_REQUESTS,
+    HTTP_503_SERVICE_UNAVAILABLE,
+)
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app import dependencies
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Buckets are refilled lazily from the elapsed Redis server time, so every
+# node shares one clock. Returns {0} when admitted, {1|2, retry_after} when
+# the user (1) or the global (2) bucket is short.
+ACQUIRE_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local ttl = tonumber(ARGV[6])
+local tokens = {}
+for i = 1, 2 do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local data = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local available = tonumber(data[1]) or capacity
+    local ts = tonumber(data[2]) or now
+    available = math.min(capacity, available + math.max(0, now - ts) * rate)
+    if cost > available then
+        return {i, tostring((cost - available) / rate)}
+    end
+    tokens[i] = available
+end
+for i = 1, 2 do
+    redis.call('HSET', KEYS[i], 'tokens', tokens[i] - cost, 'ts', now)
+    redis.call('EXPIRE', KEYS[i], ttl)
+end
+return {0, '0'}
+"""
+
+RELEASE_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local ttl = tonumber(ARGV[6])
+for i = 1, 2 do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local data = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local available = tonumber(data[1]) or capacity
+    local ts = tonumber(data[2]) or now
+    available = available + math.max(0, now - ts) * rate + cost
+    redis.call('HSET', KEYS[i], 'tokens', math.min(capacity, available), 'ts', now)
+    redis.call('EXPIRE', KEYS[i], ttl)
+end
+return 0
+"""
+
+USER_LIMITED = 1
+GLOBAL_LIMITED = 2
+# where the middleware leaves the request's ticket in ``scope['state']``
+TICKET_KEY = 'admission_ticket'
+
+
+class TokenBucketAdmission:
+    """
+    Per-user and global budgets of in-flight simulation cost, counted in
+    candles and shared by every node through Redis.
+
+    A request takes its cost from both buckets and gives it back when it
+    finishes. Buckets also refill at their capacity every
+    ``ADMISSION_REFILL_SECONDS``, so that tokens lost by workers that died
+    mid-request come back; the cost running at once can therefore exceed a
+    capacity by what refilled while it ran, which stays small for requests
+    much shorter than the refill.
+    """
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+        self._acquire = redis.register_script(ACQUIRE_SCRIPT)
+        self._release = redis.register_script(RELEASE_SCRIPT)
+
+    @staticmethod
+    def _keys(user: str) -> list[str]:
+        return [f'admission_user_{user}', 'admission_global']
+
+    @staticmethod
+    def _args(cost: int) -> list:
+        return [
+            cost,
+            settings.ADMISSION_USER_CAPACITY,
+            settings.ADMISSION_USER_CAPACITY / settings.ADMISSION_REFILL_SECONDS,
+            settings.ADMISSION_GLOBAL_CAPACITY,
+            settings.ADMISSION_GLOBAL_CAPACITY / settings.ADMISSION_REFILL_SECONDS,
+            settings.ADMISSION_REFILL_SECONDS * 2,
+        ]
+
+    async def acquire(self, user: str, cost: int) -> tuple[int, float]:
+        status, retry_after = await self._acquire(
+            keys=self._keys(user), args=self._args(cost)
+        )
+        return int(status), float(retry_after)
+
+    async def release(self, user: str, cost: int):
+        await self._release(keys=self._keys(user), args=self._args(cost))
+
+
+def _rejection(status: int, retry_after: float) -> tuple[int, dict, dict]:
+    return (
+        HTTP_429_TOO_MANY_REQUESTS if status == USER_LIMITED
+        else HTTP_503_SERVICE_UNAVAILABLE,
+        {'detail': 'Simulation capacity exhausted, retry later.'},
+        {'Retry-After': str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class AdmissionTicket:
+    """
+    The cost a request holds in both buckets, given back by ``release``.
+    """
+
+    def __init__(self, admission: TokenBucketAdmission, subject: str,
+                 cost: int):
+        self.admission = admission
+        self.subject = subject
+        self.cost = cost
+        self.detached = False
+
+    async def charge(self, candles: int):
+        """
+        Take ``candles`` more for as long as the ticket is held, raising
+        ``413``, ``429`` or ``503`` as the middleware would have.
+        """
+        if self.cost + candles > settings.ADMISSION_USER_CAPACITY:
+            raise HTTPException(
+                status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail='Too much historical data for a single request.',
+            )
+        try:
+            status, retry_after = await self.admission.acquire(
+                self.subject, candles
+            )
+        except RedisError:
+            logger.warning('Admission control unavailable', exc_info=True)
+            return
+        if status:
+            status_code, body, headers = _rejection(status, retry_after)
+            raise HTTPException(
+                status_code=status_code, detail=body['detail'],
+                headers=headers,
+            )
+        self.cost += candles
+
+    def detach(self):
+        """
+        Hand the release over to work outliving the response, e.g. a
+        background search; returns the coroutine function to await after it.
+        """
+        self.detached = True
+        return self.release
+
+    async def release(self):
+        try:
+            await self.admission.release(self.subject, self.cost)
+        except RedisError:
+            logger.warning('Failed to release admission tokens', exc_info=True)
+
+
+async def charge(request: Request, candles: int):
+    """
+    Charge the candles of stored datasets a route is about to simulate to
+    the caller's admission ticket: their cost is not in ``Content-Length``.
+    Does nothing when the request was not admitted through the middleware.
+    """
+    ticket = request.scope.get('state', {}).get(TICKET_KEY)
+    if ticket is not None:
+        await ticket.charge(candles)
+
+
+def detach(request: Request):
+    """``AdmissionTicket.detach`` of the request, if it has a ticket."""
+    ticket = request.scope.get('state', {}).get(TICKET_KEY)
+    return None if ticket is None else ticket.detach()
+
+
+class AdmissionMiddleware:
+    """
+    Rejects simulation requests over budget before their body is read, with
+    ``429`` when the caller's budget is exhausted and ``503`` when the whole
+    cluster is. Cost is estimated from ``Content-Length``, scaled by the
+    expected ratio for compressed bodies; routes simulating stored datasets
+    add their candles with ``charge`` once the dataset is found.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.paths = re.compile(settings.ADMISSION_PATH_PATTERN)
+        self._admission: TokenBucketAdmission | None = None
+
+    @property
+    def admission(self) -> TokenBucketAdmission:
+        if (
+                self._admission is None
+                or self._admission.redis is not dependencies.redis_client
+        ):
+            self._admission = TokenBucketAdmission(dependencies.redis_client)
+        return self._admission
+
+    @staticmethod
+    def estimate_cost(headers: Headers) -> int:
+        content_length = headers.get('content-length')
+        if content_length is None or not content_length.isdigit():
+            # unknown size: charge the caller's whole budget
+            return settings.ADMISSION_USER_CAPACITY
+        size = int(content_length)
+        if headers.get('content-encoding', 'identity').lower() != 'identity':
+            size *= settings.ADMISSION_COMPRESSION_RATIO
+        return max(1, size // settings.ADMISSION_BYTES_PER_CANDLE)
+
+    @staticmethod
+    def get_subject(headers: Headers) -> str:
+        scheme, _, token = headers.get('authorization', '').partition(' ')
+        if scheme.lower() != 'bearer':
+            return 'anonymous'
+        try:
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+        except jwt.PyJWTError:
+            return 'anonymous'
+        return payload.get('sub') or 'anonymous'
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+                scope['type'] != 'http'
+                or scope['method'] != 'POST'
+                or not self.paths.match(scope['path'])
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        cost = self.estimate_cost(headers)
+        if cost > settings.ADMISSION_USER_CAPACITY:
+            response = JSONResponse(
+                {'detail': 'Too much historical data for a single request.'},
+                status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+            await response(scope, receive, send)
+            return
+
+        subject = self.get_subject(headers)
+        admission = self.admission
+        try:
+            status, retry_after = await admission.acquire(subject, cost)
+        except RedisError:
+            # fail open: losing Redis must not take simulations down with it
+            logger.warning('Admission control unavailable', exc_info=True)
+            await self.app(scope, receive, send)
+            return
+
+        if status:
+            status_code, body, headers = _rejection(status, retry_after)
+            response = JSONResponse(
+                body, status_code=status_code, headers=headers
+            )
+            await response(scope, receive, send)
+            return
+
+        ticket = AdmissionTicket(admission, subject, cost)
+        scope.setdefault('state', {})[TICKET_KEY] = ticket
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if not ticket.detached:
+                await ticket.release()
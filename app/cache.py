@@ -0,0 +1,291 @@
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any
+
+import redis.asyncio as redis
+from redis.exceptions import ConnectionError as RedisConnectionError, RedisError
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = '__redis__:invalidate'
+BUS_CHANNEL = 'cache_invalidations'
+BUS_SEQUENCE_KEY = 'cache_invalidations_sequence'
+# numbers and publishes in one step, so sequence numbers follow publish order
+PUBLISH_SCRIPT = """
+local sequence = redis.call('INCR', KEYS[1])
+redis.call('PUBLISH', ARGV[1], sequence .. ' ' .. ARGV[2])
+return sequence
+"""
+HEALTH_CHECK_INTERVAL = 5.0
+_MISSING = object()
+
+
+def create_redis() -> redis.Redis:
+    pool = redis.BlockingConnectionPool(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=settings.REDIS_DB,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+        health_check_interval=30,
+        decode_responses=True,
+    )
+    return redis.Redis(connection_pool=pool)
+
+
+class LocalCache:
+    """Bounded in-process LRU mapping."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, Any] = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: str, default=None):
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return default
+        return self._data[key]
+
+    def set(self, key: str, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, *keys: str):
+        for key in keys:
+            self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+
+class LocalReadCache(ABC):
+    """
+    Per-worker LRU in front of ``GET``/``MGET``, kept coherent by the
+    subclass's ``_run`` task calling ``_invalidate``. Until that task is
+    ready (and after it loses its connection) every read goes to Redis and
+    the local copy is dropped.
+    """
+
+    # whether a missing key is remembered; only safe when filling a key
+    # also invalidates it
+    cache_misses = True
+
+    def __init__(self, client: redis.Redis, maxsize: int):
+        self.client = client
+        self._local = LocalCache(maxsize)
+        self._generation = 0
+        self._ready = False
+        self._task: asyncio.Task | None = None
+
+    def _keep(self, key: str, value):
+        if value is not None or self.cache_misses:
+            self._local.set(key, value)
+
+    async def get(self, key: str):
+        if not self._ready:
+            return await self.client.get(key)
+        value = self._local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        generation = self._generation
+        value = await self.client.get(key)
+        # an invalidation that raced the read may already have been applied
+        if self._ready and generation == self._generation:
+            self._keep(key, value)
+        return value
+
+    async def mget(self, keys: list[str]) -> list:
+        if not self._ready:
+            return await self.client.mget(keys)
+        values = [self._local.get(key, _MISSING) for key in keys]
+        missing = [key for key, value in zip(keys, values) if value is _MISSING]
+        if not missing:
+            return values
+        generation = self._generation
+        fetched = dict(zip(missing, await self.client.mget(missing)))
+        if self._ready and generation == self._generation:
+            for key, value in fetched.items():
+                self._keep(key, value)
+        return [
+            fetched[key] if value is _MISSING else value
+            for key, value in zip(keys, values)
+        ]
+
+    def _invalidate(self, keys: list[str] | None):
+        self._generation += 1
+        if keys is None:
+            self._local.clear()
+        else:
+            self._local.delete(*keys)
+
+    def _on_reconnect(self, connection):
+        # invalidations sent while the connection was down are lost, so the
+        # subscription has to be set up again from scratch
+        self._ready = False
+        self._invalidate(None)
+        raise RedisConnectionError('Invalidation connection was re-established')
+
+    @abstractmethod
+    async def _run(self):
+        """Keep the local copy coherent while the cache is started."""
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            # its connections are closed before the loop goes away
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+class TrackingCache(LocalReadCache):
+    """
+    Server-assisted client-side cache for ``GET``/``MGET``.
+
+    A dedicated connection enables ``CLIENT TRACKING ... BCAST`` for the given
+    key prefixes and redirects invalidations to a pub/sub connection, so any
+    write to a tracked key by any client evicts it from this worker's memory.
+    The async client cannot use RESP3 push messages, hence the RESP2 redirect.
+    """
+
+    def __init__(self, client: redis.Redis, prefixes: list[str], maxsize: int):
+        super().__init__(client, maxsize)
+        self.prefixes = prefixes
+
+    async def _track(self):
+        pubsub = self.client.pubsub()
+        tracker = self.client.client()
+        try:
+            await pubsub.connect()
+            pubsub.connection.register_connect_callback(self._on_reconnect)
+            await pubsub.connection.send_command('CLIENT', 'ID')
+            client_id = await pubsub.connection.read_response()
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            prefixes = [
+                part for prefix in self.prefixes for part in ('PREFIX', prefix)
+            ]
+            await tracker.execute_command(
+                'CLIENT', 'TRACKING', 'ON', 'REDIRECT', client_id, 'BCAST',
+                *prefixes,
+            )
+            tracker.connection.register_connect_callback(self._on_reconnect)
+            self._ready = True
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=HEALTH_CHECK_INTERVAL
+                )
+                if message is None:
+                    # a dropped tracker socket is only noticed when used
+                    await tracker.ping()
+                elif message['type'] == 'message':
+                    self._invalidate(message['data'])
+        finally:
+            self._ready = False
+            self._invalidate(None)
+            for connection in (pubsub.connection, tracker.connection):
+                if connection is not None:
+                    connection.deregister_connect_callback(self._on_reconnect)
+            await tracker.aclose()
+            await pubsub.aclose()
+
+    async def _run(self):
+        while True:
+            try:
+                await self._track()
+            except RedisError:
+                logger.warning('Client-side cache tracking lost, retrying')
+                await asyncio.sleep(1)
+
+
+def publish_invalidation(pipeline, keys: list[str]):
+    """Queue a numbered invalidation of ``keys`` for every ``InvalidationBus``."""
+    pipeline.eval(
+        PUBLISH_SCRIPT, 1, BUS_SEQUENCE_KEY, BUS_CHANNEL, json.dumps(keys)
+    )
+
+
+class InvalidationBus(LocalReadCache):
+    """
+    Client-side cache kept coherent by the writers rather than by Redis:
+    every write publishes the keys it changed with ``publish_invalidation``
+    on ``BUS_CHANNEL``, numbered by the ``BUS_SEQUENCE_KEY`` counter. A gap in
+    the numbers, or a counter that moved while the channel was quiet, means
+    messages were missed and the whole local cache is dropped. Needs no
+    ``CLIENT TRACKING``, so it also works on managed Redis that lacks it.
+    """
+
+    # only writes are published, cache fills are not
+    cache_misses = False
+
+    def __init__(self, client: redis.Redis, maxsize: int):
+        super().__init__(client, maxsize)
+        self._sequence = 0
+
+    async def _current_sequence(self) -> int:
+        return int(await self.client.get(BUS_SEQUENCE_KEY) or 0)
+
+    def _receive(self, data: str):
+        sequence, _, keys = data.partition(' ')
+        sequence = int(sequence)
+        if sequence > self._sequence + 1:
+            logger.warning(
+                'Missed cache invalidations %s-%s, flushing',
+                self._sequence + 1, sequence - 1,
+            )
+            self._invalidate(None)
+        else:
+            # numbers up to ours were counted already, their keys still go
+            self._invalidate(json.loads(keys))
+        self._sequence = max(self._sequence, sequence)
+
+    async def _listen(self):
+        pubsub = self.client.pubsub()
+        try:
+            await pubsub.connect()
+            pubsub.connection.register_connect_callback(self._on_reconnect)
+            await pubsub.subscribe(BUS_CHANNEL)
+            # read after subscribing: later writes reach us one way or the other
+            self._sequence = await self._current_sequence()
+            self._ready = True
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=HEALTH_CHECK_INTERVAL
+                )
+                if message is not None:
+                    if message['type'] == 'message':
+                        self._receive(message['data'])
+                    continue
+                sequence = await self._current_sequence()
+                if sequence != self._sequence:
+                    # lost messages, or a counter that was reset
+                    self._invalidate(None)
+                    self._sequence = sequence
+        finally:
+            self._ready = False
+            self._invalidate(None)
+            if pubsub.connection is not None:
+                pubsub.connection.deregister_connect_callback(self._on_reconnect)
+            await pubsub.aclose()
+
+    async def _run(self):
+        while True:
+            try:
+                await self._listen()
+            except RedisError:
+                logger.warning('Cache invalidation bus lost, retrying')
+                await asyncio.sleep(1)
@@ -0,0 +1,57 @@
+"""
+Probe of a cold start: a fresh interpreter imports ``app.main`` and sends
+``GET /health/live`` straight to the ASGI app (no server, no lifespan).
+Used by ``benchmarks/cold_start.py`` and ``tests/test_cold_start.py``.
+"""
+import json
+import subprocess
+import sys
+
+PROBE = '''
+import asyncio, json, sys, time
+
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+
+async def first_request():
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': '/health/live',
+        'raw_path': b'/health/live', 'root_path': '', 'query_string': b'',
+        'headers': [], 'client': ('127.0.0.1', 0), 'server': ('test', 80),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0]['status']
+
+
+status = asyncio.run(first_request())
+responded = time.perf_counter()
+loaded = [
+    name for name in ('numpy', 'pandas')
+    if name in sys.modules and type(sys.modules[name]).__name__ == 'module'
+]
+print(json.dumps({
+    'import': imported - started,
+    'first_response': responded - started,
+    'status': status,
+    'loaded': loaded,
+}))
+'''
+
+
+def measure() -> dict:
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE], check=True, capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
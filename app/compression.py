@@ -0,0 +1,238 @@
+import zlib
+
+import zstandard
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.status import HTTP_400_BAD_REQUEST, HTTP_413_REQUEST_ENTITY_TOO_LARGE, HTTP_415_UNSUPPORTED_MEDIA_TYPE
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+ENCODINGS = ('zstd', 'gzip')
+# zstd cannot bound the output of a single call, so input is fed in slices
+# small enough that one slice can never expand past a few tens of MB
+_ZSTD_INPUT_SLICE = 1024
+_GZIP_OUTPUT_SLICE = 1 << 20
+
+
+class RequestTooLarge(HTTPException):
+
+    def __init__(self):
+        # raised from ``receive`` inside the route, so FastAPI's exception
+        # middleware renders it like any other HTTP error
+        super().__init__(
+            status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail='Decompressed request body is too large.',
+        )
+
+
+class InvalidRequestEncoding(HTTPException):
+
+    def __init__(self, encoding: str):
+        super().__init__(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=f'Request body is not valid {encoding} data.',
+        )
+
+
+class StreamDecompressor:
+
+    def __init__(self, encoding: str, max_size: int):
+        self.encoding = encoding
+        self.max_size = max_size
+        self.size = 0
+        if encoding == 'zstd':
+            self._zstd = zstandard.ZstdDecompressor().decompressobj()
+        else:
+            self._zlib = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+
+    def _count(self, chunk: bytes) -> bytes:
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            raise RequestTooLarge()
+        return chunk
+
+    def decompress(self, data: bytes) -> bytes:
+        try:
+            return self._decompress(data)
+        except (zstandard.ZstdError, zlib.error):
+            raise InvalidRequestEncoding(self.encoding)
+
+    def _decompress(self, data: bytes) -> bytes:
+        output = []
+        if self.encoding == 'zstd':
+            for start in range(0, len(data), _ZSTD_INPUT_SLICE):
+                output.append(self._count(
+                    self._zstd.decompress(data[start:start + _ZSTD_INPUT_SLICE])
+                ))
+            return b''.join(output)
+
+        while data:
+            output.append(self._count(
+                self._zlib.decompress(data, _GZIP_OUTPUT_SLICE)
+            ))
+            data = self._zlib.unconsumed_tail
+        return b''.join(output)
+
+    def flush(self) -> bytes:
+        decompressor = self._zstd if self.encoding == 'zstd' else self._zlib
+        try:
+            tail = b'' if self.encoding == 'zstd' else self._zlib.flush()
+        except zlib.error:
+            raise InvalidRequestEncoding(self.encoding)
+        if not decompressor.eof:
+            # the body ended inside a frame: truncated
+            raise InvalidRequestEncoding(self.encoding)
+        return self._count(tail)
+
+
+class StreamCompressor:
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == 'zstd':
+            self._compressor = zstandard.ZstdCompressor(
+                level=settings.COMPRESSION_ZSTD_LEVEL
+            ).compressobj()
+            self._sync_flush = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._compressor = zlib.compressobj(
+                settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED,
+                zlib.MAX_WBITS | 16,
+            )
+            self._sync_flush = zlib.Z_SYNC_FLUSH
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        chunk = self._compressor.compress(data)
+        if final:
+            return chunk + self._compressor.flush()
+        # flush every chunk so streamed responses stay incremental
+        return chunk + self._compressor.flush(self._sync_flush)
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                continue
+        accepted[name.strip().lower()] = quality
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Decompresses ``Content-Encoding: zstd|gzip`` request bodies as they are
+    received and compresses responses of at least ``COMPRESSION_MIN_SIZE``
+    bytes with the best encoding the client accepts.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        content_encoding = headers.get('content-encoding', '').strip().lower()
+        if content_encoding and content_encoding != 'identity':
+            if content_encoding not in ENCODINGS:
+                response = JSONResponse(
+                    {'detail': f'Content-Encoding {content_encoding} is not supported.'},
+                    status_code=HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                )
+                await response(scope, receive, send)
+                return
+            scope, receive = self._decompressing(scope, receive, content_encoding)
+
+        encoding = negotiate(headers.get('accept-encoding', ''))
+        if encoding is not None:
+            send = CompressingSender(send, encoding)
+
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _decompressing(scope: Scope, receive: Receive, encoding: str):
+        raw_headers = [
+            (name, value) for name, value in scope['headers']
+            if name not in (b'content-encoding', b'content-length')
+        ]
+        scope = {**scope, 'headers': raw_headers}
+        decompressor = StreamDecompressor(
+            encoding, settings.COMPRESSION_MAX_REQUEST_SIZE
+        )
+
+        async def decompressing_receive() -> Message:
+            message = await receive()
+            if message['type'] != 'http.request':
+                return message
+            body = decompressor.decompress(message.get('body', b''))
+            if not message.get('more_body', False):
+                body += decompressor.flush()
+            return {**message, 'body': body}
+
+        return scope, decompressing_receive
+
+
+class CompressingSender:
+
+    def __init__(self, send: Send, encoding: str):
+        self.send = send
+        self.encoding = encoding
+        self._start: Message | None = None
+        self._compressor: StreamCompressor | None = None
+        self._passthrough = False
+
+    def _compressible(self, headers: Headers) -> bool:
+        return (
+            'content-encoding' not in headers
+            and not headers.get('content-type', '').startswith('text/event-stream')
+        )
+
+    async def __call__(self, message: Message):
+        if message['type'] == 'http.response.start':
+            self._start = message
+            return
+        if message['type'] != 'http.response.body' or self._passthrough:
+            await self.send(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+        if self._start is not None:
+            start, self._start = self._start, None
+            headers = Headers(raw=start['headers'])
+            large_enough = more_body or len(body) >= settings.COMPRESSION_MIN_SIZE
+            if not (self._compressible(headers) and large_enough):
+                self._passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+
+            self._compressor = StreamCompressor(self.encoding)
+            mutable_headers = MutableHeaders(raw=list(start['headers']))
+            mutable_headers['Content-Encoding'] = self.encoding
+            mutable_headers.add_vary_header('Accept-Encoding')
+            del mutable_headers['Content-Length']
+            if not more_body:
+                body = self._compressor.compress(body, final=True)
+                mutable_headers['Content-Length'] = str(len(body))
+                await self.send({**start, 'headers': mutable_headers.raw})
+                await self.send({**message, 'body': body})
+                return
+            await self.send({**start, 'headers': mutable_headers.raw})
+
+        await self.send({
+            **message,
+            'body': self._compressor.compress(body, final=not more_body),
+        })
@@ -12,6 +12,77 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_MINUTES: int
     DEBUG: int
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    WARM_POOL_CONNECTIONS: int = 4
+    HEALTH_CHECK_TIMEOUT: float = 1.0
+    PRELOAD_NUMERIC: bool = True
+    RUN_MIGRATIONS_ON_START: bool = True
+    SQL_INSTRUMENTATION: bool = False
+    SQL_SLOW_QUERY_THRESHOLD: float = 0.2
+    SQL_SLOWEST_STATEMENTS: int = 5
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5
+    SQL_REQUEST_QUERY_LIMIT: int = 20
+    SQL_STRICT: bool = False
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str | None = None
+    PROFILING_MODE: str = 'sampling'
+    PROFILING_INTERVAL: float = 0.005
+    PROFILING_DIR: str = 'profiles'
+    ROBUSTNESS_WORKERS: int | None = None
+    ROBUSTNESS_MAX_VARIANTS: int = 10_000
+    MULTI_SYMBOL_PARALLEL_CANDLES: int = 2_000_000
+    MULTI_SYMBOL_MAX_SYMBOLS: int = 500
+    OPTIMIZATION_BROKER: str = 'rabbitmq'
+    OPTIMIZATION_SHARD_SIZE: int = 5_000
+    OPTIMIZATION_MAX_POINTS: int = 10_000_000
+    OPTIMIZATION_SHARD_TIMEOUT: float = 600.0
+    OPTIMIZATION_SHARD_RETRIES: int = 3
+    OPTIMIZATION_RESULT_TTL: int = 86_400
+    OPTIMIZATION_ADAPTIVE_PATIENCE: int = 3
+    OPTIMIZATION_ADAPTIVE_RESTARTS: int = 2
+    OPTIMIZATION_ADAPTIVE_SHARD_SIZE: int = 16
+    WALK_FORWARD_MAX_EVALUATIONS: int = 2_000_000
+    WALK_FORWARD_MAX_CANDLES: int = 2_000_000_000
+    REDIS_HOST: str = 'redis'
+    REDIS_PORT: int = 6379
+    REDIS_DB: int = 0
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 5.0
+    REDIS_SOCKET_TIMEOUT: float = 2.0
+    REDIS_CONNECT_TIMEOUT: float = 2.0
+    REDIS_CLIENT_CACHE: bool = False
+    REDIS_CLIENT_CACHE_SIZE: int = 10_000
+    REDIS_CLIENT_CACHE_MODE: str = 'tracking'
+    STRATEGY_CACHE_TTL: int = 3_600
+    STRATEGY_BATCH_MAX_IDS: int = 200
+    STRATEGY_LIST_FETCH_SIZE: int = 1_000
+    ARCHIVE_CLOSED_AFTER: int = 30 * 86_400
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_INTERVAL: float = 3_600.0
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1_024
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_MAX_REQUEST_SIZE: int = 512 * 1024 * 1024
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_PATH_PATTERN: str = r'^/strategies/[^/]+/(simulate|robustness|walk-forward|optimize)'
+    ADMISSION_BYTES_PER_CANDLE: int = 100
+    ADMISSION_COMPRESSION_RATIO: int = 8
+    ADMISSION_USER_CAPACITY: int = 1_000_000
+    ADMISSION_GLOBAL_CAPACITY: int = 4_000_000
+    ADMISSION_REFILL_SECONDS: int = 60
+    SIGNAL_PREFETCH_COUNT: int = 256
+    SIGNAL_SEND_QUEUE_SIZE: int = 100
+    MARKET_DATA_DIR: str = 'market_data'
+    INGEST_BATCH_SIZE: int = 50_000
+    INGEST_PREFETCH_COUNT: int = 1_000
+    INGEST_FLUSH_INTERVAL: float = 1.0
+    INDICATOR_CACHE_DIR: str = 'indicator_cache'
+    INDICATOR_CACHE_MEMORY_ITEMS: int = 64
+    INDICATOR_CACHE_DISK_BYTES: int = 2 * 1024 * 1024 * 1024
 
     model_config = SettingsConfigDict(env_file="../.env")
 
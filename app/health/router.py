@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Response
+from starlette.status import HTTP_200_OK, HTTP_503_SERVICE_UNAVAILABLE
+
+from app.health.utils import ReadinessCheck
+
+router = APIRouter(prefix='/health')
+
+
+@router.get('/live', status_code=HTTP_200_OK)
+async def live():
+    return {'status': 'ok'}
+
+
+@router.get('/ready', status_code=HTTP_200_OK)
+async def ready(response: Response):
+    report = await ReadinessCheck().run()
+    if not report['ready']:
+        response.status_code = HTTP_503_SERVICE_UNAVAILABLE
+    return report
@@ -0,0 +1,76 @@
+import asyncio
+
+from sqlalchemy import text
+
+from app import dependencies
+from app.config import settings
+
+
+class ReadinessCheck:
+    """
+    State of this worker's database pool, Redis pool and broker connection.
+
+    Every probe is bounded by ``HEALTH_CHECK_TIMEOUT``, so a worker whose
+    pools are exhausted reports itself unready instead of hanging the check.
+    """
+
+    @staticmethod
+    async def _probe(coroutine) -> str | None:
+        try:
+            await asyncio.wait_for(coroutine, settings.HEALTH_CHECK_TIMEOUT)
+        except Exception as e:
+            return repr(e)
+        return None
+
+    async def _ping_database(self):
+        async with dependencies.engine.connect() as connection:
+            await connection.execute(text('SELECT 1'))
+
+    async def database(self) -> dict:
+        engine = dependencies.engine
+        if engine is None:
+            return {'ok': False, 'error': 'not initialized'}
+        error = await self._probe(self._ping_database())
+        pool = engine.pool
+        return {
+            'ok': error is None,
+            'error': error,
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow(),
+        }
+
+    async def redis(self) -> dict:
+        client = dependencies.redis_client
+        if client is None:
+            return {'ok': False, 'error': 'not initialized'}
+        error = await self._probe(client.ping())
+        return {
+            'ok': error is None,
+            'error': error,
+            'max_connections': client.connection_pool.max_connections,
+        }
+
+    @staticmethod
+    def broker() -> dict:
+        connection, channel = dependencies._connection, dependencies._channel
+        connected = connection is not None and not connection.is_closed
+        channel_open = channel is not None and not channel.is_closed
+        return {
+            'ok': connected and channel_open,
+            'connected': connected,
+            'channel_open': channel_open,
+        }
+
+    async def run(self) -> dict:
+        database, redis = await asyncio.gather(self.database(), self.redis())
+        broker = self.broker()
+        warm = dependencies.ready
+        return {
+            'ready': warm and database['ok'] and redis['ok'] and broker['ok'],
+            'warm': warm,
+            'database': database,
+            'redis': redis,
+            'broker': broker,
+        }
@@ -0,0 +1,206 @@
+import heapq
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import ORMExecuteState, Session
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|\$\d+|\?")
+_WHITESPACE = re.compile(r'\s+')
+_stats: ContextVar['QueryStats | None'] = ContextVar('query_stats', default=None)
+
+
+def normalize(statement: str) -> str:
+    """Statement shape without literals, to spot the same query repeated."""
+    return _WHITESPACE.sub(' ', _LITERALS.sub('?', statement)).strip()
+
+
+class QueryBudgetExceeded(Exception):
+    def __init__(self, stats: 'QueryStats', limit: int, message=None,
+                 errors=None):
+        message = f'{stats.count} queries against a budget of {limit}.'
+        repeated = stats.repeated()
+        if repeated:
+            message += f' Repeated: {repeated}.'
+        if stats.lazy_loads:
+            message += f' Lazy loads: {sorted(set(stats.lazy_loads))}.'
+        super().__init__(message)
+
+        self.errors = errors
+
+
+class QueryStats:
+    """Queries run while collecting for one request or ``query_budget`` block."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.statements: Counter[str] = Counter()
+        self.lazy_loads: list[str] = []
+        self._slowest: list[tuple[float, int, str]] = []
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total_time += elapsed
+        self.statements[normalize(statement)] += 1
+        entry = (elapsed, self.count, statement)
+        if len(self._slowest) < settings.SQL_SLOWEST_STATEMENTS:
+            heapq.heappush(self._slowest, entry)
+        else:
+            heapq.heappushpop(self._slowest, entry)
+
+    @property
+    def slowest(self) -> list[tuple[float, str]]:
+        return [
+            (elapsed, statement)
+            for elapsed, _, statement in sorted(self._slowest, reverse=True)
+        ]
+
+    def repeated(self) -> dict[str, int]:
+        """Statements run often enough in one unit of work to look like N+1."""
+        return {
+            statement: count for statement, count in self.statements.items()
+            if count >= settings.SQL_N_PLUS_ONE_THRESHOLD
+        }
+
+    def problems(self) -> list[str]:
+        problems = [
+            f'{count}x {statement}'
+            for statement, count in self.repeated().items()
+        ]
+        problems += [f'lazy load of {path}' for path in self.lazy_loads]
+        return problems
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    stats = _stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if elapsed >= settings.SQL_SLOW_QUERY_THRESHOLD:
+        logger.warning('Slow query (%.1f ms): %s', elapsed * 1000, statement)
+
+
+def _on_orm_execute(orm_execute_state: ORMExecuteState):
+    stats = _stats.get()
+    if (
+            stats is not None
+            # load options, lazy_loaded_from included, only exist on SELECTs
+            and orm_execute_state.is_select
+            and orm_execute_state.lazy_loaded_from is not None
+    ):
+        path = orm_execute_state.loader_strategy_path
+        stats.lazy_loads.append(
+            f'{path[0].class_.__name__}.{path[1].key}' if path else 'unknown'
+        )
+
+
+def instrument(engine: Engine):
+    """Time every statement of ``engine``; pass ``AsyncEngine.sync_engine``."""
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    if not event.contains(Session, 'do_orm_execute', _on_orm_execute):
+        event.listen(Session, 'do_orm_execute', _on_orm_execute)
+
+
+@contextmanager
+def query_budget(limit: int, allow_repeated: bool = False):
+    """
+    Collect the queries run inside the block and raise
+    ``QueryBudgetExceeded`` if there are more than ``limit`` or, unless
+    ``allow_repeated``, if the block repeats a statement N+1 style or lazy
+    loads a relationship. Meant for tests and benchmarks.
+    """
+    stats = QueryStats()
+    token = _stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _stats.reset(token)
+    if stats.count > limit or (not allow_repeated and stats.problems()):
+        raise QueryBudgetExceeded(stats, limit)
+
+
+class QueryBudget:
+    """
+    Route dependency declaring how many queries a request may run, e.g.
+    ``dependencies=[Depends(QueryBudget(3))]``. Overruns and N+1 patterns are
+    logged, or raised with ``SQL_STRICT`` so that tests fail on them.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+
+    async def __call__(self):
+        yield
+        stats = _stats.get()
+        if stats is None:
+            return
+        problems = stats.problems()
+        if stats.count <= self.limit and not problems:
+            return
+        if settings.SQL_STRICT:
+            raise QueryBudgetExceeded(stats, self.limit)
+        logger.warning(
+            'Query budget of %d exceeded with %d queries%s', self.limit,
+            stats.count, f": {'; '.join(problems)}" if problems else '',
+        )
+
+
+class QueryStatsMiddleware:
+    """
+    Collects the queries of each request, reports them in ``Server-Timing``
+    (``db;dur=<ms>;desc="<count> queries"``) and logs the slowest statements
+    of requests that ran more than ``SQL_REQUEST_QUERY_LIMIT`` queries.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+
+        async def send_with_stats(message: Message):
+            if message['type'] == 'http.response.start' and stats.count:
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    'Server-Timing',
+                    f'db;dur={stats.total_time * 1000:.1f};'
+                    f'desc="{stats.count} queries"',
+                )
+            await send(message)
+
+        token = _stats.set(stats)
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _stats.reset(token)
+            if stats.count > settings.SQL_REQUEST_QUERY_LIMIT:
+                logger.warning(
+                    '%s %s ran %d queries in %.1f ms, slowest: %s',
+                    scope['method'], scope['path'], stats.count,
+                    stats.total_time * 1000,
+                    [f'{elapsed * 1000:.1f} ms {statement}'
+                     for elapsed, statement in stats.slowest],
+                )
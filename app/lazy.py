@@ -0,0 +1,56 @@
+import importlib
+import importlib.util
+import logging
+import sys
+import threading
+import time
+from types import ModuleType
+
+logger = logging.getLogger(__name__)
+
+# the numerical stack, needed only by simulations and market data
+NUMERIC_MODULES = ('numpy', 'pandas')
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Return ``name`` as a module that is executed on first attribute access.
+
+    Modules holding it can be imported for free at startup, as long as they
+    do not touch it at module level (annotations included, so such modules
+    use ``from __future__ import annotations``).
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def load(*names: str):
+    for name in names:
+        # any attribute access makes a lazy module execute
+        getattr(importlib.import_module(name), '__name__')
+
+
+def preload(*names: str) -> threading.Thread:
+    """Load modules in a background thread, ahead of the first request."""
+
+    def run():
+        started = time.perf_counter()
+        try:
+            load(*names)
+        except ImportError:
+            logger.exception('Failed to preload %s', ', '.join(names))
+            return
+        logger.info('Preloaded %s in %.2fs', ', '.join(names),
+                    time.perf_counter() - started)
+
+    thread = threading.Thread(target=run, name='preload', daemon=True)
+    thread.start()
+    return thread
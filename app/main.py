@@ -1,14 +1,33 @@
 import uvicorn
 from fastapi import FastAPI
 
+from app.admission import AdmissionMiddleware
 from app.auth.router import router as auth_router
+from app.compression import CompressionMiddleware
+from app.config import settings
 from app.dependencies import lifespan
+from app.health.router import router as health_router
+from app.instrumentation import QueryStatsMiddleware
+from app.profiling import ProfilingMiddleware
+from app.signal.router import router as signal_router
 from app.strategy.router import router as strategy_router
 
 app = FastAPI(docs_url='/', title='Strategy Management', lifespan=lifespan)
 
 app.include_router(auth_router, tags=["auth"])
 app.include_router(strategy_router, tags=["strategies"])
+app.include_router(signal_router, tags=["signals"])
+app.include_router(health_router, tags=["health"])
+
+# added last runs first: admission rejects before anything is decompressed
+if settings.SQL_INSTRUMENTATION:
+    app.add_middleware(QueryStatsMiddleware)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
 
 
 if __name__ == '__main__':
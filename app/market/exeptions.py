@@ -0,0 +1,33 @@
+class BaseMarketDataError(Exception):
+    pass
+
+
+class InvalidSymbolError(BaseMarketDataError):
+    def __init__(self, symbol: str, message=None, errors=None):
+        message = f'Symbol {symbol!r} is not supported.'
+        super().__init__(message)
+
+        self.errors = errors
+
+
+class DatasetNotExistError(BaseMarketDataError):
+    def __init__(self, symbol: str, message=None, errors=None):
+        message = f'Dataset {symbol} does not exist.'
+        super().__init__(message)
+
+        self.errors = errors
+
+
+class InvalidBarsError(BaseMarketDataError):
+    def __init__(self, message='Bars are in incorrect format.', errors=None):
+        super().__init__(message)
+
+        self.errors = errors
+
+
+class UnknownIndicatorError(BaseMarketDataError):
+    def __init__(self, name: str, message=None, errors=None):
+        message = f'Indicator {name} is not supported.'
+        super().__init__(message)
+
+        self.errors = errors
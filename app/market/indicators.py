@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+
+from app.cache import LocalCache
+from app.config import settings
+from app.lazy import lazy_import
+from app.market.exeptions import UnknownIndicatorError
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+
+def momentum(close: np.ndarray, period: int = 1) -> np.ndarray:
+    """Change of the close over ``period`` candles, NaN where undefined."""
+    values = np.full(len(close), np.nan)
+    if len(close) > period:
+        np.subtract(close[period:], close[:-period], out=values[period:])
+    return values
+
+
+# indicator name to (function of the close column, default parameters)
+INDICATORS = {
+    'momentum': (momentum, {'period': 1}),
+}
+
+
+def content_digest(close: np.ndarray) -> str:
+    """Digest of an uploaded series, from the bytes of its close column."""
+    return hashlib.blake2b(
+        np.ascontiguousarray(close, dtype=np.float64), digest_size=16
+    ).hexdigest()
+
+
+def dataset_digest(symbol: str, timeframe: str | None, rows: int) -> str:
+    """
+    Digest of a stored dataset. The store is append-only, so a frame is
+    identified by its symbol, timeframe and the base rows it was built from.
+    """
+    return hashlib.blake2b(
+        f'{symbol}/{timeframe}/{rows}'.encode(), digest_size=16
+    ).hexdigest()
+
+
+class IndicatorCache:
+    """
+    Computed indicator columns keyed by dataset digest, indicator name and
+    parameters.
+
+    Every column is written once as ``<key>.npy`` under
+    ``INDICATOR_CACHE_DIR`` and read back memory-mapped, so all workers on
+    the host share one copy through the page cache. Each process keeps the
+    last ``INDICATOR_CACHE_MEMORY_ITEMS`` mappings open; files are evicted
+    least recently used first once they take more than
+    ``INDICATOR_CACHE_DISK_BYTES``, reads touch their mtime.
+    """
+
+    def __init__(self, root: str | Path | None = None,
+                 memory_items: int | None = None,
+                 disk_bytes: int | None = None):
+        self.root = Path(root or settings.INDICATOR_CACHE_DIR)
+        self.disk_bytes = disk_bytes or settings.INDICATOR_CACHE_DISK_BYTES
+        self._mapped = LocalCache(
+            memory_items or settings.INDICATOR_CACHE_MEMORY_ITEMS
+        )
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(digest: str, name: str, params: dict) -> str:
+        return '-'.join(
+            [digest, name, *(f'{k}={v}' for k, v in sorted(params.items()))]
+        )
+
+    def get(self, digest: str, name: str, close: np.ndarray,
+            **params) -> np.ndarray:
+        """
+        Column ``name`` of the series ``close`` identified by ``digest``,
+        computed only when neither this process nor the disk has it.
+        """
+        try:
+            function, defaults = INDICATORS[name]
+        except KeyError:
+            raise UnknownIndicatorError(name)
+        params = {**defaults, **params}
+        key = self.key(digest, name, params)
+
+        with self._lock:
+            values = self._mapped.get(key)
+        if values is not None and len(values) == len(close):
+            return values
+
+        path = self.root / f'{key}.npy'
+        values = self._load(path, len(close))
+        if values is None:
+            computed = function(np.asarray(close, dtype=np.float64), **params)
+            if not self._store(path, computed):
+                return computed
+            values = self._load(path, len(close))
+            if values is None:
+                # evicted at once: larger than the whole disk budget
+                return computed
+        with self._lock:
+            self._mapped.set(key, values)
+        return values
+
+    @staticmethod
+    def _load(path: Path, rows: int) -> np.ndarray | None:
+        try:
+            values = np.load(path, mmap_mode='r')
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return values if len(values) == rows else None
+
+    def _store(self, path: Path, values: np.ndarray) -> bool:
+        # written aside and swapped in, readers map complete files only
+        tmp_path = path.with_name(
+            f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp'
+        )
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'wb') as file:
+                np.save(file, values)
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.exception('Failed to cache indicator column %s', path.name)
+            tmp_path.unlink(missing_ok=True)
+            return False
+        self._evict()
+        return True
+
+    def _evict(self):
+        files = []
+        for path in self.root.glob('*.npy'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_bytes:
+                break
+            # workers that still map the file keep it until they drop it
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+indicator_cache = IndicatorCache()
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import codecs
+import json
+from typing import AsyncIterable
+
+from app.lazy import lazy_import
+from app.market.exeptions import InvalidBarsError
+from app.market.store import COLUMNS
+from app.market.utils import to_epoch_seconds, to_price_column
+
+np = lazy_import('numpy')
+
+# rows collected as Python objects before being validated and copied into
+# the columns, which bounds the transient per-row objects
+BATCH_ROWS = 8_192
+# a single candle never gets near this; more undecodable text means garbage
+MAX_PENDING_CHARS = 64 * 1024
+# generous encoded size of one candle: the columns are sized up front from
+# the body length and rather grow (in place) than over-allocate
+CANDLE_BYTES_HINT = 128
+# NaT as int64
+_NAT = -2 ** 63
+_WHITESPACE = ' \t\n\r'
+
+
+class CandleColumns:
+    """
+    Growable ``date/open/high/low/close/volume`` arrays.
+
+    Columns grow in place with ``ndarray.resize`` (a ``realloc`` that large
+    allocations usually satisfy without copying) and are trimmed to their
+    length at the end, so the finished arrays are the only full copy of the
+    data.
+    """
+
+    def __init__(self, capacity: int = BATCH_ROWS):
+        self.size = 0
+        self.capacity = max(capacity, BATCH_ROWS)
+        self.columns = {
+            name: np.empty(self.capacity, dtype) for name, dtype in
+            COLUMNS.items()
+        }
+
+    def _reserve(self, rows: int):
+        if self.size + rows <= self.capacity:
+            return
+        self.capacity = max(self.size + rows, self.capacity + self.capacity // 4)
+        for column in self.columns.values():
+            column.resize(self.capacity, refcheck=False)
+
+    def extend(self, batch: dict[str, list]):
+        rows = len(batch['date'])
+        if not rows:
+            return
+        # validate every column before any of them is written
+        try:
+            values = {
+                name: (
+                    to_epoch_seconds(batch[name]) if name == 'date'
+                    else to_price_column(name, batch[name], dtype)
+                )
+                for name, dtype in COLUMNS.items()
+            }
+        except (TypeError, ValueError) as e:
+            raise InvalidBarsError(errors=e)
+        for name, column in values.items():
+            if column.ndim != 1 or len(column) != rows:
+                raise InvalidBarsError(f'Column {name} is in incorrect format.')
+        if np.any(values['date'] == _NAT):
+            raise InvalidBarsError('Some of your provided data does not have date.')
+
+        self._reserve(rows)
+        for name, column in values.items():
+            self.columns[name][self.size:self.size + rows] = column
+        self.size += rows
+
+    def finish(self) -> dict[str, np.ndarray]:
+        for column in self.columns.values():
+            column.resize(self.size, refcheck=False)
+        self.capacity = self.size
+        return self.columns
+
+
+class CandleStreamParser:
+    """
+    Incremental parser for a JSON array of candle objects
+    ``[{"date": ..., "open": ..., ...}, ...]``.
+
+    Text is decoded as it arrives and the complete objects of each chunk are
+    parsed together; their fields are appended to per-column lists that are
+    flushed into :class:`CandleColumns` every ``BATCH_ROWS`` rows. Only an
+    incomplete trailing object is ever kept as text.
+    """
+
+    def __init__(self, size_hint: int | None = None):
+        capacity = (size_hint or 0) // CANDLE_BYTES_HINT
+        self.columns = CandleColumns(capacity)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._text = ''
+        self._started = False
+        self._closed = False
+        self._expect_value = True
+        self._batch = self._new_batch()
+
+    @staticmethod
+    def _new_batch() -> dict[str, list]:
+        return {name: [] for name in COLUMNS}
+
+    def _flush(self):
+        self.columns.extend(self._batch)
+        self._batch = self._new_batch()
+
+    def _add_rows(self, rows: list):
+        try:
+            for name, values in self._batch.items():
+                values.extend([row[name] for row in rows])
+        except KeyError as e:
+            raise InvalidBarsError(f'Candle is missing {e.args[0]!r}.')
+        except TypeError:
+            raise InvalidBarsError('Every candle must be an object.')
+        if len(self._batch['date']) >= BATCH_ROWS:
+            self._flush()
+
+    def _decode_many(self, text: str, position: int) -> int | None:
+        # every complete object of the chunk in one C-level parse; fails if
+        # the last '}' is not the end of an object, e.g. it sits in a string
+        end = text.rfind('}', position) + 1
+        if not end:
+            return None
+        try:
+            rows = json.loads(f'[{text[position:end]}]')
+        except ValueError:
+            return None
+        self._add_rows(rows)
+        return end
+
+    @staticmethod
+    def _skip(text: str, position: int) -> int:
+        while position < len(text) and text[position] in _WHITESPACE:
+            position += 1
+        return position
+
+    def _consume(self, final: bool):
+        text, position = self._text, 0
+        bulk = True
+        while True:
+            position = self._skip(text, position)
+            if position == len(text) or self._closed:
+                break
+            char = text[position]
+            if not self._started:
+                if char != '[':
+                    raise InvalidBarsError('Expected a JSON array of candles.')
+                self._started = True
+                position += 1
+            elif char == ']' and (not self._expect_value or not self.rows):
+                self._closed = True
+                position += 1
+            elif char == ',' and not self._expect_value:
+                self._expect_value = True
+                position += 1
+            elif self._expect_value:
+                end = self._decode_many(text, position) if bulk else None
+                if end is not None:
+                    self._expect_value = False
+                    position = end
+                    continue
+                # one object at a time for the rest of this chunk
+                bulk = False
+                try:
+                    row, end = self._json.raw_decode(text, position)
+                except ValueError as e:
+                    if final or len(text) - position > MAX_PENDING_CHARS:
+                        raise InvalidBarsError(errors=e)
+                    # the object continues in the next chunk
+                    break
+                self._add_rows([row])
+                self._expect_value = False
+                position = end
+            else:
+                raise InvalidBarsError('Candles must be separated by commas.')
+        self._text = text[position:]
+        if self._closed and self._skip(self._text, 0) < len(self._text):
+            raise InvalidBarsError('Unexpected data after the candle array.')
+
+    @property
+    def rows(self) -> int:
+        return self.columns.size + len(self._batch['date'])
+
+    def feed(self, data: bytes):
+        try:
+            self._text += self._decoder.decode(data)
+        except UnicodeDecodeError as e:
+            raise InvalidBarsError(errors=e)
+        self._consume(final=False)
+
+    def close(self) -> dict[str, np.ndarray]:
+        try:
+            self._text += self._decoder.decode(b'', final=True)
+        except UnicodeDecodeError as e:
+            raise InvalidBarsError(errors=e)
+        self._consume(final=True)
+        if not self._closed:
+            raise InvalidBarsError('Candle array is not terminated.')
+        self._flush()
+        return self.columns.finish()
+
+
+async def parse_candles(stream: AsyncIterable[bytes],
+                        size_hint: int | None = None) -> dict[str, np.ndarray]:
+    parser = CandleStreamParser(size_hint)
+    async for chunk in stream:
+        parser.feed(chunk)
+    return parser.close()
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import errno
+import json
+import os
+import shutil
+import threading
+
+from app.lazy import lazy_import
+from app.market.exeptions import DatasetNotExistError
+from app.market.store import COLUMNS, ColumnStore
+
+np = lazy_import('numpy')
+
+TIMEFRAMES = {
+    '1m': 60,
+    '5m': 300,
+    '15m': 900,
+    '30m': 1_800,
+    '1h': 3_600,
+    '4h': 14_400,
+    '1d': 86_400,
+}
+
+
+def resample(columns: dict[str, np.ndarray],
+             timeframe: str) -> dict[str, np.ndarray]:
+    """
+    Aggregate bars into ``timeframe`` buckets: first open, max high, min low,
+    last close, summed volume. Bucket boundaries are found once and every
+    column is reduced with a single ``reduceat`` over them.
+    """
+    seconds = TIMEFRAMES[timeframe]
+    date = np.asarray(columns['date'])
+    if len(date) == 0:
+        return {name: np.empty(0, dtype) for name, dtype in COLUMNS.items()}
+    if np.any(date[1:] < date[:-1]):
+        order = np.argsort(date, kind='stable')
+        columns = {name: np.asarray(columns[name])[order] for name in COLUMNS}
+        date = columns['date']
+
+    bucket = date - date % seconds
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(date)] - 1
+    return {
+        'date': bucket[starts],
+        'open': np.asarray(columns['open'])[starts],
+        'high': np.maximum.reduceat(columns['high'], starts),
+        'low': np.minimum.reduceat(columns['low'], starts),
+        'close': np.asarray(columns['close'])[ends],
+        'volume': np.add.reduceat(columns['volume'], starts),
+    }
+
+
+class TimeframeCache:
+    """
+    Resampled frames of stored datasets, cached next to the base columns as
+    ``<symbol>/tf_<timeframe>`` and rebuilt when the base dataset has grown.
+    """
+
+    def __init__(self, store: ColumnStore | None = None):
+        self.store = store or ColumnStore()
+
+    def get_frame(self, symbol: str,
+                  timeframe: str | None = None) -> dict[str, np.ndarray]:
+        return self.get_frame_rows(symbol, timeframe)[0]
+
+    def get_frame_rows(self, symbol: str, timeframe: str | None = None
+                       ) -> tuple[dict[str, np.ndarray], int]:
+        """The frame and the number of base rows it was built from."""
+        if timeframe is None:
+            frame = self.store.read(symbol)
+            return frame, len(frame['date'])
+
+        source_rows = self.store.rows(symbol)
+        cached = ColumnStore(self.store.root / symbol)
+        name = f'tf_{timeframe}'
+        meta_path = cached.root / name / 'meta.json'
+        try:
+            with open(meta_path) as file:
+                meta = json.load(file)
+            if meta['source_rows'] == source_rows:
+                frame = cached.read(name)
+                # a frame swapped out under the read is rebuilt below
+                if len(frame['date']) == meta['rows']:
+                    return frame, source_rows
+        except (FileNotFoundError, DatasetNotExistError, ValueError, KeyError):
+            pass
+
+        # rows appended since source_rows was read are left to the next build
+        frame = resample(
+            {
+                column: values[:source_rows]
+                for column, values in self.store.read(symbol).items()
+            },
+            timeframe,
+        )
+        self._write(cached, name, frame, source_rows)
+        return frame, source_rows
+
+    @staticmethod
+    def _write(cached: ColumnStore, name: str, frame: dict[str, np.ndarray],
+               source_rows: int):
+        # built aside, per process and thread, then swapped in; a reader
+        # caught between the removal and the swap rebuilds the frame itself
+        tmp_name = f'{name}.{os.getpid()}.{threading.get_ident()}.tmp'
+        shutil.rmtree(cached.root / tmp_name, ignore_errors=True)
+        cached.append(tmp_name, frame)
+        with open(cached.root / tmp_name / 'meta.json', 'w') as file:
+            json.dump(
+                {'source_rows': source_rows, 'rows': len(frame['date'])}, file
+            )
+        shutil.rmtree(cached.root / name, ignore_errors=True)
+        try:
+            os.replace(cached.root / tmp_name, cached.root / name)
+        except OSError as e:
+            if e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                raise
+            # another writer swapped in a frame of the same rows first
+            shutil.rmtree(cached.root / tmp_name, ignore_errors=True)
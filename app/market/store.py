@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+
+from app.config import settings
+from app.lazy import lazy_import
+from app.market.exeptions import DatasetNotExistError, InvalidSymbolError
+
+np = lazy_import('numpy')
+
+COLUMNS = {
+    'date': '<i8',
+    'open': '<f8',
+    'high': '<f8',
+    'low': '<f8',
+    'close': '<f8',
+    'volume': '<f8',
+}
+VALUE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+SYMBOL_PATTERN = re.compile(r'^[A-Za-z0-9_.\-]{1,50}$')
+
+
+class ColumnStore:
+    """
+    Append-only OHLCV store with one raw little-endian file per column.
+
+    ``date`` holds epoch seconds and is written last, so its length is the
+    number of committed rows; a partially written batch is truncated away on
+    the next append.
+    """
+
+    def __init__(self, root: str | Path | None = None):
+        self.root = Path(root or settings.MARKET_DATA_DIR)
+
+    def _path(self, symbol: str) -> Path:
+        if not SYMBOL_PATTERN.match(symbol):
+            raise InvalidSymbolError(symbol)
+        return self.root / symbol
+
+    @staticmethod
+    def _file(path: Path, column: str) -> Path:
+        return path / f'{column}.bin'
+
+    def _committed_rows(self, path: Path) -> int:
+        try:
+            return os.path.getsize(self._file(path, 'date')) // 8
+        except FileNotFoundError:
+            return 0
+
+    def append(self, symbol: str, columns: dict[str, np.ndarray]) -> int:
+        path = self._path(symbol)
+        path.mkdir(parents=True, exist_ok=True)
+        committed = self._committed_rows(path)
+        for name in (*VALUE_COLUMNS, 'date'):
+            file_path = self._file(path, name)
+            with open(file_path, 'ab') as file:
+                if file.tell() > committed * np.dtype(COLUMNS[name]).itemsize:
+                    file.truncate(committed * np.dtype(COLUMNS[name]).itemsize)
+                np.ascontiguousarray(
+                    columns[name], dtype=COLUMNS[name]
+                ).tofile(file)
+        return len(columns['date'])
+
+    def last_date(self, symbol: str) -> int | None:
+        """Epoch seconds of the last committed bar, ``None`` when empty."""
+        path = self._path(symbol)
+        rows = self._committed_rows(path)
+        if not rows:
+            return None
+        with open(self._file(path, 'date'), 'rb') as file:
+            file.seek((rows - 1) * 8)
+            return int(np.frombuffer(file.read(8), dtype=COLUMNS['date'])[0])
+
+    def rows(self, symbol: str) -> int:
+        path = self._path(symbol)
+        if not path.is_dir():
+            raise DatasetNotExistError(symbol)
+        return self._committed_rows(path)
+
+    def read(self, symbol: str) -> dict[str, np.ndarray]:
+        """Memory-map every column of ``symbol`` without copying it."""
+        rows = self.rows(symbol)
+        path = self._path(symbol)
+        if rows == 0:
+            return {name: np.empty(0, dtype) for name, dtype in COLUMNS.items()}
+        return {
+            name: np.memmap(
+                self._file(path, name), dtype=dtype, mode='r', shape=(rows,)
+            )
+            for name, dtype in COLUMNS.items()
+        }
+
+    def symbols(self) -> list[str]:
+        if not self.root.is_dir():
+            return []
+        return sorted(path.name for path in self.root.iterdir() if path.is_dir())
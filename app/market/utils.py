@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import json
+import warnings
+from collections import defaultdict
+
+from app.lazy import lazy_import
+from app.market.exeptions import InvalidBarsError, InvalidSymbolError
+from app.market.store import COLUMNS, SYMBOL_PATTERN
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+def to_epoch_seconds(values) -> np.ndarray:
+    if not isinstance(values, np.ndarray):
+        kinds = set(map(type, values)) - {type(None)}
+        if bool in kinds:
+            raise InvalidBarsError('Dates must be strings or epoch seconds.')
+        if str in kinds and len(kinds) > 1:
+            # numbers would be read as years among strings
+            raise InvalidBarsError(
+                'Dates must be all strings or all epoch seconds.'
+            )
+    array = np.asarray(values)
+    if array.dtype.kind == 'b':
+        raise InvalidBarsError('Dates must be strings or epoch seconds.')
+    if array.dtype.kind in 'iuf':
+        return array.astype(np.int64)
+    try:
+        with warnings.catch_warnings():
+            # ISO strings with an offset are converted to UTC, as intended
+            warnings.simplefilter('ignore', UserWarning)
+            return np.asarray(array, dtype='datetime64[s]').astype(np.int64)
+    except ValueError:
+        # anything else pandas can make sense of, e.g. '01/02/2024 10:00'
+        dates = pd.to_datetime(array, utc=True).tz_localize(None)
+        return dates.to_numpy('datetime64[s]').astype(np.int64)
+
+
+def to_price_column(name: str, values, dtype) -> np.ndarray:
+    column = np.asarray(values, dtype=dtype)
+    # null converts to NaN
+    if np.isnan(column).any():
+        raise InvalidBarsError(f'Column {name} has missing values.')
+    return column
+
+
+class BarBatcher:
+    """
+    Buffers OHLCV bars per symbol until they are drained as one sorted
+    columnar batch per symbol.
+
+    A message body is either a columnar object
+    ``{"symbol": ..., "date": [...], "open": [...], ...}`` or one bar / a list
+    of bars ``{"symbol": ..., "date": ..., "open": ..., ...}``.
+    """
+
+    def __init__(self):
+        self._chunks: dict[str, list[dict[str, np.ndarray]]] = defaultdict(list)
+        self.rows = 0
+
+    @staticmethod
+    def _build_chunk(symbol: str, columns: dict) -> dict[str, np.ndarray]:
+        if not isinstance(symbol, str) or not SYMBOL_PATTERN.match(symbol):
+            raise InvalidSymbolError(str(symbol))
+        try:
+            chunk = {
+                name: (
+                    to_epoch_seconds(columns[name]) if name == 'date'
+                    else to_price_column(name, columns[name], dtype)
+                )
+                for name, dtype in COLUMNS.items()
+            }
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvalidBarsError(errors=e)
+        if len({len(column) for column in chunk.values()}) != 1:
+            raise InvalidBarsError('Columns have different lengths.')
+        return chunk
+
+    def add(self, body: bytes):
+        try:
+            payload = json.loads(body)
+        except ValueError as e:
+            raise InvalidBarsError(errors=e)
+        self.add_payload(payload)
+
+    def add_payload(self, payload):
+        """Buffer an already decoded message body."""
+        if isinstance(payload, dict) and isinstance(payload.get('date'), list):
+            chunks = [
+                (payload.get('symbol'),
+                 self._build_chunk(payload.get('symbol'), payload))
+            ]
+        else:
+            chunks = self._build_row_chunks(payload)
+        # only buffer once the whole message is valid
+        for symbol, chunk in chunks:
+            self._chunks[symbol].append(chunk)
+            self.rows += len(chunk['date'])
+
+    def _build_row_chunks(self, payload) -> list[tuple[str, dict]]:
+        if isinstance(payload, dict):
+            payload = [payload]
+        if not isinstance(payload, list):
+            raise InvalidBarsError()
+
+        grouped = defaultdict(lambda: defaultdict(list))
+        try:
+            for bar in payload:
+                columns = grouped[bar['symbol']]
+                for name in COLUMNS:
+                    columns[name].append(bar[name])
+        except (KeyError, TypeError) as e:
+            raise InvalidBarsError(errors=e)
+        return [
+            (symbol, self._build_chunk(symbol, columns))
+            for symbol, columns in grouped.items()
+        ]
+
+    def drain(self) -> dict[str, dict[str, np.ndarray]]:
+        batches = {}
+        for symbol, chunks in self._chunks.items():
+            columns = {
+                name: np.concatenate([chunk[name] for chunk in chunks])
+                for name in COLUMNS
+            }
+            order = np.argsort(columns['date'], kind='stable')
+            batches[symbol] = {
+                name: column[order] for name, column in columns.items()
+            }
+        self._chunks = defaultdict(list)
+        self.rows = 0
+        return batches
@@ -0,0 +1,168 @@
+"""
+Memory of the ``/simulate`` pipeline per stage, measured against budgets.
+
+A synthetic random walk is streamed as a JSON body in 64 KiB chunks through
+``parse_candles`` and ``_run_simulation``, as the route does (without HTTP
+or the database), then turned into ledger records as the background write
+does. Each stage reported by the profiler gets the peak Python memory it
+added (``tracemalloc``) and the growth of the process's peak RSS (Linux
+only, on a separate untraced run). Used by ``benchmarks/memory_budget.py``
+and ``tests/test_memory_budget.py``.
+"""
+import asyncio
+import contextlib
+import json
+import tracemalloc
+from types import SimpleNamespace
+
+from app.lazy import lazy_import
+from app.market.parser import parse_candles
+from app.profiling import _current
+from app.strategy.router import _run_simulation
+from app.strategy.services import SimulationRunService, SimulationService
+
+np = lazy_import('numpy')
+
+RECEIVE_CHUNK = 64 * 1024
+# rows generated at a time, about one receive chunk of JSON
+BLOCK_ROWS = 512
+MIB = 2 ** 20
+
+# stage to the memory it may add, in multiples of the raw arrays; about 15%
+# over what the synthetic walk (a trade every three candles) needs
+BUDGETS = {
+    'parse': 1.5,
+    'frame': 0.5,
+    'indicators': 0.5,
+    'load_strategy': 0.1,
+    'trade_loop': 3.0,
+    'metrics': 0.1,
+    'trade_records': 1.5,
+    'pipeline': 5.0,
+}
+# MiB allowed on top of every budget
+SLACK = 4.0
+
+STRATEGY = SimpleNamespace(id=1, timeframe=None, to_dict=lambda: {
+    'buy_conditions': [{'indicator': 'momentum', 'threshold': 0.5}],
+    'sell_conditions': [{'indicator': 'momentum', 'threshold': -0.5}],
+})
+
+
+def body_chunks(candles: int):
+    rng = np.random.default_rng(candles)
+    level = 100.0
+    yield b'['
+    for start in range(0, candles, BLOCK_ROWS):
+        rows = min(BLOCK_ROWS, candles - start)
+        close = level + rng.standard_normal(rows).cumsum()
+        level = close[-1]
+        dates = (
+            np.arange(start, start + rows, dtype=np.int64) * 60 + 1_700_000_000
+        ).astype('datetime64[s]').astype(str)
+        text = json.dumps([
+            {'date': date, 'open': price, 'high': price + 0.5,
+             'low': price - 0.5, 'close': price, 'volume': 100.0}
+            for date, price in zip(dates.tolist(), close.tolist())
+        ])[1:-1]
+        block = (f',{text}' if start else text).encode()
+        for offset in range(0, len(block), RECEIVE_CHUNK):
+            yield block[offset:offset + RECEIVE_CHUNK]
+    yield b']'
+
+
+def _proc_status() -> dict[str, int]:
+    with open('/proc/self/status') as file:
+        return {
+            name: int(value.split()[0]) * 1024
+            for name, value in (line.split(':', 1) for line in file)
+            if name in ('VmRSS', 'VmHWM')
+        }
+
+
+def _reset_rss_peak() -> int | None:
+    """Reset the peak RSS of the process; its current RSS, if supported."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+        return _proc_status()['VmRSS']
+    except (OSError, KeyError):
+        return None
+
+
+class MemoryProfile:
+    """
+    Stands in for the ``RequestProfile`` of a profiled request, so the
+    app's own ``stage()`` calls record memory instead of time.
+    """
+
+    def __init__(self, traced: bool):
+        self.traced = traced
+        self.stages: dict[str, int | None] = {}
+        self.peak = 0
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        if self.traced:
+            start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        else:
+            rss = _reset_rss_peak()
+        try:
+            yield
+        finally:
+            if self.traced:
+                peak = tracemalloc.get_traced_memory()[1]
+                self.stages[name] = peak - start
+                self.peak = max(self.peak, peak)
+            else:
+                self.stages[name] = (
+                    None if rss is None else _proc_status()['VmHWM'] - rss
+                )
+
+
+async def run_pipeline(candles: int, size_hint: int, profile: MemoryProfile):
+    async def stream():
+        for chunk in body_chunks(candles):
+            yield chunk
+
+    _current.set(profile)
+    with profile.stage('parse'):
+        columns = await parse_candles(stream(), size_hint)
+    service = SimulationService(None, strategy=STRATEGY)
+    result = await _run_simulation(service, columns)
+    with profile.stage('trade_records'):
+        SimulationRunService._trade_records(0, service.trades)
+    return result
+
+
+def measure(candles: int) -> tuple[dict, dict, int]:
+    """Traced memory per stage and for the pipeline, and RSS growth."""
+    size_hint = sum(len(chunk) for chunk in body_chunks(candles))
+    untraced = MemoryProfile(traced=False)
+    asyncio.run(run_pipeline(candles, size_hint, untraced))
+
+    traced = MemoryProfile(traced=True)
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        asyncio.run(run_pipeline(candles, size_hint, traced))
+    finally:
+        tracemalloc.stop()
+    return traced.stages, untraced.stages, traced.peak - baseline
+
+
+def raw_size(candles: int) -> int:
+    """Bytes of the raw arrays: six float64 or int64 columns."""
+    return candles * 6 * 8
+
+
+def allowed(name: str, candles: int, budgets: dict = BUDGETS,
+            slack: float = SLACK) -> float:
+    """Bytes that stage ``name`` may add at ``candles`` candles."""
+    return budgets[name] * raw_size(candles) + slack * MIB
+
+
+def warm_up():
+    """Imports, lazy modules and first-call caches are not measured."""
+    asyncio.run(run_pipeline(10_000, 0, MemoryProfile(traced=False)))
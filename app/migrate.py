@@ -0,0 +1,30 @@
+import argparse
+import logging
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_CONFIG = Path(__file__).resolve().parent.parent / 'alembic.ini'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Upgrade the database to head.')
+    parser.add_argument(
+        '--on-start', action='store_true',
+        help='called on container start: skipped unless RUN_MIGRATIONS_ON_START',
+    )
+    args = parser.parse_args()
+    if args.on_start and not settings.RUN_MIGRATIONS_ON_START:
+        logger.info('RUN_MIGRATIONS_ON_START is off, skipping migrations')
+        return
+    command.upgrade(Config(str(ALEMBIC_CONFIG)), 'head')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
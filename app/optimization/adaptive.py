@@ -0,0 +1,204 @@
+import asyncio
+import json
+import logging
+import math
+import time
+import uuid
+
+from redis.asyncio import Redis
+
+from app.config import settings
+from app.lazy import lazy_import
+from app.optimization.coordinator import GridSearch, job_key
+from app.optimization.grid import Grid, merge
+
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+# share of each generation the next one is sampled around
+ELITE_FRACTION = 0.2
+# weight of the elite's spread against the previous one
+SMOOTHING = 0.7
+# in grid steps: below it, sampling would only repeat the elite
+MIN_STD = 0.5
+
+
+class AdaptiveSearch:
+    """
+    Cross-entropy search over the points a grid search would enumerate.
+
+    The first generation is spread over the whole grid (and the strategy's
+    own thresholds); every next one is sampled from a normal distribution
+    over grid coordinates, fitted to the best ``ELITE_FRACTION`` of the
+    last one. Points new to the search run as a
+    small ``GridSearch`` over exactly those points, so batches are spread
+    over the optimizer workers (or the process pool with
+    ``OPTIMIZATION_BROKER=local``) with the same retries.
+
+    When the best P&L has not improved for ``OPTIMIZATION_ADAPTIVE_PATIENCE``
+    generations the search starts over from a fresh spread, keeping its
+    best points, up to ``OPTIMIZATION_ADAPTIVE_RESTARTS`` times; it stops
+    then, or after ``budget`` evaluations.
+    """
+
+    def __init__(self, broker, grid: Grid, reference: dict, top_k: int,
+                 budget: int, population: int, seed: int | None = None,
+                 start: tuple[float, float] | None = None,
+                 redis: Redis | None = None, user_id: int | None = None,
+                 strategy_id: int | None = None):
+        self.broker = broker
+        self.grid = grid
+        self.reference = reference
+        self.top_k = top_k
+        self.budget = min(budget, grid.size)
+        self.population = population
+        self.start = start
+        self.redis = redis
+        self.user_id = user_id
+        self.strategy_id = strategy_id
+        self.job_id = uuid.uuid4().hex
+        self.status = 'running'
+        self.error = None
+        self.results = []
+        self.generations = 0
+        self.shards = 0
+        self.shards_done = 0
+        self.retries = 0
+        self.started_at = time.time()
+        self.finished_at = None
+        self._rng = np.random.default_rng(seed)
+        # evaluated point to its row
+        self._rows: dict[int, dict] = {}
+
+    def state(self) -> dict:
+        return {
+            'job_id': self.job_id,
+            'user_id': self.user_id,
+            'strategy_id': self.strategy_id,
+            'method': 'adaptive',
+            'status': self.status,
+            'error': self.error,
+            'dataset': self.reference['dataset'],
+            'timeframe': self.reference['timeframe'],
+            'points': self.grid.size,
+            'points_done': len(self._rows),
+            'budget': self.budget,
+            'generations': self.generations,
+            'shards': self.shards,
+            'shards_done': self.shards_done,
+            'retries': self.retries,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'results': self.results,
+        }
+
+    async def save(self):
+        if self.redis is not None:
+            await self.redis.set(
+                job_key(self.job_id), json.dumps(self.state()),
+                ex=settings.OPTIMIZATION_RESULT_TTL,
+            )
+
+    def _first_generation(self) -> 'np.ndarray':
+        shape = np.array(self.grid.shape)
+        coords = self._rng.integers(0, shape, size=(self.population, 3))
+        if self.start is not None:
+            buy, sell = self.start
+            coords[0] = (
+                0,
+                np.abs(np.asarray(self.grid.buy) - buy).argmin(),
+                np.abs(np.asarray(self.grid.sell) - sell).argmin(),
+            )
+        return coords
+
+    def _next_generation(self, mean: 'np.ndarray',
+                         std: 'np.ndarray') -> 'np.ndarray':
+        shape = np.array(self.grid.shape)
+        coords = self._rng.normal(mean, std, size=(self.population, 3))
+        return np.rint(coords).clip(0, shape - 1).astype(np.int64)
+
+    async def _evaluate(self, points: list[int]):
+        search = GridSearch(
+            self.broker, self.grid, self.reference, len(points),
+            points=points, shard_size=settings.OPTIMIZATION_ADAPTIVE_SHARD_SIZE,
+        )
+        state = await search.run()
+        self.shards += state['shards']
+        self.shards_done += state['shards_done']
+        self.retries += state['retries']
+        if state['status'] != 'complete':
+            raise RuntimeError(state['error'])
+        for row in state['results']:
+            self._rows[row['index']] = row
+
+    async def _search(self):
+        elite = max(2, math.ceil(self.population * ELITE_FRACTION))
+        coords = self._first_generation()
+        std = None
+        stalled = 0
+        restarts = 0
+        while True:
+            sampled = np.unique(np.ravel_multi_index(coords.T, self.grid.shape))
+            remaining = self.budget - len(self._rows)
+            new = [
+                point for point in sampled.tolist() if point not in self._rows
+            ][:remaining]
+            if new:
+                await self._evaluate(new)
+            self.generations += 1
+
+            best = self.results[0]['profit_loss'] if self.results else None
+            self.results = merge(
+                self.results + [self._rows[point] for point in new],
+                self.top_k,
+            )
+            stalled = (
+                0 if best is None or self.results[0]['profit_loss'] > best
+                else stalled + 1
+            )
+            await self.save()
+            if len(self._rows) >= self.budget:
+                return
+            if stalled >= settings.OPTIMIZATION_ADAPTIVE_PATIENCE:
+                if restarts >= settings.OPTIMIZATION_ADAPTIVE_RESTARTS:
+                    return
+                # converged: look for another optimum from a fresh spread
+                restarts += 1
+                stalled = 0
+                std = None
+                coords = self._first_generation()
+                continue
+
+            rows = merge(
+                [self._rows[point] for point in sampled.tolist()
+                 if point in self._rows],
+                elite,
+            )
+            elites = np.array(np.unravel_index(
+                [row['index'] for row in rows], self.grid.shape
+            )).T
+            spread = elites.std(axis=0)
+            std = spread if std is None else (
+                SMOOTHING * spread + (1 - SMOOTHING) * std
+            )
+            std = np.maximum(std, MIN_STD)
+            coords = self._next_generation(elites.mean(axis=0), std)
+
+    async def run(self) -> dict:
+        try:
+            await self.save()
+            await self._search()
+            self.status = 'complete'
+        except asyncio.CancelledError:
+            self.status = 'failed'
+            self.error = 'Coordinator was stopped.'
+            raise
+        except Exception as e:
+            logger.exception('Adaptive search %s failed', self.job_id)
+            self.status = 'failed'
+            self.error = str(e) or type(e).__name__
+        finally:
+            self.finished_at = time.time()
+            await self.save()
+        return self.state()
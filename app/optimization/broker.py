@@ -0,0 +1,120 @@
+import asyncio
+import uuid
+from collections import defaultdict
+from typing import Awaitable, Callable
+
+import aio_pika
+from aio_pika import RobustChannel
+
+OPTIMIZATION_QUEUE_NAME = 'optimization_shards'
+
+Callback = Callable[..., Awaitable[None]]
+
+
+class RabbitBroker:
+    """
+    The few queue operations a grid search needs, over a RabbitMQ channel.
+    Messages handed to callbacks are aio-pika's own.
+    """
+
+    def __init__(self, channel: RobustChannel):
+        self.channel = channel
+        self._queues: dict[str, aio_pika.abc.AbstractQueue] = {}
+
+    async def declare(self, name: str | None = None) -> str:
+        """A durable work queue, or without ``name`` a private reply queue."""
+        if name is None:
+            queue = await self.channel.declare_queue(
+                exclusive=True, auto_delete=True
+            )
+        else:
+            queue = await self.channel.declare_queue(name, durable=True)
+        self._queues[queue.name] = queue
+        return queue.name
+
+    async def publish(self, name: str, body: bytes,
+                      reply_to: str | None = None):
+        await self.channel.default_exchange.publish(
+            aio_pika.Message(
+                body=body,
+                content_type='application/json',
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                reply_to=reply_to,
+            ),
+            routing_key=name,
+        )
+
+    async def consume(self, name: str, callback: Callback,
+                      prefetch: int = 1) -> Callable[[], Awaitable[None]]:
+        # in-flight messages are bounded by the channel's QoS instead
+        queue = self._queues[name]
+        tag = await queue.consume(callback)
+
+        async def cancel():
+            await queue.cancel(tag)
+
+        return cancel
+
+
+class LocalMessage:
+    def __init__(self, broker: 'LocalBroker', name: str, body: bytes,
+                 reply_to: str | None):
+        self.broker = broker
+        self.name = name
+        self.body = body
+        self.reply_to = reply_to
+        self.redelivered = False
+
+    async def ack(self):
+        pass
+
+    async def nack(self, requeue: bool = True):
+        if requeue:
+            self.redelivered = True
+            self.broker.queue(self.name).put_nowait(self)
+
+
+class LocalBroker:
+    """
+    In-process stand-in for ``RabbitBroker``: queues are asyncio queues and
+    every consumer runs ``prefetch`` callbacks at a time. Lets a grid search
+    run on one host, shards evaluated on its process pool, without a broker.
+    """
+
+    def __init__(self):
+        self._queues: dict[str, asyncio.Queue] = defaultdict(asyncio.Queue)
+
+    def queue(self, name: str) -> asyncio.Queue:
+        return self._queues[name]
+
+    async def declare(self, name: str | None = None) -> str:
+        name = name or f'local.{uuid.uuid4().hex}'
+        self.queue(name)
+        return name
+
+    async def publish(self, name: str, body: bytes,
+                      reply_to: str | None = None):
+        self.queue(name).put_nowait(LocalMessage(self, name, body, reply_to))
+
+    async def consume(self, name: str, callback: Callback,
+                      prefetch: int = 1) -> Callable[[], Awaitable[None]]:
+        queue = self.queue(name)
+
+        async def deliver():
+            while True:
+                message = await queue.get()
+                # cancelling the consumer leaves a running callback to finish,
+                # as aio-pika does, and cannot be lost inside one
+                await asyncio.shield(callback(message))
+
+        tasks = [asyncio.create_task(deliver()) for _ in range(prefetch)]
+
+        async def cancel():
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if name.startswith('local.'):
+                # reply queues go away with their consumer, as auto_delete ones
+                self._queues.pop(name, None)
+
+        return cancel
@@ -0,0 +1,258 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+
+from redis.asyncio import Redis
+
+from app.config import settings
+from app.optimization.broker import OPTIMIZATION_QUEUE_NAME, LocalBroker
+from app.optimization.exeptions import OptimizationJobNotExistError
+from app.optimization.grid import Grid, merge
+from app.optimization.worker import ShardWorker
+
+logger = logging.getLogger(__name__)
+
+# how often outstanding shards are checked against their deadline
+CHECK_INTERVAL = 1.0
+
+
+def job_key(job_id: str) -> str:
+    return f'optimization_job_{job_id}'
+
+
+class GridSearch:
+    """
+    Coordinator of one distributed grid search.
+
+    The grid is split into shards of ``OPTIMIZATION_SHARD_SIZE`` points,
+    published to ``OPTIMIZATION_QUEUE_NAME`` with a reference to the dataset
+    rather than the candles, and the partial top-K results streaming back on
+    a private reply queue are merged as they arrive.
+
+    A shard is published again when its worker reports an error or no
+    result comes back within ``OPTIMIZATION_SHARD_TIMEOUT`` of a worker
+    reporting it started, at most ``OPTIMIZATION_SHARD_RETRIES`` times; a
+    shard still waiting in the queue has no deadline, however long the
+    queue, and a worker that dies mid-shard has the broker redeliver it.
+    Late and duplicate results are ignored.
+    Progress and the current top-K are kept in Redis, so any worker can
+    report on the search.
+
+    With ``points``, only those grid points are searched, in shards of
+    ``shard_size`` of them.
+    """
+
+    def __init__(self, broker, grid: Grid, reference: dict, top_k: int,
+                 redis: Redis | None = None, user_id: int | None = None,
+                 strategy_id: int | None = None,
+                 points: list[int] | None = None,
+                 shard_size: int | None = None):
+        self.broker = broker
+        self.grid = grid
+        self.reference = reference
+        self.top_k = top_k
+        self.redis = redis
+        self.user_id = user_id
+        self.strategy_id = strategy_id
+        self.points = points
+        self.job_id = uuid.uuid4().hex
+        self.size = grid.size if points is None else len(points)
+        shard_size = shard_size or settings.OPTIMIZATION_SHARD_SIZE
+        self.shards = [
+            (start, min(start + shard_size, self.size))
+            for start in range(0, self.size, shard_size)
+        ]
+        self.status = 'running'
+        self.error = None
+        self.results = []
+        self.points_done = 0
+        self.retries = 0
+        self.started_at = time.time()
+        self.finished_at = None
+        self._attempts = [0] * len(self.shards)
+        self._done: set[int] = set()
+        # published shards without a result yet
+        self._outstanding: set[int] = set()
+        # started shard to the loop time it is given up on
+        self._deadlines: dict[int, float] = {}
+        self._finished = asyncio.Event()
+        self._reply_to = None
+
+    def state(self) -> dict:
+        return {
+            'job_id': self.job_id,
+            'user_id': self.user_id,
+            'strategy_id': self.strategy_id,
+            'method': 'grid',
+            'status': self.status,
+            'error': self.error,
+            'dataset': self.reference['dataset'],
+            'timeframe': self.reference['timeframe'],
+            'points': self.size,
+            'points_done': self.points_done,
+            'shards': len(self.shards),
+            'shards_done': len(self._done),
+            'retries': self.retries,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'results': self.results,
+        }
+
+    async def save(self):
+        if self.redis is not None:
+            await self.redis.set(
+                job_key(self.job_id), json.dumps(self.state()),
+                ex=settings.OPTIMIZATION_RESULT_TTL,
+            )
+
+    async def _publish(self, shard: int):
+        self._attempts[shard] += 1
+        self._outstanding.add(shard)
+        # queued again: the deadline starts over once a worker takes it
+        self._deadlines.pop(shard, None)
+        start, stop = self.shards[shard]
+        body = {
+            'job_id': self.job_id,
+            'shard': shard,
+            'start': start,
+            'stop': stop,
+            'grid': self.grid.to_dict(),
+            'reference': self.reference,
+            'top_k': self.top_k,
+        }
+        if self.points is not None:
+            body['points'] = self.points[start:stop]
+        await self.broker.publish(
+            OPTIMIZATION_QUEUE_NAME, json.dumps(body).encode(),
+            reply_to=self._reply_to,
+        )
+
+    def _fail(self, error: str):
+        self.status = 'failed'
+        self.error = error
+        self._finished.set()
+
+    async def _retry(self, shard: int, reason: str):
+        if self._attempts[shard] > settings.OPTIMIZATION_SHARD_RETRIES:
+            self._fail(f'Shard {shard} failed: {reason}')
+            return
+        logger.warning(
+            'Retrying shard %s of job %s: %s', shard, self.job_id, reason
+        )
+        self.retries += 1
+        await self._publish(shard)
+
+    async def on_result(self, message):
+        await message.ack()
+        result = json.loads(message.body)
+        shard = result.get('shard')
+        if result.get('job_id') != self.job_id or shard not in self._outstanding:
+            return
+        if result.get('started'):
+            self._deadlines[shard] = (
+                asyncio.get_running_loop().time()
+                + settings.OPTIMIZATION_SHARD_TIMEOUT
+            )
+            return
+        if 'error' in result:
+            await self._retry(shard, result['error'])
+            return
+
+        self._outstanding.discard(shard)
+        self._deadlines.pop(shard, None)
+        self._done.add(shard)
+        start, stop = self.shards[shard]
+        self.points_done += stop - start
+        self.results = merge(self.results + result['results'], self.top_k)
+        if len(self._done) == len(self.shards):
+            self.status = 'complete'
+            self._finished.set()
+        await self.save()
+
+    async def run(self) -> dict:
+        loop = asyncio.get_running_loop()
+        await self.broker.declare(OPTIMIZATION_QUEUE_NAME)
+        self._reply_to = await self.broker.declare()
+        cancel = await self.broker.consume(self._reply_to, self.on_result)
+        try:
+            await self.save()
+            for shard in range(len(self.shards)):
+                await self._publish(shard)
+            while not self._finished.is_set():
+                try:
+                    await asyncio.wait_for(
+                        self._finished.wait(), timeout=CHECK_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    now = loop.time()
+                    for shard, deadline in list(self._deadlines.items()):
+                        if deadline <= now and not self._finished.is_set():
+                            await self._retry(shard, 'no result in time')
+        except asyncio.CancelledError:
+            self._fail('Coordinator was stopped.')
+            raise
+        except Exception as e:
+            logger.exception('Grid search %s failed', self.job_id)
+            self._fail(str(e) or type(e).__name__)
+        finally:
+            await cancel()
+            self.finished_at = time.time()
+            await self.save()
+        return self.state()
+
+
+_searches: set[asyncio.Task] = set()
+_local_broker: LocalBroker | None = None
+_stop_local_workers = None
+
+
+def start_search(search, finished=None) -> asyncio.Task:
+    """
+    Run ``search`` in the background of this worker, then await
+    ``finished``, if given, however the search ends.
+    """
+    async def run():
+        try:
+            return await search.run()
+        finally:
+            if finished is not None:
+                await finished()
+
+    task = asyncio.create_task(run())
+    _searches.add(task)
+    task.add_done_callback(_searches.discard)
+    return task
+
+
+async def local_broker() -> LocalBroker:
+    """
+    The stand-in broker of ``OPTIMIZATION_BROKER=local``, with a
+    ``ShardWorker`` on this worker's process pool consuming from it.
+    """
+    global _local_broker, _stop_local_workers
+    if _local_broker is None:
+        _local_broker = LocalBroker()
+        _stop_local_workers = await ShardWorker(_local_broker).start()
+    return _local_broker
+
+
+async def stop_searches():
+    global _local_broker, _stop_local_workers
+    for task in list(_searches):
+        task.cancel()
+    await asyncio.gather(*_searches, return_exceptions=True)
+    if _stop_local_workers is not None:
+        await _stop_local_workers()
+    _local_broker = _stop_local_workers = None
+
+
+async def get_job(redis: Redis, job_id: str, user_id: int) -> dict:
+    value = await redis.get(job_key(job_id))
+    if value is None:
+        raise OptimizationJobNotExistError()
+    job = json.loads(value)
+    if job['user_id'] != user_id:
+        raise OptimizationJobNotExistError()
+    return job
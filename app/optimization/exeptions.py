@@ -0,0 +1,55 @@
+class BaseOptimizationError(Exception):
+    pass
+
+
+class TooManyGridPointsError(BaseOptimizationError):
+    def __init__(self, points: int, limit: int, message=None, errors=None):
+        message = f'Grid has {points} points, at most {limit} are allowed.'
+        super().__init__(message)
+
+        self.errors = errors
+
+
+class EmptyGridError(BaseOptimizationError):
+    def __init__(self, message='Every grid axis needs at least one value.',
+                 errors=None):
+        super().__init__(message)
+
+        self.errors = errors
+
+
+class OptimizationJobNotExistError(BaseOptimizationError):
+    def __init__(self, message='Optimization job does not exist', errors=None):
+        super().__init__(message)
+
+        self.errors = errors
+
+
+class NoWalkForwardWindowError(BaseOptimizationError):
+    def __init__(self, candles: int, train: int, test: int, message=None,
+                 errors=None):
+        message = (f'{candles} candles do not fit a train window of {train} '
+                   f'and a test window of {test} candles.')
+        super().__init__(message)
+
+        self.errors = errors
+
+
+class TooManyEvaluationsError(BaseOptimizationError):
+    def __init__(self, evaluations: int, limit: int, message=None,
+                 errors=None):
+        message = (f'Walk-forward needs {evaluations} evaluations (windows x '
+                   f'grid points), at most {limit} are allowed.')
+        super().__init__(message)
+
+        self.errors = errors
+
+
+class TooManyWalkForwardCandlesError(BaseOptimizationError):
+    def __init__(self, candles: int, limit: int, message=None, errors=None):
+        message = (f'Walk-forward needs {candles} candle evaluations (windows '
+                   f'x grid points x train candles), at most {limit} are '
+                   f'allowed.')
+        super().__init__(message)
+
+        self.errors = errors
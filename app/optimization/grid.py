@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import heapq
+import math
+from functools import lru_cache
+
+from app.config import settings
+from app.lazy import lazy_import
+from app.market.indicators import dataset_digest, indicator_cache
+from app.market.resample import TimeframeCache, resample
+from app.market.store import ColumnStore
+from app.optimization.exeptions import EmptyGridError, TooManyGridPointsError
+from app.strategy.robustness import trade_rows
+
+np = lazy_import('numpy')
+
+
+class Grid:
+    """
+    Cartesian product of momentum periods, buy thresholds and sell
+    thresholds; point ``i`` is ``np.unravel_index(i, grid.shape)`` over them.
+    """
+
+    def __init__(self, period: list[int], buy: list[float], sell: list[float]):
+        self.period = list(period)
+        self.buy = list(buy)
+        self.sell = list(sell)
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return len(self.period), len(self.buy), len(self.sell)
+
+    @property
+    def size(self) -> int:
+        return len(self.period) * len(self.buy) * len(self.sell)
+
+    def to_dict(self) -> dict:
+        return {'period': self.period, 'buy': self.buy, 'sell': self.sell}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Grid:
+        return cls(data['period'], data['buy'], data['sell'])
+
+
+def axis_values(axis) -> list[float]:
+    """Explicit values as given, or ``start`` to ``stop`` inclusive by ``step``."""
+    if isinstance(axis, list):
+        return axis
+    count = math.floor((axis.stop - axis.start) / axis.step + 1e-9) + 1
+    if count > settings.OPTIMIZATION_MAX_POINTS:
+        raise TooManyGridPointsError(count, settings.OPTIMIZATION_MAX_POINTS)
+    return [round(axis.start + step * axis.step, 12) for step in range(count)]
+
+
+def build_grid(period: list[int], buy, sell) -> Grid:
+    grid = Grid(period, axis_values(buy), axis_values(sell))
+    if not grid.size:
+        raise EmptyGridError()
+    if grid.size > settings.OPTIMIZATION_MAX_POINTS:
+        raise TooManyGridPointsError(grid.size, settings.OPTIMIZATION_MAX_POINTS)
+    return grid
+
+
+def dataset_reference(dataset: str, timeframe: str | None) -> dict:
+    """
+    What shard messages carry instead of the candles: every worker reads the
+    dataset from its own (shared) ``MARKET_DATA_DIR``, up to the rows there
+    were when the search started.
+    """
+    return {
+        'dataset': dataset,
+        'timeframe': timeframe,
+        'rows': ColumnStore().rows(dataset),
+    }
+
+
+@lru_cache(maxsize=4)
+def load_reference(dataset: str, timeframe: str | None,
+                   rows: int) -> tuple[np.ndarray, str]:
+    """Close column and indicator cache digest of a dataset reference."""
+    frame, current = TimeframeCache().get_frame_rows(dataset, timeframe)
+    if current != rows:
+        # the dataset grew since the search started: rebuild what it saw
+        base = {
+            name: column[:rows]
+            for name, column in ColumnStore().read(dataset).items()
+        }
+        frame = resample(base, timeframe) if timeframe else base
+    return (
+        np.asarray(frame['close'], dtype=np.float64),
+        dataset_digest(dataset, timeframe, rows),
+    )
+
+
+def evaluate(close: np.ndarray, digest: str | None, grid: Grid,
+             indices: np.ndarray, top_k: int,
+             momentums: dict[int, np.ndarray] | None = None) -> list[dict]:
+    """
+    The ``top_k`` of the grid points ``indices`` by P&L, with the metrics
+    ``SimulationService`` reports for them. Momentum columns come from
+    ``momentums`` (period to its values from the second row of ``close``)
+    or else the indicator cache, so each period is computed once per host.
+    """
+    momentums = dict(momentums or {})
+    best = []
+    points = zip(
+        indices.tolist(),
+        *(axis.tolist() for axis in np.unravel_index(indices, grid.shape)),
+    )
+    for index, period, buy, sell in points:
+        period = grid.period[period]
+        if period not in momentums:
+            # row k of the frame is diffs[k - 1] for trade_rows
+            momentums[period] = indicator_cache.get(
+                digest, 'momentum', close, period=period
+            )[1:]
+        entries, exits = trade_rows(
+            momentums[period], grid.buy[buy], grid.sell[sell]
+        )
+        profits = close[exits] - close[entries[:len(exits)]]
+        total_trades = len(entries) + len(exits)
+        row = {
+            'index': index,
+            'period': period,
+            'buy': grid.buy[buy],
+            'sell': grid.sell[sell],
+            'total_trades': total_trades,
+            'profit_loss': float(profits.sum()),
+            'win_rate': (
+                int((profits > 0).sum()) / total_trades * 100
+                if total_trades
+                else 0
+            ),
+            'max_drawdown': float(profits.min()) if len(profits) else 0,
+        }
+        entry = (row['profit_loss'], -index, row)
+        if len(best) < top_k:
+            heapq.heappush(best, entry)
+        else:
+            heapq.heappushpop(best, entry)
+    return [row for *_, row in sorted(best, reverse=True)]
+
+
+def evaluate_shard(reference: dict, grid: dict, start: int, stop: int,
+                   top_k: int, points: list[int] | None = None) -> list[dict]:
+    """
+    Pool task: ``evaluate`` over a dataset reference, of the points
+    ``start`` to ``stop`` or, when given, of the explicit ``points``.
+    """
+    close, digest = load_reference(
+        reference['dataset'], reference['timeframe'], reference['rows']
+    )
+    indices = (
+        np.arange(start, stop) if points is None
+        else np.asarray(points, dtype=np.int64)
+    )
+    return evaluate(close, digest, Grid.from_dict(grid), indices, top_k)
+
+
+def merge(rows: list[dict], top_k: int) -> list[dict]:
+    """Best ``top_k`` of partial results, ties to the lower point index."""
+    return heapq.nlargest(
+        top_k, rows, key=lambda row: (row['profit_loss'], -row['index'])
+    )
@@ -0,0 +1,28 @@
+import asyncio
+import logging
+
+from aio_pika import connect_robust
+
+from app.dependencies import RABBITMQ_URL
+from app.optimization.broker import RabbitBroker
+from app.optimization.worker import ShardWorker
+from app.strategy.robustness import pool_size, shutdown_pool
+
+
+async def run():
+    connection = await connect_robust(RABBITMQ_URL)
+    async with connection:
+        channel = await connection.channel()
+        # one shard per pool process in flight, the rest stay queued for
+        # other nodes
+        await channel.set_qos(prefetch_count=pool_size())
+        await ShardWorker(RabbitBroker(channel)).start()
+        try:
+            await asyncio.Future()
+        finally:
+            await asyncio.to_thread(shutdown_pool)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run())
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import math
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+
+from app.config import settings
+from app.lazy import lazy_import
+from app.market.indicators import indicator_cache
+from app.optimization.exeptions import (
+    NoWalkForwardWindowError,
+    TooManyEvaluationsError,
+    TooManyWalkForwardCandlesError,
+)
+from app.optimization.grid import Grid, evaluate
+from app.strategy.robustness import (
+    CHUNKS_PER_CORE,
+    get_pool,
+    pool_size,
+    shutdown_pool,
+)
+
+np = lazy_import('numpy')
+
+
+def windows(candles: int, train: int, test: int,
+            step: int) -> list[tuple[int, int, int]]:
+    """``(start, split, stop)`` rows of every train and test window pair."""
+    return [
+        (start, start + train, start + train + test)
+        for start in range(0, candles - train - test + 1, step)
+    ]
+
+
+def _fill_series(buffer, close: np.ndarray, digest: str,
+                 periods: list[int]):
+    series = np.ndarray(
+        (len(periods) + 1, len(close)), dtype=np.float64, buffer=buffer
+    )
+    series[0] = close
+    for row, period in enumerate(periods, 1):
+        series[row] = indicator_cache.get(
+            digest, 'momentum', close, period=period
+        )
+
+
+def _walk_windows(series: np.ndarray, periods: list[int], grid: Grid,
+                  bounds: list[tuple[int, int, int]]) -> list[dict]:
+    close = series[0]
+    momentums = dict(zip(periods, series[1:]))
+    everything = np.arange(grid.size)
+    rows = []
+    for start, split, stop in bounds:
+        # views of the full series: momentum at the start of a window is
+        # the one of the whole series, not undefined as for a fresh upload
+        best = evaluate(
+            close[start:split], None, grid, everything, 1,
+            {period: values[start + 1:split]
+             for period, values in momentums.items()},
+        )[0]
+        row = evaluate(
+            close[split:stop], None, grid, np.array([best['index']]), 1,
+            {best['period']: momentums[best['period']][split + 1:stop]},
+        )[0]
+        rows.append({
+            'train_start': start,
+            'test_start': split,
+            'test_stop': stop,
+            'period': best['period'],
+            'buy': best['buy'],
+            'sell': best['sell'],
+            'in_sample_profit_loss': best['profit_loss'],
+            'total_trades': row['total_trades'],
+            'profit_loss': row['profit_loss'],
+            'win_rate': row['win_rate'],
+            'max_drawdown': row['max_drawdown'],
+        })
+    return rows
+
+
+def _run_windows(name: str, shape: tuple[int, int], periods: list[int],
+                 grid: dict, bounds: list[tuple[int, int, int]]) -> list[dict]:
+    """
+    Pool task: optimize each train window over the whole grid and evaluate
+    its best point on the test window that follows it.
+    """
+    shared = SharedMemory(name=name)
+    try:
+        return _walk_windows(
+            np.ndarray(shape, dtype=np.float64, buffer=shared.buf), periods,
+            Grid.from_dict(grid), bounds,
+        )
+    finally:
+        shared.close()
+
+
+def totals(rows: list[dict]) -> dict:
+    """Out-of-sample performance over all test windows."""
+    total_trades = sum(row['total_trades'] for row in rows)
+    return {
+        'windows': len(rows),
+        'profitable_windows': sum(1 for row in rows if row['profit_loss'] > 0),
+        'total_trades': total_trades,
+        'profit_loss': sum(row['profit_loss'] for row in rows),
+        'in_sample_profit_loss': sum(
+            row['in_sample_profit_loss'] for row in rows
+        ),
+        'win_rate': (
+            sum(row['win_rate'] * row['total_trades'] for row in rows)
+            / total_trades
+            if total_trades
+            else 0
+        ),
+        'max_drawdown': min(row['max_drawdown'] for row in rows),
+    }
+
+
+async def walk_forward(close: np.ndarray, digest: str, grid: Grid,
+                       train: int, test: int, step: int,
+                       pool: ProcessPoolExecutor | None = None) -> list[dict]:
+    """
+    Roll a ``train`` + ``test`` window over ``close`` by ``step`` candles and
+    return one row per window: the grid point with the best in-sample P&L
+    and its out-of-sample metrics.
+
+    The close and one momentum column per period of the grid (from the
+    indicator cache) are copied once into shared memory; pool tasks carry
+    its name and a range of windows, and slice their windows as views.
+    """
+    bounds = windows(len(close), train, test, step)
+    if not bounds:
+        raise NoWalkForwardWindowError(len(close), train, test)
+    evaluations = len(bounds) * grid.size
+    if evaluations > settings.WALK_FORWARD_MAX_EVALUATIONS:
+        raise TooManyEvaluationsError(
+            evaluations, settings.WALK_FORWARD_MAX_EVALUATIONS
+        )
+    # the cost of a window grows with its length: every grid point over the
+    # train candles, then the best one over the test candles
+    candles = len(bounds) * (grid.size * train + test)
+    if candles > settings.WALK_FORWARD_MAX_CANDLES:
+        raise TooManyWalkForwardCandlesError(
+            candles, settings.WALK_FORWARD_MAX_CANDLES
+        )
+
+    own_pool = pool is None
+    pool = pool or get_pool()
+    loop = asyncio.get_running_loop()
+    periods = sorted(set(grid.period))
+    shape = (len(periods) + 1, len(close))
+    shared = SharedMemory(create=True, size=shape[0] * shape[1] * 8)
+    try:
+        await asyncio.to_thread(_fill_series, shared.buf, close, digest, periods)
+        chunk = math.ceil(len(bounds) / (pool_size() * CHUNKS_PER_CORE))
+        tasks = [
+            loop.run_in_executor(
+                pool, _run_windows, shared.name, shape, periods,
+                grid.to_dict(), bounds[start:start + chunk],
+            )
+            for start in range(0, len(bounds), chunk)
+        ]
+        return [row for rows in await asyncio.gather(*tasks) for row in rows]
+    except BrokenProcessPool:
+        # a child died (e.g. killed for memory): start a fresh pool next time
+        if own_pool:
+            shutdown_pool()
+        raise
+    finally:
+        shared.close()
+        shared.unlink()
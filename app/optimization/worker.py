@@ -0,0 +1,74 @@
+import asyncio
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.optimization.broker import OPTIMIZATION_QUEUE_NAME
+from app.optimization.grid import evaluate_shard
+from app.strategy.robustness import get_pool, pool_size, shutdown_pool
+
+logger = logging.getLogger(__name__)
+
+
+class ShardWorker:
+    """
+    Evaluates grid search shards from ``OPTIMIZATION_QUEUE_NAME`` on a process
+    pool and sends the top-K of each shard to the queue it names in
+    ``reply_to``, after a ``started`` reply there when it takes the shard,
+    from which the coordinator times it.
+
+    A shard is acknowledged only once its reply is published: if this
+    worker dies, the broker hands its unacknowledged shards to another one.
+    ``app.optimization.runner`` runs one over RabbitMQ; any number of them,
+    on any node that sees the same ``MARKET_DATA_DIR``, share the shards.
+    """
+
+    def __init__(self, broker, pool: ProcessPoolExecutor | None = None):
+        self.broker = broker
+        self.pool = pool
+
+    async def on_shard(self, message):
+        try:
+            shard = json.loads(message.body)
+            args = (
+                shard['reference'], shard['grid'], shard['start'],
+                shard['stop'], shard['top_k'], shard.get('points'),
+            )
+        except (ValueError, KeyError):
+            logger.warning('Rejected malformed shard message')
+            await message.nack(requeue=False)
+            return
+
+        loop = asyncio.get_running_loop()
+        reply = {'job_id': shard['job_id'], 'shard': shard['shard']}
+        if message.reply_to:
+            await self.broker.publish(
+                message.reply_to, json.dumps({**reply, 'started': True}).encode()
+            )
+        try:
+            reply['results'] = await loop.run_in_executor(
+                self.pool or get_pool(), evaluate_shard, *args
+            )
+        except BrokenProcessPool:
+            # a child died (e.g. killed for memory): give the shard back
+            if self.pool is None:
+                shutdown_pool()
+            await message.nack(requeue=True)
+            return
+        except Exception as e:
+            logger.exception(
+                'Shard %s of job %s failed', shard['shard'], shard['job_id']
+            )
+            reply['error'] = str(e) or type(e).__name__
+        if message.reply_to:
+            await self.broker.publish(
+                message.reply_to, json.dumps(reply).encode()
+            )
+        await message.ack()
+
+    async def start(self):
+        await self.broker.declare(OPTIMIZATION_QUEUE_NAME)
+        return await self.broker.consume(
+            OPTIMIZATION_QUEUE_NAME, self.on_shard, prefetch=pool_size()
+        )
@@ -0,0 +1,210 @@
+import asyncio
+import contextlib
+import cProfile
+import hmac
+import json
+import logging
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'x-profile'
+PROFILE_QUERY_PARAM = 'profile'
+_NO_STAGE = contextlib.nullcontext()
+_current: ContextVar['RequestProfile | None'] = ContextVar(
+    'request_profile', default=None
+)
+
+
+def stage(name: str):
+    """
+    Time a stage of the current request when it is being profiled.
+
+    Outside a profiled request this is one context variable lookup returning
+    a shared no-op context manager.
+    """
+    profile = _current.get()
+    if profile is None:
+        return _NO_STAGE
+    return profile.stage(name)
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread every ``interval`` seconds from a
+    background thread and counts identical stacks, in collapsed-stack form
+    (``outer;inner count``) as read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name='stack-sampler', daemon=True
+        )
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(
+                f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})'
+            )
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self._collapse(frame)] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path: Path):
+        with open(path, 'w') as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f'{stack} {count}\n')
+
+
+class RequestProfile:
+    """Profiler and stage timings of a single request."""
+
+    # cProfile hooks the whole thread, so one deterministic profile at a time
+    _deterministic_lock = threading.Lock()
+
+    def __init__(self, scope: Scope):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = scope['method']
+        self.path = scope['path']
+        self.stages: dict[str, dict[str, float]] = {}
+        self._profiler: cProfile.Profile | StackSampler | None = None
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            timing = self.stages.setdefault(name, {'wall': 0.0, 'cpu': 0.0})
+            timing['wall'] += time.perf_counter() - wall
+            timing['cpu'] += time.thread_time() - cpu
+
+    def start(self):
+        if settings.PROFILING_MODE == 'deterministic':
+            if not self._deterministic_lock.acquire(blocking=False):
+                logger.warning('Profile %s skipped: another deterministic '
+                               'profile is running', self.id)
+                return
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._profiler = StackSampler(
+                threading.get_ident(), settings.PROFILING_INTERVAL
+            )
+            self._profiler.start()
+
+    def stop(self):
+        if isinstance(self._profiler, cProfile.Profile):
+            self._profiler.disable()
+            self._deterministic_lock.release()
+        elif self._profiler is not None:
+            self._profiler.stop()
+
+    def server_timing(self) -> str:
+        return ', '.join(
+            f'{name};dur={timing["wall"] * 1000:.1f}'
+            for name, timing in self.stages.items()
+        )
+
+    def dump(self):
+        directory = Path(settings.PROFILING_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = re.sub(r'[^A-Za-z0-9_.-]+', '_', self.path).strip('_')
+        name = f'{time.strftime("%Y%m%d-%H%M%S")}-{self.method}-{path}-{self.id}'
+        if isinstance(self._profiler, cProfile.Profile):
+            self._profiler.dump_stats(directory / f'{name}.prof')
+        elif self._profiler is not None:
+            self._profiler.dump(directory / f'{name}.folded')
+        with open(directory / f'{name}.stages.json', 'w') as file:
+            json.dump({
+                'method': self.method,
+                'path': self.path,
+                'stages': self.stages,
+            }, file, indent=2)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests carrying ``X-Profile: <PROFILING_TOKEN>`` (or
+    ``?profile=<PROFILING_TOKEN>``) and writes the profile and stage timings
+    to ``PROFILING_DIR``. Profiled responses carry ``X-Profile-Id`` and a
+    ``Server-Timing`` header with the stages.
+
+    Only installed when ``PROFILING_ENABLED`` is set.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    @staticmethod
+    def requested(scope: Scope) -> bool:
+        token = settings.PROFILING_TOKEN
+        if not token:
+            return False
+        value = Headers(scope=scope).get(PROFILE_HEADER)
+        if value is None:
+            query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+            value = query.get(PROFILE_QUERY_PARAM, [None])[0]
+        # bytes: ``compare_digest`` rejects non-ASCII strings with TypeError
+        return value is not None and hmac.compare_digest(
+            value.encode(), token.encode()
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http' or not self.requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope)
+
+        async def profiled_send(message: Message):
+            if message['type'] == 'http.response.start':
+                headers = MutableHeaders(scope=message)
+                headers['X-Profile-Id'] = profile.id
+                if profile.stages:
+                    headers.append('Server-Timing', profile.server_timing())
+            await send(message)
+
+        token = _current.set(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, profiled_send)
+        finally:
+            profile.stop()
+            _current.reset(token)
+            try:
+                await asyncio.to_thread(profile.dump)
+            except OSError:
+                logger.exception('Failed to write profile %s', profile.id)
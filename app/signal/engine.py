@@ -0,0 +1,216 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Iterable
+
+from app.strategy.models import CONDITION_TYPES
+
+BUY_CONDITIONS, SELL_CONDITIONS = CONDITION_TYPES
+
+
+class MomentumState:
+    __slots__ = ('last_close', 'value')
+
+    def __init__(self):
+        self.last_close = None
+        self.value = None
+
+    def update(self, price: float) -> tuple[float | None, float | None]:
+        previous = self.value
+        if self.last_close is not None:
+            self.value = price - self.last_close
+        self.last_close = price
+        return previous, self.value
+
+
+INDICATORS = {
+    'momentum': MomentumState,
+}
+
+
+class Signal:
+    __slots__ = (
+        'strategy_id', 'user_id', 'symbol', 'action', 'indicator',
+        'threshold', 'value', 'price',
+    )
+
+    def __init__(self, strategy_id, user_id, symbol, action, indicator,
+                 threshold, value, price):
+        self.strategy_id = strategy_id
+        self.user_id = user_id
+        self.symbol = symbol
+        self.action = action
+        self.indicator = indicator
+        self.threshold = threshold
+        self.value = value
+        self.price = price
+
+    def to_dict(self):
+        return {
+            'strategy_id': self.strategy_id,
+            'user_id': self.user_id,
+            'symbol': self.symbol,
+            'action': self.action,
+            'indicator': self.indicator,
+            'threshold': self.threshold,
+            'value': self.value,
+            'price': self.price,
+        }
+
+
+class ThresholdIndex:
+    """Conditions of one symbol/indicator/type kept sorted by threshold."""
+
+    __slots__ = ('thresholds', 'strategy_ids')
+
+    def __init__(self):
+        self.thresholds: list[float] = []
+        self.strategy_ids: list[int] = []
+
+    def __len__(self):
+        return len(self.thresholds)
+
+    def load(self, entries: Iterable[tuple[float, int]]):
+        merged = sorted(
+            [*zip(self.thresholds, self.strategy_ids), *entries]
+        )
+        self.thresholds = [threshold for threshold, _ in merged]
+        self.strategy_ids = [strategy_id for _, strategy_id in merged]
+
+    def add(self, threshold: float, strategy_id: int):
+        position = bisect_right(self.thresholds, threshold)
+        self.thresholds.insert(position, threshold)
+        self.strategy_ids.insert(position, strategy_id)
+
+    def remove(self, threshold: float, strategy_id: int):
+        position = bisect_left(self.thresholds, threshold)
+        while (
+                position < len(self.thresholds)
+                and self.thresholds[position] == threshold
+        ):
+            if self.strategy_ids[position] == strategy_id:
+                del self.thresholds[position]
+                del self.strategy_ids[position]
+                return
+            position += 1
+
+    def _slice(self, low: int, high: int) -> list[tuple[float, int]]:
+        return list(
+            zip(self.thresholds[low:high], self.strategy_ids[low:high])
+        )
+
+    def crossed_up(self, previous: float,
+                   current: float) -> list[tuple[float, int]]:
+        # value > threshold became true: previous <= threshold < current
+        if current <= previous:
+            return []
+        low = bisect_left(self.thresholds, previous)
+        high = bisect_left(self.thresholds, current, lo=low)
+        return self._slice(low, high)
+
+    def crossed_down(self, previous: float,
+                     current: float) -> list[tuple[float, int]]:
+        # value < threshold became true: current < threshold <= previous
+        if current >= previous:
+            return []
+        low = bisect_right(self.thresholds, current)
+        high = bisect_right(self.thresholds, previous, lo=low)
+        return self._slice(low, high)
+
+
+class SignalEngine:
+    """
+    Evaluates every active strategy condition against incoming ticks.
+
+    Indicator state is kept per symbol (strategy ``asset_type``) and updated
+    incrementally, so a tick costs one state update per tracked indicator
+    plus a binary search per condition type.
+    """
+
+    def __init__(self):
+        self._states: dict[tuple[str, str], object] = {}
+        self._indexes: dict[tuple[str, str, str], ThresholdIndex] = (
+            defaultdict(ThresholdIndex)
+        )
+        self._symbol_indicators: dict[str, set[str]] = defaultdict(set)
+        self._strategies: dict[int, tuple[int, str, list]] = {}
+
+    def __len__(self):
+        return len(self._strategies)
+
+    def load(self, rows: Iterable[tuple]):
+        """
+        Bulk load ``(strategy_id, user_id, symbol, indicator, type,
+        threshold)`` rows, sorting every index once instead of per insert.
+        """
+        pending = defaultdict(list)
+        for strategy_id, user_id, symbol, indicator, type_, threshold in rows:
+            if indicator not in INDICATORS:
+                continue
+            threshold = float(threshold)
+            self._register(strategy_id, user_id, symbol, indicator, type_,
+                           threshold)
+            pending[(symbol, indicator, type_)].append(
+                (threshold, strategy_id)
+            )
+        for key, entries in pending.items():
+            self._indexes[key].load(entries)
+
+    def _register(self, strategy_id, user_id, symbol, indicator, type_,
+                  threshold):
+        _, _, conditions = self._strategies.setdefault(
+            strategy_id, (user_id, symbol, [])
+        )
+        conditions.append((indicator, type_, threshold))
+        self._symbol_indicators[symbol].add(indicator)
+
+    def add_strategy(self, strategy_id: int, user_id: int, symbol: str,
+                     conditions: Iterable[tuple[str, str, float]]):
+        self.remove_strategy(strategy_id)
+        for indicator, type_, threshold in conditions:
+            if indicator not in INDICATORS:
+                continue
+            threshold = float(threshold)
+            self._register(strategy_id, user_id, symbol, indicator, type_,
+                           threshold)
+            self._indexes[(symbol, indicator, type_)].add(
+                threshold, strategy_id
+            )
+
+    def remove_strategy(self, strategy_id: int):
+        entry = self._strategies.pop(strategy_id, None)
+        if entry is None:
+            return
+        _, symbol, conditions = entry
+        for indicator, type_, threshold in conditions:
+            self._indexes[(symbol, indicator, type_)].remove(
+                threshold, strategy_id
+            )
+
+    def on_tick(self, symbol: str, price: float) -> list[Signal]:
+        signals = []
+        for indicator in self._symbol_indicators.get(symbol, ()):
+            state = self._states.get((symbol, indicator))
+            if state is None:
+                state = self._states[(symbol, indicator)] = (
+                    INDICATORS[indicator]()
+                )
+            previous, current = state.update(price)
+            if previous is None or current is None:
+                continue
+
+            for type_, action, matcher in (
+                    (BUY_CONDITIONS, 'buy', ThresholdIndex.crossed_up),
+                    (SELL_CONDITIONS, 'sell', ThresholdIndex.crossed_down),
+            ):
+                index = self._indexes.get((symbol, indicator, type_))
+                if not index:
+                    continue
+                for threshold, strategy_id in matcher(
+                        index, previous, current
+                ):
+                    user_id = self._strategies[strategy_id][0]
+                    signals.append(
+                        Signal(strategy_id, user_id, symbol, action,
+                               indicator, threshold, current, price)
+                    )
+        return signals
@@ -0,0 +1,121 @@
+import asyncio
+import contextlib
+import json
+import logging
+from collections import defaultdict
+
+import aio_pika
+from aio_pika import RobustChannel
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+USER_EVENTS_PATTERN = 'user_events_*'
+
+
+class Subscription:
+    """Bounded per-connection send queue; the oldest event is dropped when full."""
+
+    def __init__(self, user_id: int, maxsize: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def push(self, payload: str):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(payload)
+
+
+class SignalHub:
+    """
+    Fans signal and strategy events out to the WebSocket connections of
+    this worker. Every worker binds its own exclusive queue to the signal and
+    strategy event exchanges and listens to the per-user Redis channels, so
+    a connection receives its user's events whichever worker it landed on.
+    """
+
+    def __init__(self):
+        self._subscriptions: dict[int, set[Subscription]] = defaultdict(set)
+        self._redis_task: asyncio.Task | None = None
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, settings.SIGNAL_SEND_QUEUE_SIZE)
+        self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.user_id]
+
+    def dispatch(self, user_id: int, event: dict):
+        subscriptions = self._subscriptions.get(user_id)
+        if not subscriptions:
+            return
+        payload = json.dumps(event)
+        for subscription in subscriptions:
+            subscription.push(payload)
+
+    async def _on_signals(self, message: aio_pika.abc.AbstractIncomingMessage):
+        for signal in json.loads(message.body):
+            self.dispatch(signal['user_id'], {'type': 'signal', **signal})
+
+    async def _on_strategy_event(
+            self, message: aio_pika.abc.AbstractIncomingMessage
+    ):
+        event = json.loads(message.body)
+        self.dispatch(event['user_id'], {'type': 'strategy', **event})
+
+    async def _listen_redis(self, redis: Redis):
+        while True:
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.psubscribe(USER_EVENTS_PATTERN)
+                async for message in pubsub.listen():
+                    if message['type'] != 'pmessage':
+                        continue
+                    try:
+                        user_id = int(message['channel'].rsplit('_', 1)[1])
+                        self.dispatch(user_id, json.loads(message['data']))
+                    except (ValueError, KeyError, IndexError):
+                        # one bad publisher must not stop the listener
+                        logger.warning(
+                            'Dropped malformed user event on %r',
+                            message.get('channel'),
+                        )
+            except RedisConnectionError:
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    async def start(self, channel: RobustChannel, redis: Redis,
+                    signals_exchange: str, events_exchange: str):
+        for exchange_name, callback in (
+                (signals_exchange, self._on_signals),
+                (events_exchange, self._on_strategy_event),
+        ):
+            exchange = await channel.declare_exchange(
+                exchange_name, aio_pika.ExchangeType.FANOUT, durable=True
+            )
+            queue = await channel.declare_queue(exclusive=True)
+            await queue.bind(exchange)
+            await queue.consume(callback, no_ack=True)
+        self._redis_task = asyncio.create_task(self._listen_redis(redis))
+
+    async def stop(self):
+        if self._redis_task is not None:
+            self._redis_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._redis_task
+            self._redis_task = None
+
+
+signal_hub = SignalHub()
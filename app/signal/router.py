@@ -0,0 +1,48 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from starlette.status import WS_1008_POLICY_VIOLATION
+
+from app.auth.exeptions import UserNotExists
+from app.dependencies import async_session, get_current_user
+from app.signal.hub import signal_hub
+
+router = APIRouter(prefix='/signals')
+
+
+def _get_token(websocket: WebSocket) -> str | None:
+    authorization = websocket.headers.get('authorization', '')
+    scheme, _, token = authorization.partition(' ')
+    if scheme.lower() == 'bearer' and token:
+        return token
+    return websocket.query_params.get('token')
+
+
+async def _send_events(websocket: WebSocket, subscription):
+    while True:
+        await websocket.send_text(await subscription.queue.get())
+
+
+@router.websocket('/ws')
+async def stream_signals(websocket: WebSocket):
+    token = _get_token(websocket)
+    try:
+        if token is None:
+            raise HTTPException(status_code=401)
+        async with async_session() as session:
+            current_user = await get_current_user(token, session)
+    except (HTTPException, UserNotExists):
+        await websocket.close(code=WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscription = signal_hub.subscribe(current_user.id)
+    sender = asyncio.create_task(_send_events(websocket, subscription))
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        signal_hub.unsubscribe(subscription)
+        sender.cancel()
@@ -0,0 +1,111 @@
+import asyncio
+import json
+from collections import defaultdict
+
+import aio_pika
+from aio_pika import ExchangeType, connect_robust
+
+from app.config import settings
+from app.dependencies import (
+    async_session,
+    close_database,
+    init_database,
+    RABBITMQ_URL,
+    TICK_QUEUE_NAME,
+    STRATEGY_EVENTS_EXCHANGE,
+    SIGNALS_EXCHANGE,
+)
+from app.signal.engine import SignalEngine
+from app.signal.services import LiveConditionService
+
+
+class SignalRunner:
+    """
+    Feeds ticks from ``TICK_QUEUE_NAME`` into a ``SignalEngine`` and publishes
+    matched signals, keeping the index in sync with strategy change events.
+
+    Indicator state is incremental per symbol, so a single runner must see
+    every tick: run one instance rather than competing consumers.
+    """
+
+    def __init__(self):
+        self.engine = SignalEngine()
+        self._signals_exchange = None
+
+    async def load(self):
+        async with async_session() as session:
+            rows = await LiveConditionService(session).get_active_conditions()
+        self.engine.load(rows)
+
+    async def on_event(self, message: aio_pika.abc.AbstractIncomingMessage):
+        async with message.process():
+            event = json.loads(message.body)
+            strategy_id = event['strategy_id']
+            self.engine.remove_strategy(strategy_id)
+            if event['event'] == 'deleted' or event['status'] != 'active':
+                return
+            async with async_session() as session:
+                rows = await LiveConditionService(
+                    session
+                ).get_active_conditions(strategy_id)
+            conditions = defaultdict(list)
+            for _, user_id, symbol, indicator, type_, threshold in rows:
+                conditions[(user_id, symbol)].append(
+                    (indicator, type_, threshold)
+                )
+            for (user_id, symbol), items in conditions.items():
+                self.engine.add_strategy(strategy_id, user_id, symbol, items)
+
+    async def on_tick(self, message: aio_pika.abc.AbstractIncomingMessage):
+        async with message.process():
+            ticks = json.loads(message.body)
+            if isinstance(ticks, dict):
+                ticks = [ticks]
+            signals = [
+                signal.to_dict()
+                for tick in ticks
+                for signal in self.engine.on_tick(
+                    tick['symbol'], float(tick['price'])
+                )
+            ]
+            if signals:
+                await self._signals_exchange.publish(
+                    aio_pika.Message(
+                        body=json.dumps(signals).encode(),
+                        content_type='application/json',
+                    ),
+                    routing_key='',
+                )
+
+    async def run(self):
+        init_database()
+        try:
+            await self._consume()
+        finally:
+            await close_database()
+
+    async def _consume(self):
+        connection = await connect_robust(RABBITMQ_URL)
+        async with connection:
+            channel = await connection.channel()
+            await channel.set_qos(prefetch_count=settings.SIGNAL_PREFETCH_COUNT)
+            self._signals_exchange = await channel.declare_exchange(
+                SIGNALS_EXCHANGE, ExchangeType.FANOUT, durable=True
+            )
+            events_exchange = await channel.declare_exchange(
+                STRATEGY_EVENTS_EXCHANGE, ExchangeType.FANOUT, durable=True
+            )
+            events_queue = await channel.declare_queue(exclusive=True)
+            await events_queue.bind(events_exchange)
+            tick_queue = await channel.declare_queue(
+                TICK_QUEUE_NAME, durable=True
+            )
+            # bind before loading so no change between the two is missed
+            await self.load()
+            await events_queue.consume(self.on_event)
+            await tick_queue.consume(self.on_tick)
+            await asyncio.Future()
+
+
+if __name__ == '__main__':
+    asyncio.run(SignalRunner().run())
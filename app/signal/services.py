@@ -0,0 +1,78 @@
+import json
+import logging
+
+import aio_pika
+from aio_pika import RobustChannel
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import select
+
+from app.dependencies import STRATEGY_EVENTS_EXCHANGE
+from app.services import ServiceFactory
+from app.strategy.models import Condition, Strategy
+from app.strategy.utils import RedisUtils
+
+logger = logging.getLogger(__name__)
+
+
+class LiveConditionService(ServiceFactory):
+    model = Condition
+
+    async def get_active_conditions(self, strategy_id: int | None = None):
+        query = (
+            select(
+                Strategy.id,
+                Strategy.user_id,
+                Strategy.asset_type,
+                self.model.indicator,
+                self.model.type,
+                self.model.threshold,
+            )
+            .join(self.model, self.model.strategy_id == Strategy.id)
+            .where(Strategy.status == 'active')
+        )
+        if strategy_id is not None:
+            query = query.where(Strategy.id == strategy_id)
+        result = await self.session.execute(query)
+        return result.all()
+
+
+class StrategyEventService:
+
+    def __init__(self, channel: RobustChannel):
+        self.channel = channel
+
+    async def publish(self, event: str, strategy: Strategy):
+        exchange = await self.channel.get_exchange(
+            STRATEGY_EVENTS_EXCHANGE, ensure=False
+        )
+        await exchange.publish(
+            aio_pika.Message(
+                body=json.dumps(
+                    {
+                        'event': event,
+                        'strategy_id': strategy.id,
+                        'user_id': strategy.user_id,
+                        'status': strategy.status,
+                    }
+                ).encode(),
+                content_type='application/json',
+            ),
+            routing_key='',
+        )
+
+
+async def publish_user_event(redis: Redis | None, user_id: int, event: dict):
+    """
+    Publish ``event`` on the user's Redis channel, from where every worker's
+    ``SignalHub`` pushes it to that user's WebSocket connections.
+    """
+    if redis is None:
+        return
+    try:
+        await redis.publish(
+            RedisUtils(user_id).get_user_events_channel_name(),
+            json.dumps(event),
+        )
+    except RedisError:
+        logger.warning('Failed to publish a user event for user %s', user_id)
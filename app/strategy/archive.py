@@ -0,0 +1,152 @@
+import argparse
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from redis.asyncio import Redis
+from sqlalchemy import delete, func, insert, select
+
+from app.auth.models import User
+from app.cache import create_redis
+from app.config import settings
+from app.dependencies import async_session, close_database, init_database
+from app.strategy.models import (
+    ArchivedCondition,
+    ArchivedSimulationRun,
+    ArchivedSimulationTrade,
+    ArchivedStrategy,
+    Condition,
+    SimulationRun,
+    SimulationTrade,
+    Strategy,
+)
+from app.strategy.utils import StrategyCache
+
+logger = logging.getLogger(__name__)
+
+# hot table to its archive, in the order rows are copied
+ARCHIVED_TABLES = [
+    (Strategy.__table__, ArchivedStrategy.__table__),
+    (Condition.__table__, ArchivedCondition.__table__),
+    (SimulationRun.__table__, ArchivedSimulationRun.__table__),
+    (SimulationTrade.__table__, ArchivedSimulationTrade.__table__),
+]
+
+
+def _rows_of(table, strategy_ids: list[int]):
+    """Condition to select the rows of ``table`` that belong to the batch."""
+    if table is Strategy.__table__:
+        return table.c.id.in_(strategy_ids)
+    if table is SimulationTrade.__table__:
+        runs = SimulationRun.__table__
+        return table.c.run_id.in_(
+            select(runs.c.id).where(runs.c.strategy_id.in_(strategy_ids))
+        )
+    return table.c.strategy_id.in_(strategy_ids)
+
+
+class StrategyArchiver:
+    """
+    Moves strategies closed for longer than ``ARCHIVE_CLOSED_AFTER`` seconds,
+    with their conditions, simulation runs and trade ledgers, to the
+    ``*_archive`` tables, ``ARCHIVE_BATCH_SIZE`` strategies per transaction.
+
+    Keeps ``strategy`` and ``condition``, and their indexes, down to what
+    users still work with; archived strategies are read through
+    ``ArchivedStrategyService``. Rows are locked with ``SKIP LOCKED``, so
+    several archivers never move the same strategy.
+    """
+
+    def __init__(self, redis: Redis | None = None):
+        self.redis = redis
+
+    async def archive_batch(self) -> int:
+        """Archive one batch; the number of strategies moved."""
+        cutoff = func.now() - timedelta(seconds=settings.ARCHIVE_CLOSED_AFTER)
+        async with async_session() as session, session.begin():
+            result = await session.execute(
+                select(Strategy.id, Strategy.user_id, User.username)
+                .join(User, User.id == Strategy.user_id)
+                .where(Strategy.status == 'closed', Strategy.closed_at <= cutoff)
+                .order_by(Strategy.id)
+                .limit(settings.ARCHIVE_BATCH_SIZE)
+                .with_for_update(of=Strategy, skip_locked=True)
+            )
+            rows = result.all()
+            if not rows:
+                return 0
+            strategy_ids = [strategy_id for strategy_id, *_ in rows]
+
+            for table, archive in ARCHIVED_TABLES:
+                columns = [column.name for column in archive.columns
+                           if column.name in table.columns]
+                await session.execute(
+                    insert(archive).from_select(
+                        columns,
+                        select(*(table.c[name] for name in columns))
+                        .where(_rows_of(table, strategy_ids)),
+                    )
+                )
+            # children first, whatever the foreign keys cascade
+            for table, _ in reversed(ARCHIVED_TABLES):
+                await session.execute(
+                    delete(table).where(_rows_of(table, strategy_ids))
+                )
+
+        if self.redis is not None:
+            users = defaultdict(list)
+            for strategy_id, user_id, username in rows:
+                users[(user_id, username)].append(strategy_id)
+            for (user_id, username), ids in users.items():
+                await StrategyCache(
+                    self.redis, user_id, username=username
+                ).invalidate(*ids)
+        logger.info('Archived %s closed strategies', len(rows))
+        return len(rows)
+
+    async def archive(self) -> int:
+        """Archive every strategy due, batch by batch."""
+        total = 0
+        while True:
+            moved = await self.archive_batch()
+            total += moved
+            if moved < settings.ARCHIVE_BATCH_SIZE:
+                return total
+
+    async def run(self, once: bool = False):
+        init_database()
+        try:
+            while True:
+                try:
+                    await self.archive()
+                except Exception:
+                    if once:
+                        raise
+                    logger.exception('Archiving closed strategies failed')
+                if once:
+                    return
+                await asyncio.sleep(settings.ARCHIVE_INTERVAL)
+        finally:
+            await close_database()
+
+
+async def main(once: bool):
+    redis = create_redis()
+    try:
+        await StrategyArchiver(redis).run(once)
+    finally:
+        await redis.aclose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Move closed strategies to the archive tables.'
+    )
+    parser.add_argument(
+        '--once', action='store_true',
+        help='archive what is due and exit, instead of every ARCHIVE_INTERVAL',
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(args.once))
@@ -17,6 +17,14 @@ class IncorrectStatusTypesError(BaseStrategyError):
         self.errors = errors
 
 
+class IncorrectTimeframeError(BaseStrategyError):
+    def __init__(self, timeframe: str, message=None, errors=None):
+        message = f'Timeframe {timeframe} is not supported.'
+        super().__init__(message)
+
+        self.errors = errors
+
+
 class StrategyNotExistError(BaseStrategyError):
     def __init__(self, message='Strategy does not exist', errors=None):
         super().__init__(message)
@@ -24,6 +32,13 @@ class StrategyNotExistError(BaseStrategyError):
         self.errors = errors
 
 
+class SimulationRunNotExistError(BaseStrategyError):
+    def __init__(self, message='Simulation run does not exist', errors=None):
+        super().__init__(message)
+
+        self.errors = errors
+
+
 class StrategyCreationError(BaseStrategyError):
     def __init__(self, message=None, strategy_data=None, user_id=None):
         message = f'Can\'t create strategy {strategy_data.name} for user {user_id}'
@@ -33,6 +48,44 @@ class StrategyCreationError(BaseStrategyError):
         self.user_id = user_id
 
 
+class TooManyVariantsError(BaseStrategyError):
+    def __init__(self, variants: int, limit: int, message=None, errors=None):
+        message = f'{variants} variants requested, at most {limit} are allowed.'
+        super().__init__(message)
+
+        self.errors = errors
+
+
+class TooManySymbolsError(BaseStrategyError):
+    def __init__(self, symbols: int, limit: int, message=None, errors=None):
+        message = f'{symbols} symbols requested, at most {limit} are allowed.'
+        super().__init__(message)
+
+        self.errors = errors
+
+
+class NoSymbolsError(BaseStrategyError):
+    def __init__(self, message='Provide at least one dataset or series.', errors=None):
+        super().__init__(message)
+
+        self.errors = errors
+
+
+class DuplicateSymbolError(BaseStrategyError):
+    def __init__(self, symbol: str, message=None, errors=None):
+        message = f'Symbol {symbol} is given both as a dataset and as a series.'
+        super().__init__(message)
+
+        self.errors = errors
+
+
+class NotEnoughCandlesError(BaseStrategyError):
+    def __init__(self, message='At least two candles are required.', errors=None):
+        super().__init__(message)
+
+        self.errors = errors
+
+
 class BaseConditionError(Exception):
     pass
 
@@ -1,6 +1,7 @@
+from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import String, Enum, ForeignKey, Float
+from sqlalchemy import String, Enum, ForeignKey, Float, Integer, DateTime, Index, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship, backref
 
 from app.models import Base
@@ -36,6 +37,13 @@ STATUS_TYPES = ["active", "closed", "paused"]
 
 class Strategy(Base):
     __tablename__ = "strategy"
+    __table_args__ = (
+        # what app.strategy.archive looks for: closed strategies only
+        Index(
+            'ix_strategy_closed_at', 'closed_at',
+            postgresql_where=text("status = 'closed'"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -43,11 +51,20 @@ class Strategy(Base):
         String(250), nullable=True
     )
     asset_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    timeframe: Mapped[Optional[str]] = mapped_column(String(10), nullable=True)
     status: Mapped[str] = mapped_column(
         Enum(*STATUS_TYPES, name="status_type_enum"),
         default="active",
     )
     user_id: Mapped[int] = mapped_column(ForeignKey("user.id"), nullable=False)
+    # bumped on every update, condition replacement included
+    version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=1, server_default='1'
+    )
+    # set when the status turns closed, the start of its archival delay
+    closed_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, nullable=True
+    )
 
     user: Mapped["User"] = relationship(  # noqa F821
         "User", backref=backref("strategies", cascade="all, delete-orphan")
@@ -58,7 +75,9 @@ class Strategy(Base):
             'name': self.name,
             'description': self.description,
             'asset_type': self.asset_type,
+            'timeframe': self.timeframe,
             'status': self.status,
+            'version': self.version,
             'buy_conditions': [],
             'sell_conditions': [],
         }
@@ -73,3 +92,158 @@ class Strategy(Base):
 
     def __repr__(self):
         return f'Strategy: {self.name}'
+
+
+RUN_STATUSES = ['writing', 'complete', 'failed']
+TRADE_ACTIONS = ['buy', 'sell']
+
+
+class SimulationRun(Base):
+    __tablename__ = 'simulation_run'
+    __table_args__ = (
+        # runs of a strategy, newest first
+        Index('ix_simulation_run_strategy_id_id', 'strategy_id', 'id'),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    strategy_id: Mapped[int] = mapped_column(
+        ForeignKey('strategy.id', ondelete='CASCADE'), nullable=False
+    )
+    strategy_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    # dataset symbol, or 'upload' for candles sent with the request
+    source: Mapped[str] = mapped_column(String(50), nullable=False)
+    timeframe: Mapped[Optional[str]] = mapped_column(String(10), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, server_default=func.now()
+    )
+    status: Mapped[str] = mapped_column(
+        Enum(*RUN_STATUSES, name='run_status_enum'),
+        nullable=False,
+        default='writing',
+    )
+    candles: Mapped[int] = mapped_column(Integer, nullable=False)
+    total_trades: Mapped[int] = mapped_column(Integer, nullable=False)
+    profit_loss: Mapped[float] = mapped_column(Float(), nullable=False)
+    win_rate: Mapped[float] = mapped_column(Float(), nullable=False)
+    max_drawdown: Mapped[float] = mapped_column(Float(), nullable=False)
+
+    strategy: Mapped["Strategy"] = relationship(
+        "Strategy",
+        backref=backref(
+            "simulation_runs", cascade="all, delete-orphan", passive_deletes=True
+        ),
+    )
+
+    def __repr__(self):
+        return f'SimulationRun: {self.id}'
+
+
+class SimulationTrade(Base):
+    """Trade ledger of a run; written in bulk, never through the ORM."""
+    __tablename__ = 'simulation_trade'
+
+    run_id: Mapped[int] = mapped_column(
+        ForeignKey('simulation_run.id', ondelete='CASCADE'), primary_key=True
+    )
+    # position in the run, the primary key doubles as the page index
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True)
+    action: Mapped[str] = mapped_column(
+        Enum(*TRADE_ACTIONS, name='trade_action_enum'), nullable=False
+    )
+    date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    price: Mapped[float] = mapped_column(Float(), nullable=False)
+    profit: Mapped[Optional[float]] = mapped_column(Float(), nullable=True)
+
+
+class ArchivedStrategy(Base):
+    """
+    A closed strategy moved out of ``strategy`` by ``app.strategy.archive``,
+    with its original id. Read-only; its status is always ``closed``.
+    """
+    __tablename__ = 'strategy_archive'
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    description: Mapped[Optional[str]] = mapped_column(
+        String(250), nullable=True
+    )
+    asset_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    timeframe: Mapped[Optional[str]] = mapped_column(String(10), nullable=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True
+    )
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    closed_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, nullable=True
+    )
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, server_default=func.now()
+    )
+
+    status = 'closed'
+
+    def __repr__(self):
+        return f'ArchivedStrategy: {self.name}'
+
+
+class ArchivedCondition(Base):
+    __tablename__ = 'condition_archive'
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    indicator: Mapped[str] = mapped_column(String(100), nullable=False)
+    threshold: Mapped[float] = mapped_column(Float(), nullable=False)
+    type: Mapped[str] = mapped_column(
+        Enum(*CONDITION_TYPES, name='action_type_enum'), nullable=False
+    )
+    strategy_id: Mapped[int] = mapped_column(
+        ForeignKey('strategy_archive.id', ondelete='CASCADE'),
+        nullable=False, index=True,
+    )
+
+    strategy: Mapped["ArchivedStrategy"] = relationship(
+        "ArchivedStrategy",
+        backref=backref(
+            "conditions", cascade="all, delete-orphan", passive_deletes=True
+        ),
+    )
+
+
+class ArchivedSimulationRun(Base):
+    """Runs of an archived strategy, kept with their ledger."""
+    __tablename__ = 'simulation_run_archive'
+    __table_args__ = (
+        Index('ix_simulation_run_archive_strategy_id_id', 'strategy_id', 'id'),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    strategy_id: Mapped[int] = mapped_column(
+        ForeignKey('strategy_archive.id', ondelete='CASCADE'), nullable=False
+    )
+    strategy_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    source: Mapped[str] = mapped_column(String(50), nullable=False)
+    timeframe: Mapped[Optional[str]] = mapped_column(String(10), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    status: Mapped[str] = mapped_column(
+        Enum(*RUN_STATUSES, name='run_status_enum'), nullable=False
+    )
+    candles: Mapped[int] = mapped_column(Integer, nullable=False)
+    total_trades: Mapped[int] = mapped_column(Integer, nullable=False)
+    profit_loss: Mapped[float] = mapped_column(Float(), nullable=False)
+    win_rate: Mapped[float] = mapped_column(Float(), nullable=False)
+    max_drawdown: Mapped[float] = mapped_column(Float(), nullable=False)
+
+
+class ArchivedSimulationTrade(Base):
+    __tablename__ = 'simulation_trade_archive'
+
+    run_id: Mapped[int] = mapped_column(
+        ForeignKey('simulation_run_archive.id', ondelete='CASCADE'),
+        primary_key=True,
+    )
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True)
+    action: Mapped[str] = mapped_column(
+        Enum(*TRADE_ACTIONS, name='trade_action_enum'), nullable=False
+    )
+    date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    price: Mapped[float] = mapped_column(Float(), nullable=False)
+    profit: Mapped[Optional[float]] = mapped_column(Float(), nullable=True)
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+from multiprocessing.shared_memory import SharedMemory
+
+from app.config import settings
+from app.lazy import lazy_import
+from app.strategy.robustness import get_pool, pool_size, trade_rows
+
+np = lazy_import('numpy')
+
+# per-symbol columns of simulate_packed
+TOTAL_TRADES, PROFIT_LOSS, WINS, MAX_DRAWDOWN = range(4)
+
+
+class PackedSeries:
+    """
+    Closes of many symbols back to back in one contiguous array, symbol ``i``
+    at ``closes[offsets[i]:offsets[i + 1]]``.
+    """
+
+    def __init__(self, symbols: list[str], closes: np.ndarray,
+                 offsets: np.ndarray):
+        self.symbols = symbols
+        self.closes = closes
+        self.offsets = offsets
+
+    @classmethod
+    def pack(cls, frames: dict[str, dict[str, np.ndarray]]) -> PackedSeries:
+        symbols = list(frames)
+        lengths = [len(frames[symbol]['close']) for symbol in symbols]
+        offsets = np.zeros(len(symbols) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        closes = np.empty(offsets[-1], dtype=np.float64)
+        for symbol, start, stop in zip(symbols, offsets[:-1], offsets[1:]):
+            closes[start:stop] = frames[symbol]['close']
+        return cls(symbols, closes, offsets)
+
+    @property
+    def candles(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def split(self, parts: int) -> list[tuple[int, int]]:
+        """Contiguous symbol ranges with about the same number of candles."""
+        bounds = np.searchsorted(
+            self.offsets, np.linspace(0, self.offsets[-1], parts + 1)[1:-1]
+        )
+        bounds = np.unique(np.r_[0, bounds, len(self.symbols)])
+        return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+def simulate_packed(closes: np.ndarray, offsets: np.ndarray, buy: float,
+                    sell: float) -> np.ndarray:
+    """
+    Trade count, P&L, winning trades and worst trade of every symbol of a
+    packed series, as ``SimulationService`` computes them for one series.
+
+    Momentum and signal masks are computed for all symbols at once; the
+    first candle of each symbol has no momentum.
+    """
+    symbols = len(offsets) - 1
+    momentum = np.empty(len(closes))
+    momentum[0:1] = np.nan
+    np.subtract(closes[1:], closes[:-1], out=momentum[1:])
+    momentum[offsets[:-1][offsets[:-1] < len(closes)]] = np.nan
+    symbol_of = np.repeat(np.arange(symbols), np.diff(offsets))
+
+    if buy >= sell:
+        signals = (momentum > buy).astype(np.int8) - (momentum < sell)
+        rows = np.flatnonzero(signals)
+        events, owners = signals[rows], symbol_of[rows]
+        # the same run-length rule as trade_rows, restarted for every symbol
+        previous = np.r_[-1, events[:-1]]
+        previous[np.r_[True, owners[1:] != owners[:-1]]] = -1
+        changes = events != previous
+        rows, events, owners = rows[changes], events[changes], owners[changes]
+        is_exit = events < 0
+        exits = rows[is_exit]
+        entries = rows[np.flatnonzero(is_exit) - 1]
+        traded = owners
+        exit_owners = owners[is_exit]
+    else:
+        empty = np.empty(0, np.intp)
+        entries, exits, traded = [empty], [empty], [empty]
+        for symbol, (start, stop) in enumerate(zip(offsets[:-1], offsets[1:])):
+            symbol_entries, symbol_exits = trade_rows(
+                momentum[start + 1:stop], buy, sell
+            )
+            entries.append(symbol_entries[:len(symbol_exits)] + start)
+            exits.append(symbol_exits + start)
+            traded.append(np.full(
+                len(symbol_entries) + len(symbol_exits), symbol
+            ))
+        entries, exits, traded = map(np.concatenate, (entries, exits, traded))
+        exit_owners = symbol_of[exits]
+
+    profits = closes[exits] - closes[entries]
+    results = np.zeros((symbols, 4))
+    results[:, TOTAL_TRADES] = np.bincount(traded, minlength=symbols)
+    results[:, PROFIT_LOSS] = np.bincount(
+        exit_owners, weights=profits, minlength=symbols
+    )
+    results[:, WINS] = np.bincount(
+        exit_owners, weights=profits > 0, minlength=symbols
+    )
+    worst = np.full(symbols, np.inf)
+    np.minimum.at(worst, exit_owners, profits)
+    results[:, MAX_DRAWDOWN] = np.where(np.isinf(worst), 0.0, worst)
+    return results
+
+
+def _simulate_shared(name: str, offsets: np.ndarray, buy: float,
+                     sell: float) -> np.ndarray:
+    start, stop = int(offsets[0]), int(offsets[-1])
+    shared = SharedMemory(name=name)
+    try:
+        return simulate_packed(
+            np.ndarray(
+                (stop - start,), dtype=np.float64, buffer=shared.buf,
+                offset=start * np.dtype(np.float64).itemsize,
+            ),
+            offsets - start, buy, sell,
+        )
+    finally:
+        shared.close()
+
+
+async def simulate_series(packed: PackedSeries, buy: float,
+                          sell: float) -> np.ndarray:
+    """
+    ``simulate_packed`` over all symbols, split by candles across the
+    robustness process pool once the series is large enough for that to
+    beat the cost of shipping it.
+    """
+    candles = len(packed.closes)
+    if (
+            candles < settings.MULTI_SYMBOL_PARALLEL_CANDLES
+            or len(packed.symbols) < 2
+    ):
+        return await asyncio.to_thread(
+            simulate_packed, packed.closes, packed.offsets, buy, sell
+        )
+
+    pool = get_pool()
+    parts = min(len(packed.symbols), pool_size())
+    loop = asyncio.get_running_loop()
+    shared = SharedMemory(create=True, size=packed.closes.nbytes)
+    try:
+        np.ndarray(
+            (candles,), dtype=np.float64, buffer=shared.buf
+        )[:] = packed.closes
+        tasks = [
+            loop.run_in_executor(
+                pool, _simulate_shared, shared.name,
+                packed.offsets[start:stop + 1], buy, sell,
+            )
+            for start, stop in packed.split(parts)
+        ]
+        return np.concatenate(await asyncio.gather(*tasks))
+    finally:
+        shared.close()
+        shared.unlink()
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+
+from app.config import settings
+from app.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+METHODS = ('bootstrap', 'block', 'permutation')
+PERCENTILES = (5, 25, 50, 75, 95)
+# tasks per core, so that uneven variants still keep every core busy
+CHUNKS_PER_CORE = 4
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def pool_context():
+    context = multiprocessing.get_context('forkserver')
+    # children are forked with numpy and this module already imported
+    context.set_forkserver_preload(['numpy', __name__])
+    return context
+
+
+def pool_size() -> int:
+    return settings.ROBUSTNESS_WORKERS or os.cpu_count()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """
+    Process pool of this worker, created on first use. Children come from a
+    fork server, never from the serving process with its event loop and
+    connections.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=pool_size(),
+            mp_context=pool_context(),
+        )
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def trade_rows(diffs: np.ndarray, buy: float,
+               sell: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Entry and exit rows of the momentum strategy run by
+    ``SimulationService`` over a series of close-to-close changes; row ``k``
+    of the original frame has momentum ``diffs[k - 1]``. When a position is
+    left open, the last entry has no exit.
+    """
+    if buy < sell:
+        # a row can be both a buy and a sell, its meaning depends on the
+        # position: walk the trades, one lookup per trade
+        return _walk_trades(diffs, buy, sell)
+    signals = (diffs > buy).astype(np.int8) - (diffs < sell)
+    rows = np.flatnonzero(signals)
+    events = signals[rows]
+    # entries are the first buy after a sell, exits the first sell after a
+    # buy; sells before the first buy do nothing
+    changes = np.flatnonzero(np.diff(events, prepend=-1))
+    rows, events = rows[changes] + 1, events[changes]
+    return rows[events > 0], rows[events < 0]
+
+
+def _walk_trades(diffs: np.ndarray, buy: float,
+                 sell: float) -> tuple[np.ndarray, np.ndarray]:
+    buys = np.flatnonzero(diffs > buy) + 1
+    sells = np.flatnonzero(diffs < sell) + 1
+    entries, exits = [], []
+    row = 0
+    while True:
+        k = np.searchsorted(buys, row)
+        if k == len(buys):
+            break
+        entries.append(buys[k])
+        k = np.searchsorted(sells, buys[k], side='right')
+        if k == len(sells):
+            break
+        exits.append(sells[k])
+        row = sells[k] + 1
+    return np.array(entries, dtype=np.intp), np.array(exits, dtype=np.intp)
+
+
+def run_trades(diffs: np.ndarray, buy: float, sell: float) -> np.ndarray:
+    """
+    Profits of the closed trades over a series of close-to-close changes: a
+    long entered at row ``i`` and exited at row ``j`` makes
+    ``sum(diffs[i:j])``.
+    """
+    closes = np.concatenate(([0.0], np.cumsum(diffs)))
+    entries, exits = trade_rows(diffs, buy, sell)
+    return closes[exits] - closes[entries[:len(exits)]]
+
+
+def equity_drawdown(profits: np.ndarray) -> float:
+    """
+    Largest peak-to-trough fall of the realized equity curve, <= 0. Not the
+    ``max_drawdown`` of a simulation, its worst single trade, which does not
+    change when the trades are permuted.
+    """
+    if not len(profits):
+        return 0.0
+    equity = np.concatenate(([0.0], np.cumsum(profits)))
+    return float((equity - np.maximum.accumulate(equity)).min())
+
+
+def _resample(diffs: np.ndarray, method: str, block_size: int, rng):
+    size = len(diffs)
+    if method == 'bootstrap':
+        return diffs[rng.integers(0, size, size)]
+    # moving block bootstrap: keeps the autocorrelation within a block
+    block_size = min(block_size, size)
+    starts = rng.integers(0, size - block_size + 1, math.ceil(size / block_size))
+    return diffs[(starts[:, None] + np.arange(block_size)).ravel()[:size]]
+
+
+def _variant_rows(diffs: np.ndarray, buy: float, sell: float, method: str,
+                  block_size: int, seed: int, start: int,
+                  stop: int) -> np.ndarray:
+    rows = np.empty((stop - start, 3))
+    if method == 'permutation':
+        profits = run_trades(diffs, buy, sell)
+    for row, variant in enumerate(range(start, stop)):
+        rng = np.random.default_rng((seed, variant))
+        if method == 'permutation':
+            variant_profits = rng.permutation(profits)
+        else:
+            variant_profits = run_trades(
+                _resample(diffs, method, block_size, rng), buy, sell
+            )
+        rows[row] = (
+            variant_profits.sum(),
+            equity_drawdown(variant_profits),
+            len(variant_profits),
+        )
+    return rows
+
+
+def _run_variants(name: str, size: int, *args) -> np.ndarray:
+    """
+    Pool task: P&L, drawdown and trade count of variants ``start:stop``.
+    Every variant has its own generator seeded with ``(seed, variant)``, so
+    results do not depend on how variants are split across tasks.
+    """
+    shared = SharedMemory(name=name)
+    try:
+        return _variant_rows(
+            np.ndarray((size,), dtype=np.float64, buffer=shared.buf), *args
+        )
+    finally:
+        shared.close()
+
+
+def distribution(values: np.ndarray) -> dict:
+    stats = {
+        'mean': float(values.mean()),
+        'std': float(values.std()),
+        'min': float(values.min()),
+        'max': float(values.max()),
+    }
+    for percentile, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        stats[f'p{percentile}'] = float(value)
+    return stats
+
+
+async def simulate_variants(diffs: np.ndarray, buy: float, sell: float,
+                            method: str, variants: int, seed: int,
+                            block_size: int,
+                            pool: ProcessPoolExecutor | None = None
+                            ) -> np.ndarray:
+    """
+    Run ``variants`` resampled copies of ``diffs`` across ``pool`` and return
+    one ``(profit_loss, equity_drawdown, closed_trades)`` row per variant.
+
+    The changes are copied once into shared memory; tasks only carry its
+    name and a range of variant numbers, and return their rows.
+    """
+    pool = pool or get_pool()
+    loop = asyncio.get_running_loop()
+    shared = SharedMemory(create=True, size=max(diffs.nbytes, 1))
+    try:
+        np.ndarray(diffs.shape, dtype=np.float64, buffer=shared.buf)[:] = diffs
+        chunk = math.ceil(variants / (pool_size() * CHUNKS_PER_CORE))
+        tasks = [
+            loop.run_in_executor(
+                pool, _run_variants, shared.name, len(diffs), buy, sell,
+                method, block_size, seed, start, min(start + chunk, variants),
+            )
+            for start in range(0, variants, chunk)
+        ]
+        return np.concatenate(await asyncio.gather(*tasks))
+    except BrokenProcessPool:
+        # a child died (e.g. killed for memory): start a fresh pool next time
+        if pool is _pool:
+            shutdown_pool()
+        raise
+    finally:
+        shared.close()
+        shared.unlink()
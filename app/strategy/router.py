@@ -1,45 +1,127 @@
+import asyncio
 import json
-from typing import List
+import logging
+from typing import Annotated, List
 
 import aio_pika
-import pandas as pd
 from aio_pika import RobustChannel
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
 from redis import Redis
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.status import (
     HTTP_201_CREATED,
     HTTP_200_OK,
+    HTTP_202_ACCEPTED,
     HTTP_204_NO_CONTENT,
+    HTTP_304_NOT_MODIFIED,
     HTTP_400_BAD_REQUEST,
 )
 
+from app.admission import charge, detach
+from app.config import settings
 from app.dependencies import (
+    async_session,
     CurrentUser,
     get_session,
     get_redis,
+    get_redis_reader,
     QUEUE_NAME,
     get_rabbitmq_channel,
 )
-from app.strategy.exeptions import BaseConditionError, BaseStrategyError, StrategyNotExistError, StrategyCreationError
+from app.instrumentation import QueryBudget
+from app.lazy import lazy_import
+from app.market.exeptions import BaseMarketDataError
+from app.market.indicators import content_digest, dataset_digest, indicator_cache
+from app.market.parser import parse_candles
+from app.market.utils import BarBatcher
+from app.optimization.adaptive import AdaptiveSearch
+from app.optimization.broker import RabbitBroker
+from app.optimization.coordinator import GridSearch, get_job, local_broker, start_search
+from app.optimization.exeptions import BaseOptimizationError, OptimizationJobNotExistError
+from app.optimization.grid import build_grid, dataset_reference
+from app.profiling import stage
+from app.market.resample import TIMEFRAMES, TimeframeCache, resample
+from app.signal.services import StrategyEventService, publish_user_event
+from app.strategy.exeptions import BaseConditionError, BaseStrategyError, StrategyNotExistError, StrategyCreationError, \
+    IncorrectTimeframeError, TooManySymbolsError, DuplicateSymbolError, SimulationRunNotExistError
 from app.strategy.schemas import (
     StrategyInput,
     StrategyResponse,
+    StrategyBatch,
+    ArchivedStrategyResponse,
+    ArchivedStrategyPage,
     HistoricalData,
     SimulationResult,
     StrategyInputOptional,
+    DatasetRobustnessParams,
+    RobustnessParams,
+    RobustnessResult,
+    MultiSymbolInput,
+    MultiSymbolResult,
+    SimulationRunPage,
+    SimulationRunResponse,
+    TradePage,
+    OptimizationInput,
+    AdaptiveOptimizationInput,
+    OptimizationJob,
+    DatasetWalkForwardParams,
+    WalkForwardParams,
+    WalkForwardResult,
 )
 from app.strategy.services import (
     StrategyService,
+    ArchivedStrategyService,
     ConditionService,
-    SimulationService, SingleStrategyService,
+    SimulationService, SingleStrategyService, SimulationRunService,
 )
-from app.strategy.utils import StrategyFormatter, RedisUtils
+from app.strategy.utils import StrategyFormatter, StrategyCache, StrategyVersion
+
+logger = logging.getLogger(__name__)
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
 
 router = APIRouter(prefix='/strategies')
 
 
+def _etag_matches(if_none_match: str, tag: str) -> bool:
+    # weak comparison, as If-None-Match calls for
+    return any(
+        candidate.strip().removeprefix('W/') in (tag, '*')
+        for candidate in if_none_match.split(',')
+    )
+
+
+async def strategy_etag(
+        request: Request,
+        response: Response,
+        current_user: CurrentUser,
+        redis: Redis = Depends(get_redis),
+        redis_reader=Depends(get_redis_reader),
+):
+    """
+    Weak ETag of a strategy read, derived from the caller's strategy
+    version counter; weak because compression changes the bytes sent, not
+    the strategies. A matching ``If-None-Match`` is answered with ``304``
+    here, once the caller is authenticated and before anything is read or
+    serialized.
+    """
+    version = await StrategyVersion(
+        redis, current_user.username, redis_reader
+    ).get()
+    tag = f'{current_user.username}-{version}'
+    strategy_id = request.path_params.get('strategy_id')
+    if strategy_id is not None:
+        tag += f'-{strategy_id}'
+    tag = f'"{tag}"'
+    headers = {'ETag': f'W/{tag}', 'Cache-Control': 'private, no-cache'}
+    if _etag_matches(request.headers.get('if-none-match', ''), tag):
+        raise HTTPException(status_code=HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+
 @router.post('/', response_model=StrategyResponse, status_code=HTTP_201_CREATED)
 async def create_strategy(
         current_user: CurrentUser,
@@ -61,11 +143,15 @@ async def create_strategy(
             await condition_service.add_conditions(strategy.conditions, new_strategy)
         else:
             new_strategy.conditions = []
-        await redis.delete(RedisUtils(current_user.id).get_strategy_cached_name())
         try:
             await session.commit()
         except IntegrityError:
             raise StrategyCreationError(strategy_data=strategy, user_id=current_user.id)
+        # after the commit, so a read racing it cannot cache the old list
+        # under the new version
+        await StrategyCache(
+            redis, current_user.id, username=current_user.username
+        ).invalidate()
     except (BaseConditionError, BaseStrategyError) as e:
         await session.rollback()
         print(e)
@@ -81,54 +167,164 @@ async def create_strategy(
         ),
         routing_key=QUEUE_NAME,
     )
+    await StrategyEventService(channel).publish('created', new_strategy)
     return StrategyFormatter(new_strategy).format_strategy_response()
 
 
-@router.get('/', response_model=List[StrategyResponse], status_code=HTTP_200_OK)
+@router.get(
+    '/',
+    response_model=List[StrategyResponse],
+    status_code=HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(2)), Depends(strategy_etag)],
+)
 async def get_all_strategies(
         current_user: CurrentUser,
+        response: Response,
         session: AsyncSession = Depends(get_session),
         redis: Redis = Depends(get_redis),
+        redis_reader=Depends(get_redis_reader),
 ):
-    redis_utils = RedisUtils(current_user.id)
-    cached_value = await redis.get(
-        redis_utils.get_strategy_cached_name()
+    strategy_cache = StrategyCache(redis, current_user.id, redis_reader)
+    listing = await strategy_cache.get_strategies_json()
+    if listing is None:
+        strategy_service = StrategyService(session)
+        # encoded entry by entry as rows stream in, no models in between
+        entries = {
+            strategy_id: json.dumps(entry)
+            async for strategy_id, entry
+            in strategy_service.stream_user_strategies(current_user.id)
+        }
+        listing = await strategy_cache.set_strategies_json(entries)
+
+    # the JSON goes out as it is, with the ETag strategy_etag set
+    return Response(
+        listing, media_type='application/json', headers=response.headers
     )
-    if cached_value:
-        return json.loads(cached_value)
 
-    strategy_service = StrategyService(session)
-    user_strategies = await strategy_service.get_user_strategies(current_user.id)
 
-    response = [
-        StrategyFormatter(strategy).format_strategy_response()
-        for strategy in user_strategies
-    ]
-    await redis.set(
-        redis_utils.get_strategy_cached_name(),
-        json.dumps([st.to_dict() for st in user_strategies]),
+# declared before /{strategy_id}, which would otherwise match it
+@router.get(
+    '/batch',
+    response_model=StrategyBatch,
+    status_code=HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(3)), Depends(strategy_etag)],
+)
+async def get_strategies_batch(
+        ids: Annotated[List[int], Query(min_length=1)],
+        current_user: CurrentUser,
+        session: AsyncSession = Depends(get_session),
+        redis: Redis = Depends(get_redis),
+        redis_reader=Depends(get_redis_reader),
+):
+    strategy_ids = list(dict.fromkeys(ids))
+    if len(strategy_ids) > settings.STRATEGY_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=f'At most {settings.STRATEGY_BATCH_MAX_IDS} strategies can be requested at once.',
+        )
+    strategy_cache = StrategyCache(redis, current_user.id, redis_reader)
+    entries = await strategy_cache.get_strategies_by_ids(strategy_ids)
+
+    misses = [strategy_id for strategy_id, entry in entries.items() if entry is None]
+    if misses:
+        strategy_service = StrategyService(session)
+        strategies = await strategy_service.get_strategies_by_ids(current_user.id, misses)
+        for strategy in strategies:
+            entries[strategy.id] = StrategyFormatter(strategy).format_strategy_response()
+        if strategies:
+            await strategy_cache.set_strategy_entries(strategies)
+
+    return StrategyBatch(
+        strategies={
+            strategy_id: entry for strategy_id, entry in entries.items()
+            if entry is not None
+        },
+        missing=[strategy_id for strategy_id, entry in entries.items() if entry is None],
     )
 
-    return response
 
+def _archived_response(strategy) -> ArchivedStrategyResponse:
+    return ArchivedStrategyResponse(
+        **StrategyFormatter(strategy).format_strategy_response().model_dump(),
+        id=strategy.id,
+        closed_at=strategy.closed_at,
+        archived_at=strategy.archived_at,
+    )
 
+
+# the slow path for strategies moved to the archive tables: no cache, no ETag
 @router.get(
-    '/{strategy_id}', response_model=StrategyResponse, status_code=HTTP_200_OK
+    '/archived',
+    response_model=ArchivedStrategyPage,
+    status_code=HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(3))],
+)
+async def get_archived_strategies(
+        current_user: CurrentUser,
+        limit: int = Query(50, ge=1, le=500),
+        before: int | None = None,
+        session: AsyncSession = Depends(get_session),
+):
+    strategies = await ArchivedStrategyService(session).get_archived_strategies(
+        current_user.id, limit, before
+    )
+    return {
+        'items': [_archived_response(strategy) for strategy in strategies],
+        'next_before': strategies[-1].id if len(strategies) == limit else None,
+    }
+
+
+@router.get(
+    '/archived/{strategy_id}',
+    response_model=ArchivedStrategyResponse,
+    status_code=HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(3))],
+)
+async def get_archived_strategy(
+        strategy_id: int,
+        current_user: CurrentUser,
+        session: AsyncSession = Depends(get_session),
+):
+    try:
+        strategy = await ArchivedStrategyService(session).get_archived_strategy(
+            current_user.id, strategy_id
+        )
+    except BaseStrategyError as e:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    return _archived_response(strategy)
+
+
+@router.get(
+    '/{strategy_id}',
+    response_model=StrategyResponse,
+    status_code=HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(3)), Depends(strategy_etag)],
 )
 async def get_strategy(
-        strategy_id,
+        strategy_id: int,
         current_user: CurrentUser,
         session: AsyncSession = Depends(get_session),
+        redis: Redis = Depends(get_redis),
+        redis_reader=Depends(get_redis_reader),
 ):
+    strategy_cache = StrategyCache(redis, current_user.id, redis_reader)
+    cached_value = await strategy_cache.get_strategy(strategy_id)
+    if cached_value is not None:
+        return cached_value
+
     try:
         strategy_service = StrategyService(session)
         strategy = await strategy_service.get_single_strategy(current_user.id, strategy_id)
-        return StrategyFormatter(strategy).format_strategy_response()
     except StrategyNotExistError as e:
         raise HTTPException(
             status_code=HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
+    await strategy_cache.set_strategy(strategy)
+    return StrategyFormatter(strategy).format_strategy_response()
 
 
 @router.patch(
@@ -147,7 +343,9 @@ async def update_strategy(
         strategy = await strategy_service.update(strategy_input)
         await session.commit()
         await session.refresh(strategy)
-        await redis.delete(RedisUtils(current_user.id).get_strategy_cached_name())
+        await StrategyCache(
+            redis, current_user.id, username=current_user.username
+        ).invalidate(strategy.id)
         await channel.default_exchange.publish(
             aio_pika.Message(
                 body=json.dumps(
@@ -156,6 +354,7 @@ async def update_strategy(
             ),
             routing_key=QUEUE_NAME,
         )
+        await StrategyEventService(channel).publish('updated', strategy)
         strategy_formatter = StrategyFormatter(strategy)
         return strategy_formatter.format_strategy_response()
     except (BaseConditionError, BaseStrategyError) as e:
@@ -172,65 +371,640 @@ async def delete_strategy(
         current_user: CurrentUser,
         session: AsyncSession = Depends(get_session),
         redis: Redis = Depends(get_redis),
+        channel: RobustChannel = Depends(get_rabbitmq_channel),
 ):
     strategy_service = SingleStrategyService(session, strategy_id=strategy_id, user_id=current_user.id)
     try:
+        strategy = await strategy_service.get_instance()
         await strategy_service.delete()
         await session.commit()
-        await redis.delete(RedisUtils(current_user.id).get_strategy_cached_name())
+        await StrategyCache(
+            redis, current_user.id, username=current_user.username
+        ).invalidate(strategy.id)
     except StrategyNotExistError as e:
         await session.rollback()
         raise HTTPException(
             status_code=HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
+    await StrategyEventService(channel).publish('deleted', strategy)
+
+
+def _columns_to_frame(columns: dict) -> 'pd.DataFrame':
+    df = pd.DataFrame(
+        {name: columns[name] for name in columns if name != 'date'}, copy=False
+    )
+    df['date'] = pd.to_datetime(columns['date'], unit='s')
+    return df
+
+
+def _momentum(columns: dict, digest: str | None) -> 'np.ndarray':
+    close = columns['close']
+    return indicator_cache.get(
+        digest or content_digest(close), 'momentum', close
+    )
+
+
+async def _run_simulation(strategy_service: SimulationService, columns: dict,
+                          digest: str | None = None):
+    with stage('frame'):
+        df = _columns_to_frame(columns)
+    try:
+        with stage('indicators'):
+            df['momentum'] = await asyncio.to_thread(_momentum, columns, digest)
+    except TypeError:
+        raise HTTPException(
+            detail='Impossible to calculate momentum. Check provided data.',
+            status_code=HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        result = await strategy_service.simulate_strategy(df)
+    except TypeError:
+        raise HTTPException(
+            detail='Some data is in incorrect format.',
+            status_code=HTTP_400_BAD_REQUEST,
+        )
+    except IndexError:
+        raise HTTPException(
+            detail='To simulate your strategy you must provide buy and sell conditions of the same type',
+            status_code=HTTP_400_BAD_REQUEST,
+        )
+
+    return result
+
+
+async def _write_trades(run_id: int, strategy_id: int, user_id: int,
+                        trades: list, redis: Redis | None = None):
+    async with async_session() as session:
+        run_service = SimulationRunService(session)
+        try:
+            await run_service.write_trades(run_id, trades)
+            await session.commit()
+            status = 'complete'
+        except Exception:
+            logger.exception('Failed to store the trades of run %s', run_id)
+            await session.rollback()
+            await run_service.mark_failed(run_id)
+            await session.commit()
+            status = 'failed'
+    # the run has left 'writing': clients need not poll it
+    await publish_user_event(redis, user_id, {
+        'type': 'run',
+        'run_id': run_id,
+        'strategy_id': strategy_id,
+        'status': status,
+    })
+
+
+async def _persist_run(strategy_service: SimulationService,
+                       background_tasks: BackgroundTasks, result: dict,
+                       source: str, timeframe: str | None, candles: int,
+                       redis: Redis | None = None):
+    # the run row is written with the response, its trades after it
+    strategy = await strategy_service.get_instance()
+    run_service = SimulationRunService(strategy_service.session)
+    run = await run_service.add_run(strategy, result, source, timeframe, candles)
+    await strategy_service.session.commit()
+    result['run_id'] = run.id
+    background_tasks.add_task(
+        _write_trades, run.id, strategy.id, strategy.user_id,
+        strategy_service.trades, redis,
+    )
+
+
+async def _read_candles(request: Request, strategy) -> dict:
+    # candles go from the request stream straight into NumPy columns
+    content_length = request.headers.get('content-length')
+    try:
+        with stage('parse'):
+            columns = await parse_candles(
+                request.stream(),
+                int(content_length) if content_length and content_length.isdigit() else None,
+            )
+    except BaseMarketDataError as e:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    if strategy.timeframe:
+        with stage('resample'):
+            columns = resample(columns, strategy.timeframe)
+    return columns
+
+
+async def _load_dataset(strategy_service: SimulationService, dataset: str,
+                        timeframe: str | None,
+                        request: Request) -> tuple[dict, str]:
+    """
+    The dataset's frame and its digest for the indicator cache, its candles
+    charged to the request's admission ticket.
+    """
+    try:
+        strategy = await strategy_service.get_instance()
+        timeframe = timeframe or strategy.timeframe
+        if timeframe is not None and timeframe not in TIMEFRAMES:
+            raise IncorrectTimeframeError(timeframe)
+        with stage('load_dataset'):
+            columns, rows = await asyncio.to_thread(
+                TimeframeCache().get_frame_rows, dataset, timeframe
+            )
+    except (BaseStrategyError, BaseMarketDataError) as e:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    await charge(request, rows)
+    return columns, dataset_digest(dataset, timeframe, rows)
+
+
+async def _load_symbols(strategy_service: SimulationService,
+                        data: MultiSymbolInput, timeframe: str | None,
+                        request: Request) -> dict[str, dict]:
+    datasets = list(dict.fromkeys(data.datasets))
+    try:
+        strategy = await strategy_service.get_instance()
+        timeframe = timeframe or strategy.timeframe
+        if timeframe is not None and timeframe not in TIMEFRAMES:
+            raise IncorrectTimeframeError(timeframe)
+        with stage('parse'):
+            batcher = BarBatcher()
+            for payload in data.series:
+                batcher.add_payload(payload)
+            series = batcher.drain()
+        if len(datasets) + len(series) > settings.MULTI_SYMBOL_MAX_SYMBOLS:
+            raise TooManySymbolsError(
+                len(datasets) + len(series), settings.MULTI_SYMBOL_MAX_SYMBOLS
+            )
+        for symbol in datasets:
+            if symbol in series:
+                raise DuplicateSymbolError(symbol)
+        if timeframe:
+            with stage('resample'):
+                series = {
+                    symbol: resample(columns, timeframe)
+                    for symbol, columns in series.items()
+                }
+        with stage('load_dataset'):
+            cache = TimeframeCache()
+            frames = await asyncio.gather(*(
+                asyncio.to_thread(cache.get_frame, symbol, timeframe)
+                for symbol in datasets
+            ))
+    except (BaseStrategyError, BaseMarketDataError) as e:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    # inline series are in Content-Length already
+    await charge(request, sum(len(frame['date']) for frame in frames))
+    return {**dict(zip(datasets, frames)), **series}
+
+
+async def _run_robustness(strategy_service: SimulationService, columns: dict,
+                          params: RobustnessParams):
+    try:
+        return await strategy_service.simulate_robustness(columns, params)
+    except BaseStrategyError as e:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    except IndexError:
+        raise HTTPException(
+            detail='To simulate your strategy you must provide buy and sell conditions of the same type',
+            status_code=HTTP_400_BAD_REQUEST,
+        )
+
+
+async def _run_walk_forward(strategy_service: SimulationService,
+                            columns: dict, params: WalkForwardParams,
+                            digest: str | None = None):
+    try:
+        return await strategy_service.simulate_walk_forward(
+            columns, params, digest
+        )
+    except (BaseStrategyError, BaseOptimizationError) as e:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
 
 
 @router.post(
     '/{strategy_id}/simulate',
     response_model=SimulationResult,
     status_code=HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(4))],
+    openapi_extra={
+        'requestBody': {
+            'content': {
+                'application/json': {
+                    'schema': TypeAdapter(List[HistoricalData]).json_schema(),
+                },
+            },
+            'required': True,
+        },
+    },
 )
 async def simulate_strategy(
         strategy_id,
-        data: List[HistoricalData],
+        request: Request,
+        current_user: CurrentUser,
+        background_tasks: BackgroundTasks,
+        persist: bool = True,
+        session: AsyncSession = Depends(get_session),
+        redis: Redis = Depends(get_redis),
+):
+    strategy_service = SimulationService(session, strategy_id=strategy_id, user_id=current_user.id)
+    try:
+        strategy = await strategy_service.get_instance()
+    except StrategyNotExistError as e:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    columns = await _read_candles(request, strategy)
+
+    result = await _run_simulation(strategy_service, columns)
+    if persist:
+        await _persist_run(
+            strategy_service, background_tasks, result, 'upload',
+            strategy.timeframe, len(columns['close']), redis,
+        )
+    return result
+
+
+@router.post(
+    '/{strategy_id}/simulate/{dataset}',
+    response_model=SimulationResult,
+    status_code=HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(4))],
+)
+async def simulate_strategy_on_dataset(
+        strategy_id,
+        dataset: str,
+        request: Request,
+        current_user: CurrentUser,
+        background_tasks: BackgroundTasks,
+        timeframe: str | None = None,
+        persist: bool = True,
+        session: AsyncSession = Depends(get_session),
+        redis: Redis = Depends(get_redis),
+):
+    strategy_service = SimulationService(session, strategy_id=strategy_id, user_id=current_user.id)
+    columns, digest = await _load_dataset(
+        strategy_service, dataset, timeframe, request
+    )
+
+    result = await _run_simulation(strategy_service, columns, digest)
+    if persist:
+        strategy = await strategy_service.get_instance()
+        await _persist_run(
+            strategy_service, background_tasks, result, dataset,
+            timeframe or strategy.timeframe, len(columns['close']), redis,
+        )
+    return result
+
+
+@router.post(
+    '/{strategy_id}/simulate-symbols',
+    response_model=MultiSymbolResult,
+    status_code=HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(3))],
+)
+async def simulate_strategy_on_symbols(
+        strategy_id,
+        request: Request,
+        data: MultiSymbolInput,
+        current_user: CurrentUser,
+        timeframe: str | None = None,
+        session: AsyncSession = Depends(get_session),
+):
+    strategy_service = SimulationService(session, strategy_id=strategy_id, user_id=current_user.id)
+    frames = await _load_symbols(strategy_service, data, timeframe, request)
+    try:
+        return await strategy_service.simulate_symbols(frames)
+    except BaseStrategyError as e:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    except IndexError:
+        raise HTTPException(
+            detail='To simulate your strategy you must provide buy and sell conditions of the same type',
+            status_code=HTTP_400_BAD_REQUEST,
+        )
+
+
+@router.post(
+    '/{strategy_id}/robustness',
+    response_model=RobustnessResult,
+    status_code=HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(3))],
+    openapi_extra={
+        'requestBody': {
+            'content': {
+                'application/json': {
+                    'schema': TypeAdapter(List[HistoricalData]).json_schema(),
+                },
+            },
+            'required': True,
+        },
+    },
+)
+async def simulate_robustness(
+        strategy_id,
+        request: Request,
+        params: Annotated[RobustnessParams, Query()],
         current_user: CurrentUser,
         session: AsyncSession = Depends(get_session),
 ):
+    strategy_service = SimulationService(session, strategy_id=strategy_id, user_id=current_user.id)
     try:
-        strategy_service = SimulationService(session, strategy_id=strategy_id, user_id=current_user.id)
+        strategy = await strategy_service.get_instance()
     except StrategyNotExistError as e:
         raise HTTPException(
             status_code=HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
-    df = pd.DataFrame([item.model_dump() for item in data])
+    columns = await _read_candles(request, strategy)
+
+    return await _run_robustness(strategy_service, columns, params)
+
+
+@router.post(
+    '/{strategy_id}/robustness/{dataset}',
+    response_model=RobustnessResult,
+    status_code=HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(3))],
+)
+async def simulate_robustness_on_dataset(
+        strategy_id,
+        dataset: str,
+        request: Request,
+        params: Annotated[DatasetRobustnessParams, Query()],
+        current_user: CurrentUser,
+        session: AsyncSession = Depends(get_session),
+):
+    strategy_service = SimulationService(session, strategy_id=strategy_id, user_id=current_user.id)
+    columns, _ = await _load_dataset(
+        strategy_service, dataset, params.timeframe, request
+    )
+
+    return await _run_robustness(strategy_service, columns, params)
+
+
+@router.post(
+    '/{strategy_id}/walk-forward',
+    response_model=WalkForwardResult,
+    status_code=HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(3))],
+    openapi_extra={
+        'requestBody': {
+            'content': {
+                'application/json': {
+                    'schema': TypeAdapter(List[HistoricalData]).json_schema(),
+                },
+            },
+            'required': True,
+        },
+    },
+)
+async def simulate_walk_forward(
+        strategy_id,
+        request: Request,
+        params: Annotated[WalkForwardParams, Query()],
+        current_user: CurrentUser,
+        session: AsyncSession = Depends(get_session),
+):
+    strategy_service = SimulationService(session, strategy_id=strategy_id, user_id=current_user.id)
     try:
-        df['date'] = pd.to_datetime(df['date'])
-    except TypeError:
+        strategy = await strategy_service.get_instance()
+    except StrategyNotExistError as e:
         raise HTTPException(
-            detail='Some of your provided data does not have date.',
             status_code=HTTP_400_BAD_REQUEST,
+            detail=str(e),
         )
+    columns = await _read_candles(request, strategy)
+
+    return await _run_walk_forward(strategy_service, columns, params)
+
+
+@router.post(
+    '/{strategy_id}/walk-forward/{dataset}',
+    response_model=WalkForwardResult,
+    status_code=HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(3))],
+)
+async def simulate_walk_forward_on_dataset(
+        strategy_id,
+        dataset: str,
+        request: Request,
+        params: Annotated[DatasetWalkForwardParams, Query()],
+        current_user: CurrentUser,
+        session: AsyncSession = Depends(get_session),
+):
+    strategy_service = SimulationService(session, strategy_id=strategy_id, user_id=current_user.id)
+    columns, digest = await _load_dataset(
+        strategy_service, dataset, params.timeframe, request
+    )
+
+    return await _run_walk_forward(strategy_service, columns, params, digest)
+
+
+async def _optimization_broker():
+    if settings.OPTIMIZATION_BROKER == 'local':
+        return await local_broker()
+    return RabbitBroker(await get_rabbitmq_channel())
+
+
+async def _prepare_optimization(strategy_service: SingleStrategyService,
+                                dataset: str, timeframe: str | None,
+                                data: OptimizationInput, request: Request):
     try:
-        df['momentum'] = df['close'] - df['close'].shift(1)
-    except TypeError:
+        strategy = await strategy_service.get_instance()
+        timeframe = timeframe or strategy.timeframe
+        if timeframe is not None and timeframe not in TIMEFRAMES:
+            raise IncorrectTimeframeError(timeframe)
+        grid = build_grid(data.period, data.buy, data.sell)
+        reference = await asyncio.to_thread(dataset_reference, dataset, timeframe)
+    except (BaseStrategyError, BaseMarketDataError, BaseOptimizationError) as e:
         raise HTTPException(
-            detail='Impossible to calculate momentum. Check provided data.',
             status_code=HTTP_400_BAD_REQUEST,
+            detail=str(e),
         )
+    await charge(request, reference['rows'])
+    return strategy, grid, reference
+
+
+@router.post(
+    '/{strategy_id}/optimize/{dataset}',
+    response_model=OptimizationJob,
+    status_code=HTTP_202_ACCEPTED,
+    dependencies=[Depends(QueryBudget(3))],
+)
+async def optimize_strategy(
+        strategy_id: int,
+        dataset: str,
+        request: Request,
+        data: OptimizationInput,
+        current_user: CurrentUser,
+        timeframe: str | None = None,
+        session: AsyncSession = Depends(get_session),
+        redis: Redis = Depends(get_redis),
+):
+    strategy_service = SingleStrategyService(session, strategy_id=strategy_id, user_id=current_user.id)
+    strategy, grid, reference = await _prepare_optimization(
+        strategy_service, dataset, timeframe, data, request
+    )
+
+    search = GridSearch(
+        await _optimization_broker(), grid, reference, data.top_k,
+        redis, current_user.id, strategy.id,
+    )
+    # stored before it starts, so it can be polled right away
+    await search.save()
+    # the dataset's candles stay charged until the search finishes
+    start_search(search, detach(request))
+    return search.state()
+
+
+@router.post(
+    '/{strategy_id}/optimize/{dataset}/adaptive',
+    response_model=OptimizationJob,
+    status_code=HTTP_202_ACCEPTED,
+    dependencies=[Depends(QueryBudget(3))],
+)
+async def optimize_strategy_adaptive(
+        strategy_id: int,
+        dataset: str,
+        request: Request,
+        data: AdaptiveOptimizationInput,
+        current_user: CurrentUser,
+        timeframe: str | None = None,
+        session: AsyncSession = Depends(get_session),
+        redis: Redis = Depends(get_redis),
+):
+    strategy_service = SingleStrategyService(session, strategy_id=strategy_id, user_id=current_user.id)
+    strategy, grid, reference = await _prepare_optimization(
+        strategy_service, dataset, timeframe, data, request
+    )
+    # the search starts from the strategy's own momentum thresholds
+    conditions = strategy.to_dict()
+    buy, sell = (
+        [
+            condition['threshold'] for condition in conditions[kind]
+            if condition['indicator'] == 'momentum'
+        ]
+        for kind in ('buy_conditions', 'sell_conditions')
+    )
 
+    search = AdaptiveSearch(
+        await _optimization_broker(), grid, reference, data.top_k,
+        data.budget, data.population, data.seed,
+        (buy[0], sell[0]) if buy and sell else None,
+        redis, current_user.id, strategy.id,
+    )
+    await search.save()
+    # the dataset's candles stay charged until the search finishes
+    start_search(search, detach(request))
+    return search.state()
+
+
+@router.get(
+    '/{strategy_id}/optimizations/{job_id}',
+    response_model=OptimizationJob,
+    status_code=HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(1))],
+)
+async def get_optimization(
+        strategy_id: int,
+        job_id: str,
+        current_user: CurrentUser,
+        redis: Redis = Depends(get_redis),
+):
     try:
-        result = await strategy_service.simulate_strategy(df)
-    except TypeError:
+        job = await get_job(redis, job_id, current_user.id)
+        if job['strategy_id'] != strategy_id:
+            raise OptimizationJobNotExistError()
+    except BaseOptimizationError as e:
         raise HTTPException(
-            detail='Some data is in incorrect format.',
             status_code=HTTP_400_BAD_REQUEST,
+            detail=str(e),
         )
-    except IndexError:
+    return job
+
+
+@router.get(
+    '/{strategy_id}/runs',
+    response_model=SimulationRunPage,
+    status_code=HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(2))],
+)
+async def get_simulation_runs(
+        strategy_id: int,
+        current_user: CurrentUser,
+        limit: int = Query(50, ge=1, le=500),
+        before: int | None = None,
+        session: AsyncSession = Depends(get_session),
+):
+    runs = await SimulationRunService(session).get_runs(
+        current_user.id, strategy_id, limit, before
+    )
+    return {
+        'items': runs,
+        'next_before': runs[-1]['id'] if len(runs) == limit else None,
+    }
+
+
+@router.get(
+    '/{strategy_id}/runs/{run_id}',
+    response_model=SimulationRunResponse,
+    status_code=HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(2))],
+)
+async def get_simulation_run(
+        strategy_id: int,
+        run_id: int,
+        current_user: CurrentUser,
+        session: AsyncSession = Depends(get_session),
+):
+    try:
+        return await SimulationRunService(session).get_run(
+            current_user.id, strategy_id, run_id
+        )
+    except SimulationRunNotExistError as e:
         raise HTTPException(
-            detail='To simulate your strategy you must provide buy and sell conditions of the same type',
             status_code=HTTP_400_BAD_REQUEST,
+            detail=str(e),
         )
 
-    return result
+
+@router.get(
+    '/{strategy_id}/runs/{run_id}/trades',
+    response_model=TradePage,
+    status_code=HTTP_200_OK,
+    dependencies=[Depends(QueryBudget(3))],
+)
+async def get_simulation_trades(
+        strategy_id: int,
+        run_id: int,
+        current_user: CurrentUser,
+        limit: int = Query(1_000, ge=1, le=10_000),
+        after: int | None = None,
+        session: AsyncSession = Depends(get_session),
+):
+    run_service = SimulationRunService(session)
+    try:
+        await run_service.get_run(current_user.id, strategy_id, run_id)
+    except SimulationRunNotExistError as e:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    trades = await run_service.get_trades(run_id, limit, after)
+    return {
+        'items': trades,
+        'next_after': trades[-1]['seq'] if len(trades) == limit else None,
+    }
@@ -1,6 +1,7 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Annotated, Dict, List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class BaseCondition(BaseModel):
@@ -16,6 +17,7 @@ class BaseStrategy(BaseModel):
     name: str
     description: Optional[str] | None = None
     asset_type: str
+    timeframe: str | None = None
     status: str
 
 
@@ -23,6 +25,7 @@ class BaseStrategyOptional(BaseModel):
     name: str | None = None
     description: Optional[str] | None = None
     asset_type: str | None = None
+    timeframe: str | None = None
     status: str | None = None
 
 
@@ -35,10 +38,30 @@ class StrategyInput(BaseStrategy):
 
 
 class StrategyResponse(BaseStrategy):
+    version: int = 1
     buy_conditions: List[BaseCondition]
     sell_conditions: List[BaseCondition]
 
 
+class ArchivedStrategyResponse(StrategyResponse):
+    id: int
+    closed_at: datetime | None = None
+    archived_at: datetime
+
+
+class ArchivedStrategyPage(BaseModel):
+    items: List[ArchivedStrategyResponse]
+    # pass as ``before`` for the next (older) page
+    next_before: int | None = None
+
+
+class StrategyBatch(BaseModel):
+    # keyed by strategy id, in the order requested
+    strategies: Dict[int, StrategyResponse]
+    # ids that do not exist or belong to someone else
+    missing: List[int]
+
+
 class HistoricalData(BaseModel):
     date: str
     open: float
@@ -54,3 +77,203 @@ class SimulationResult(BaseModel):
     profit_loss: float
     win_rate: float
     max_drawdown: float
+    # set when the run and its trades are persisted
+    run_id: int | None = None
+
+
+class SimulationRunResponse(BaseModel):
+    id: int
+    strategy_id: int
+    strategy_version: int
+    source: str
+    timeframe: str | None = None
+    created_at: datetime
+    status: str
+    candles: int
+    total_trades: int
+    profit_loss: float
+    win_rate: float
+    max_drawdown: float
+
+
+class SimulationRunPage(BaseModel):
+    items: List[SimulationRunResponse]
+    # pass as ``before`` for the next (older) page
+    next_before: int | None = None
+
+
+class TradeResponse(BaseModel):
+    seq: int
+    action: str
+    date: datetime
+    price: float
+    profit: float | None = None
+
+
+class TradePage(BaseModel):
+    items: List[TradeResponse]
+    # pass as ``after`` for the next page
+    next_after: int | None = None
+
+
+class MultiSymbolInput(BaseModel):
+    # stored market data, by symbol
+    datasets: List[str] = []
+    # inline bars, each item in the market data ingestion message format
+    series: List[dict | list] = []
+
+
+class SimulationTotals(BaseModel):
+    candles: int
+    total_trades: int
+    profit_loss: float
+    win_rate: float
+    max_drawdown: float
+
+
+class SymbolSimulationResult(SimulationTotals):
+    symbol: str
+
+
+class MultiSymbolResult(BaseModel):
+    strategy_id: int
+    symbols: List[SymbolSimulationResult]
+    total: SimulationTotals
+
+
+class RobustnessParams(BaseModel):
+    method: Literal['bootstrap', 'block', 'permutation'] = 'bootstrap'
+    variants: int = Field(1_000, ge=1)
+    seed: int = 0
+    block_size: int = Field(20, ge=1)
+
+
+class DatasetRobustnessParams(RobustnessParams):
+    # a query model takes no other query parameter alongside it
+    timeframe: str | None = None
+
+
+class Distribution(BaseModel):
+    mean: float
+    std: float
+    min: float
+    p5: float
+    p25: float
+    p50: float
+    p75: float
+    p95: float
+    max: float
+
+
+class RobustnessResult(BaseModel):
+    strategy_id: int
+    method: str
+    variants: int
+    seed: int
+    baseline_profit_loss: float
+    baseline_equity_drawdown: float
+    probability_of_loss: float
+    profit_loss: Distribution
+    equity_drawdown: Distribution
+    closed_trades: Distribution
+
+
+class GridRange(BaseModel):
+    start: float
+    stop: float
+    step: float = Field(gt=0)
+
+
+class OptimizationInput(BaseModel):
+    # explicit values, or an inclusive range
+    buy: List[float] | GridRange
+    sell: List[float] | GridRange
+    period: List[Annotated[int, Field(ge=1)]] = [1]
+    top_k: int = Field(10, ge=1, le=1000)
+
+
+class AdaptiveOptimizationInput(OptimizationInput):
+    # evaluations at most, of distinct grid points
+    budget: int = Field(500, ge=1)
+    population: int = Field(32, ge=2, le=1000)
+    seed: int | None = None
+
+
+class OptimizationPoint(BaseModel):
+    period: int
+    buy: float
+    sell: float
+    total_trades: int
+    profit_loss: float
+    win_rate: float
+    max_drawdown: float
+
+
+class OptimizationJob(BaseModel):
+    job_id: str
+    strategy_id: int
+    method: Literal['grid', 'adaptive'] = 'grid'
+    status: Literal['running', 'complete', 'failed']
+    error: str | None = None
+    dataset: str
+    timeframe: str | None = None
+    points: int
+    points_done: int
+    budget: int | None = None
+    generations: int = 0
+    shards: int
+    shards_done: int
+    retries: int
+    started_at: float
+    finished_at: float | None = None
+    results: List[OptimizationPoint]
+
+
+class WalkForwardParams(BaseModel):
+    # candles of each train and test window
+    train: int = Field(ge=2)
+    test: int = Field(ge=2)
+    # candles between window starts, the test window by default
+    step: int | None = Field(None, ge=1)
+    buy: List[float]
+    sell: List[float]
+    period: List[Annotated[int, Field(ge=1)]] = [1]
+
+
+class DatasetWalkForwardParams(WalkForwardParams):
+    # a query model takes no other query parameter alongside it
+    timeframe: str | None = None
+
+
+class WalkForwardWindow(BaseModel):
+    train_start: int
+    test_start: int
+    test_stop: int
+    period: int
+    buy: float
+    sell: float
+    in_sample_profit_loss: float
+    total_trades: int
+    profit_loss: float
+    win_rate: float
+    max_drawdown: float
+
+
+class WalkForwardTotals(BaseModel):
+    windows: int
+    profitable_windows: int
+    total_trades: int
+    profit_loss: float
+    in_sample_profit_loss: float
+    win_rate: float
+    max_drawdown: float
+
+
+class WalkForwardResult(BaseModel):
+    strategy_id: int
+    train: int
+    test: int
+    step: int
+    points: int
+    windows: List[WalkForwardWindow]
+    total: WalkForwardTotals
@@ -1,29 +1,59 @@
-from decimal import InvalidOperation
-from typing import List
+import asyncio
+from typing import AsyncIterator, List
 
-import pandas as pd
-from sqlalchemy import select, and_, delete
+from sqlalchemy import select, and_, delete, insert, update, func
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.config import settings
+from app.lazy import lazy_import
+from app.market.indicators import content_digest
+from app.market.resample import TIMEFRAMES
+from app.optimization.grid import build_grid
+from app.optimization.walk_forward import totals, walk_forward
+from app.profiling import stage
 from app.services import ServiceFactory
 from app.strategy.exeptions import IncorrectConditionTypeError, IncorrectStatusTypesError, InvalidConditionData, \
     InvalidStrategyField, StrategyNotExistError, InvalidConditionDataStructureError, \
-    ConditionFailToCreateError
+    ConditionFailToCreateError, IncorrectTimeframeError, TooManyVariantsError, NotEnoughCandlesError, \
+    NoSymbolsError, SimulationRunNotExistError
 from app.strategy.models import (
     Strategy,
     Condition,
+    ArchivedStrategy,
+    SimulationRun,
+    SimulationTrade,
     STATUS_TYPES,
     CONDITION_TYPES,
 )
+from app.strategy.multi_symbol import (
+    MAX_DRAWDOWN,
+    PROFIT_LOSS,
+    TOTAL_TRADES,
+    WINS,
+    PackedSeries,
+    simulate_series,
+)
+from app.strategy.robustness import (
+    distribution,
+    equity_drawdown,
+    run_trades,
+    simulate_variants,
+    trade_rows,
+)
 from app.strategy.schemas import (
     StrategyInput,
     ConditionData,
     StrategyInputOptional,
+    RobustnessParams,
+    WalkForwardParams,
 )
 from app.strategy.utils import ConditionFormatter
 
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
 
 class ConditionService(ServiceFactory):
     model = Condition
@@ -99,6 +129,18 @@ class StrategyService(ServiceFactory):
         except StrategyNotExistError as e:
             raise e
 
+    async def get_strategies_by_ids(self, user_id: int,
+                                    strategy_ids: List[int]) -> List[Strategy]:
+        """The user's strategies among ``strategy_ids``, with conditions."""
+        result = await self.session.execute(
+            select(self.model)
+            .where(
+                and_(self.model.user_id == user_id, self.model.id.in_(strategy_ids))
+            )
+            .options(selectinload(self.model.conditions))
+        )
+        return result.scalars().all()
+
     async def get_user_strategies(self, user_id: int):
         result = await self.session.execute(
             select(self.model)
@@ -109,21 +151,108 @@ class StrategyService(ServiceFactory):
         strategies = result.scalars().all()
         return strategies
 
+    async def stream_user_strategies(self, user_id: int
+                                     ) -> AsyncIterator[tuple[int, dict]]:
+        """
+        The user's strategies as in ``get_user_strategies``, as ids and
+        ``Strategy.to_dict`` entries: one Core join streamed from the
+        cursor and grouped into entries as rows arrive, with no ORM objects.
+        """
+        strategy, condition = Strategy.__table__, Condition.__table__
+        result = await self.session.stream(
+            select(
+                strategy.c.id, strategy.c.name, strategy.c.description,
+                strategy.c.asset_type, strategy.c.timeframe, strategy.c.status,
+                strategy.c.version, condition.c.type, condition.c.indicator,
+                condition.c.threshold,
+            )
+            .select_from(strategy.outerjoin(
+                condition, condition.c.strategy_id == strategy.c.id
+            ))
+            .where(strategy.c.user_id == user_id, strategy.c.status != 'closed')
+            .order_by(strategy.c.id, condition.c.id)
+            .execution_options(yield_per=settings.STRATEGY_LIST_FETCH_SIZE)
+        )
+        strategy_id = entry = None
+        async for rows in result.partitions():
+            for (row_id, name, description, asset_type, timeframe, status,
+                 version, type_, indicator, threshold) in rows:
+                if row_id != strategy_id:
+                    if entry is not None:
+                        yield strategy_id, entry
+                    strategy_id = row_id
+                    entry = {
+                        'name': name,
+                        'description': description,
+                        'asset_type': asset_type,
+                        'timeframe': timeframe,
+                        'status': status,
+                        'version': version,
+                        'buy_conditions': [],
+                        'sell_conditions': [],
+                    }
+                # no condition rows come back as a single NULL one
+                if type_ is not None:
+                    entry[type_].append(
+                        {'indicator': indicator, 'threshold': threshold}
+                    )
+        if entry is not None:
+            yield strategy_id, entry
+
     async def add_strategy(
             self,
             strategy: StrategyInput,
             current_user_id: int,
     ):
+        if strategy.timeframe is not None and strategy.timeframe not in TIMEFRAMES:
+            raise IncorrectTimeframeError(strategy.timeframe)
         new_strategy = self.model(
             name=strategy.name,
             description=strategy.description,
             asset_type=strategy.asset_type,
+            timeframe=strategy.timeframe,
             user_id=current_user_id,
         )
         self.session.add(new_strategy)
         return new_strategy
 
 
+class ArchivedStrategyService(ServiceFactory):
+    """
+    Reads of strategies ``app.strategy.archive`` moved out of the hot tables:
+    uncached, and not part of any listing of the user's strategies.
+    """
+    model = ArchivedStrategy
+
+    def _user_strategies(self, user_id: int):
+        return (
+            select(self.model)
+            .where(self.model.user_id == user_id)
+            .options(selectinload(self.model.conditions))
+        )
+
+    async def get_archived_strategy(self, user_id: int,
+                                    strategy_id: int) -> ArchivedStrategy:
+        result = await self.session.execute(
+            self._user_strategies(user_id).where(self.model.id == strategy_id)
+        )
+        strategy = result.scalars().first()
+        if strategy is None:
+            raise StrategyNotExistError()
+        return strategy
+
+    async def get_archived_strategies(self, user_id: int, limit: int,
+                                      before: int | None = None
+                                      ) -> List[ArchivedStrategy]:
+        query = self._user_strategies(user_id)
+        if before is not None:
+            query = query.where(self.model.id < before)
+        result = await self.session.execute(
+            query.order_by(self.model.id.desc()).limit(limit)
+        )
+        return result.scalars().all()
+
+
 class SingleStrategyService(StrategyService):
 
     def __init__(self, session: AsyncSession,
@@ -139,14 +268,19 @@ class SingleStrategyService(StrategyService):
 
     async def get_instance(self):
         try:
-            return self._strategy if self._strategy else await self.get_single_strategy(self.user_id, self.strategy_id)
+            if self._strategy is None:
+                self._strategy = await self.get_single_strategy(self.user_id, self.strategy_id)
+            return self._strategy
         except StrategyNotExistError as e:
             raise e
 
     async def update(self, strategy_input: StrategyInputOptional):
         try:
             strategy = await self.get_instance()
-            for key, value in strategy_input.model_dump(exclude_unset=True).items():
+            changes = strategy_input.model_dump(exclude_unset=True)
+            if changes:
+                strategy.version = (strategy.version or 1) + 1
+            for key, value in changes.items():
                 if key == 'conditions':
                     await self.condition_service.delete(strategy.conditions)
                     formatted_value = [
@@ -158,6 +292,14 @@ class SingleStrategyService(StrategyService):
                 if key == 'status':
                     if value not in STATUS_TYPES:
                         raise IncorrectStatusTypesError()
+                    if value != strategy.status:
+                        # app.strategy.archive counts its delay from here
+                        strategy.closed_at = (
+                            func.now() if value == 'closed' else None
+                        )
+                if key == 'timeframe':
+                    if value is not None and value not in TIMEFRAMES:
+                        raise IncorrectTimeframeError(value)
 
                 if hasattr(strategy, key) is False:
                     raise InvalidStrategyField(key)
@@ -166,7 +308,7 @@ class SingleStrategyService(StrategyService):
 
             return strategy
         except (InvalidConditionData, IncorrectStatusTypesError, InvalidStrategyField,
-                InvalidConditionDataStructureError) as e:
+                InvalidConditionDataStructureError, IncorrectTimeframeError) as e:
             raise e
 
     async def delete(self):
@@ -182,15 +324,152 @@ class SingleStrategyService(StrategyService):
 class SimulationService(SingleStrategyService):
 
     async def simulate_strategy(self,
-                                df: pd.DataFrame, indicator: str = 'momentum'
+                                df: 'pd.DataFrame', indicator: str = 'momentum'
                                 ):
-        balance, position, entry_price = 0, 0, 0
-        trades = []
+        with stage('load_strategy'):
+            try:
+                strategy = await self.get_instance()
+            except StrategyNotExistError as e:
+                raise e
+        st_dict = self._select_conditions(strategy, indicator)
+
+        with stage('trade_loop'):
+            trades, balance = self._run_trades(df, indicator, st_dict)
+        # kept for SimulationRunService.write_trades
+        self.trades = trades
+
+        with stage('metrics'):
+            return self._summarize(strategy, trades, balance)
+
+    async def simulate_symbols(self, frames: dict[str, dict],
+                               indicator: str = 'momentum') -> dict:
+        """
+        Simulate the strategy on every series of ``frames`` (symbol to
+        columns) at once, packed into one array.
+        """
+        if not frames:
+            raise NoSymbolsError()
+        with stage('load_strategy'):
+            strategy = await self.get_instance()
+        st_dict = self._select_conditions(strategy, indicator)
+
+        with stage('pack'):
+            packed = PackedSeries.pack(frames)
+        with stage('trade_loop'):
+            results = await simulate_series(
+                packed,
+                st_dict['buy_conditions']['threshold'],
+                st_dict['sell_conditions']['threshold'],
+            )
 
-        try:
+        with stage('metrics'):
+            return {
+                'strategy_id': strategy.id,
+                'symbols': [
+                    {'symbol': symbol, **self._totals(candles, row[None])}
+                    for symbol, candles, row in zip(
+                        packed.symbols, packed.candles.tolist(), results
+                    )
+                ],
+                'total': self._totals(len(packed.closes), results),
+            }
+
+    @staticmethod
+    def _totals(candles: int, results: 'np.ndarray') -> dict:
+        total_trades = int(results[:, TOTAL_TRADES].sum())
+        # a symbol has closed a trade once it has a buy and a sell
+        closed = results[:, TOTAL_TRADES] >= 2
+        return {
+            'candles': candles,
+            'total_trades': total_trades,
+            'profit_loss': float(results[:, PROFIT_LOSS].sum()),
+            'win_rate': (
+                results[:, WINS].sum() / total_trades * 100
+                if total_trades
+                else 0
+            ),
+            'max_drawdown': (
+                float(results[closed, MAX_DRAWDOWN].min()) if closed.any() else 0
+            ),
+        }
+
+    async def simulate_robustness(self, columns: dict,
+                                  params: RobustnessParams,
+                                  indicator: str = 'momentum') -> dict:
+        """
+        Distribution of P&L and drawdown over ``params.variants`` resampled
+        copies of the candles' close-to-close changes (the series the
+        momentum strategy trades on), or over permutations of the order of
+        its trades, run across the robustness process pool.
+        """
+        if params.variants > settings.ROBUSTNESS_MAX_VARIANTS:
+            raise TooManyVariantsError(
+                params.variants, settings.ROBUSTNESS_MAX_VARIANTS
+            )
+        if len(columns['close']) < 2:
+            raise NotEnoughCandlesError()
+        with stage('load_strategy'):
             strategy = await self.get_instance()
-        except StrategyNotExistError as e:
-            raise e
+        st_dict = self._select_conditions(strategy, indicator)
+        buy = st_dict['buy_conditions']['threshold']
+        sell = st_dict['sell_conditions']['threshold']
+        diffs = np.diff(columns['close'].astype(np.float64, copy=False))
+
+        with stage('variants'):
+            results = await simulate_variants(
+                diffs, buy, sell, params.method, params.variants, params.seed,
+                params.block_size,
+            )
+
+        with stage('metrics'):
+            baseline = run_trades(diffs, buy, sell)
+            profit_loss, drawdown, closed_trades = results.T
+            return {
+                'strategy_id': strategy.id,
+                'method': params.method,
+                'variants': params.variants,
+                'seed': params.seed,
+                'baseline_profit_loss': float(baseline.sum()),
+                'baseline_equity_drawdown': equity_drawdown(baseline),
+                'probability_of_loss': float((profit_loss < 0).mean()),
+                'profit_loss': distribution(profit_loss),
+                'equity_drawdown': distribution(drawdown),
+                'closed_trades': distribution(closed_trades),
+            }
+
+    async def simulate_walk_forward(self, columns: dict,
+                                    params: WalkForwardParams,
+                                    digest: str | None = None) -> dict:
+        """
+        Walk-forward analysis over one series: the thresholds are optimized
+        over the ``params`` grid on every train window and evaluated on the
+        test window after it, windows spread across the process pool.
+        """
+        with stage('load_strategy'):
+            strategy = await self.get_instance()
+        grid = build_grid(params.period, params.buy, params.sell)
+        step = params.step or params.test
+        close = np.asarray(columns['close'], dtype=np.float64)
+
+        with stage('windows'):
+            rows = await walk_forward(
+                close, digest or content_digest(close), grid, params.train,
+                params.test, step,
+            )
+
+        with stage('metrics'):
+            return {
+                'strategy_id': strategy.id,
+                'train': params.train,
+                'test': params.test,
+                'step': step,
+                'points': grid.size,
+                'windows': rows,
+                'total': totals(rows),
+            }
+
+    @staticmethod
+    def _select_conditions(strategy: Strategy, indicator: str) -> dict:
         st_dict = strategy.to_dict()
         st_dict['buy_conditions'] = list(
             filter(
@@ -203,42 +482,47 @@ class SimulationService(SingleStrategyService):
                 st_dict['sell_conditions'],
             )
         )[0]
+        return st_dict
+
+    @staticmethod
+    def _run_trades(df: 'pd.DataFrame', indicator: str, st_dict: dict):
+        # only the threshold masks are evaluated here, the indicator column
+        # comes computed (and usually cached) with the frame
+        entries, exits = trade_rows(
+            df[indicator].to_numpy(dtype=np.float64),
+            st_dict['buy_conditions']['threshold'],
+            st_dict['sell_conditions']['threshold'],
+        )
+        # trade_rows numbers rows from the second value of the column
+        entries, exits = entries - 1, exits - 1
+        close = df['close'].to_numpy(dtype=np.float64)
+        dates = df['date']
+        buy_dates = dates.iloc[entries].tolist()
+        sell_dates = dates.iloc[exits].tolist()
+        profits = (close[exits] - close[entries[:len(exits)]]).tolist()
 
-        for index, row in df.iterrows():
-            momentum = float(row[indicator])
-            close_price = float(row['close'])
-            try:
-                if (
-                        momentum > st_dict['buy_conditions']['threshold']
-                        and position == 0
-                ):
-                    position = 1
-                    entry_price = close_price
-                    trades.append(
-                        {
-                            'action': 'buy',
-                            'date': row['date'],
-                            'price': close_price,
-                        }
-                    )
-                elif (
-                        momentum < st_dict['sell_conditions']['threshold']
-                        and position == 1
-                ):
-                    profit = close_price - entry_price
-                    balance += profit
-                    position = 0
-                    trades.append(
-                        {
-                            'action': 'sell',
-                            'date': row['date'],
-                            'price': close_price,
-                            'profit': profit,
-                        }
-                    )
-            except InvalidOperation:
-                continue
+        trades = []
+        for number, (row, date) in enumerate(zip(entries.tolist(), buy_dates)):
+            trades.append(
+                {
+                    'action': 'buy',
+                    'date': date,
+                    'price': float(close[row]),
+                }
+            )
+            if number < len(profits):
+                trades.append(
+                    {
+                        'action': 'sell',
+                        'date': sell_dates[number],
+                        'price': float(close[exits[number]]),
+                        'profit': profits[number],
+                    }
+                )
+        return trades, sum(profits)
 
+    @staticmethod
+    def _summarize(strategy: Strategy, trades: list, balance: float) -> dict:
         sell_trades = [
             trade.get('profit', 0)
             for trade in trades
@@ -263,3 +547,128 @@ class SimulationService(SingleStrategyService):
             ),
             'max_drawdown': max_drawdown,
         }
+
+
+class SimulationRunService(ServiceFactory):
+    model = SimulationRun
+
+    TRADE_COLUMNS = ('run_id', 'seq', 'action', 'date', 'price', 'profit')
+    # rows per multi-row INSERT when COPY is not available
+    TRADE_INSERT_BATCH = 5_000
+
+    async def add_run(self, strategy: Strategy, result: dict, source: str,
+                      timeframe: str | None, candles: int) -> SimulationRun:
+        run = self.model(
+            strategy_id=strategy.id,
+            strategy_version=strategy.version,
+            source=source,
+            timeframe=timeframe,
+            candles=candles,
+            total_trades=result['total_trades'],
+            profit_loss=result['profit_loss'],
+            win_rate=result['win_rate'],
+            max_drawdown=result['max_drawdown'],
+        )
+        self.session.add(run)
+        await self.session.flush()
+        return run
+
+    @staticmethod
+    def _trade_records(run_id: int, trades: list) -> list[tuple]:
+        return [
+            (
+                run_id,
+                seq,
+                trade['action'],
+                trade['date'].to_pydatetime()
+                if isinstance(trade['date'], pd.Timestamp) else trade['date'],
+                trade['price'],
+                trade.get('profit'),
+            )
+            for seq, trade in enumerate(trades)
+        ]
+
+    async def write_trades(self, run_id: int, trades: list):
+        """
+        Store the trades of a run with ``COPY`` on asyncpg, or batched
+        multi-row inserts on other drivers, and mark the run complete.
+        """
+        records = await asyncio.to_thread(self._trade_records, run_id, trades)
+        # first, so that COPY runs inside the same transaction
+        await self.session.execute(
+            update(self.model)
+            .where(self.model.id == run_id)
+            .values(status='complete')
+        )
+        connection = await self.session.connection()
+        if connection.dialect.driver == 'asyncpg':
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                SimulationTrade.__tablename__,
+                records=records,
+                columns=self.TRADE_COLUMNS,
+            )
+            return
+        for start in range(0, len(records), self.TRADE_INSERT_BATCH):
+            await self.session.execute(
+                insert(SimulationTrade.__table__),
+                [
+                    dict(zip(self.TRADE_COLUMNS, record))
+                    for record in records[start:start + self.TRADE_INSERT_BATCH]
+                ],
+            )
+
+    async def mark_failed(self, run_id: int):
+        await self.session.execute(
+            update(self.model)
+            .where(self.model.id == run_id)
+            .values(status='failed')
+        )
+
+    def _user_runs(self, user_id: int, strategy_id: int | str):
+        return (
+            select(self.model.__table__)
+            .join(Strategy, Strategy.id == self.model.strategy_id)
+            .where(
+                and_(
+                    Strategy.user_id == user_id,
+                    self.model.strategy_id == int(strategy_id),
+                )
+            )
+        )
+
+    async def get_runs(self, user_id: int, strategy_id: int | str, limit: int,
+                       before: int | None = None) -> list[dict]:
+        query = self._user_runs(user_id, strategy_id)
+        if before is not None:
+            query = query.where(self.model.id < before)
+        result = await self.session.execute(
+            query.order_by(self.model.id.desc()).limit(limit)
+        )
+        return [dict(row) for row in result.mappings()]
+
+    async def get_run(self, user_id: int, strategy_id: int | str,
+                      run_id: int) -> dict:
+        result = await self.session.execute(
+            self._user_runs(user_id, strategy_id)
+            .where(self.model.id == run_id)
+        )
+        run = result.mappings().first()
+        if run is None:
+            raise SimulationRunNotExistError()
+        return dict(run)
+
+    async def get_trades(self, run_id: int, limit: int,
+                         after: int | None = None) -> list[dict]:
+        table = SimulationTrade.__table__
+        query = (
+            select(table.c.seq, table.c.action, table.c.date, table.c.price,
+                   table.c.profit)
+            .where(table.c.run_id == run_id)
+        )
+        if after is not None:
+            query = query.where(table.c.seq > after)
+        result = await self.session.execute(
+            query.order_by(table.c.seq).limit(limit)
+        )
+        return [dict(row) for row in result.mappings()]
@@ -1,3 +1,10 @@
+import json
+import time
+
+from redis.asyncio import Redis
+
+from app.cache import publish_invalidation
+from app.config import settings
 from app.strategy.exeptions import InvalidConditionData
 from app.strategy.models import Strategy
 from app.strategy.schemas import StrategyResponse, BaseCondition, ConditionData
@@ -13,6 +20,7 @@ class StrategyFormatter:
             name=self.strategy.name,
             description=self.strategy.description,
             asset_type=self.strategy.asset_type,
+            timeframe=self.strategy.timeframe,
             sell_conditions=[
                 BaseCondition(
                     indicator=condition.indicator, threshold=condition.threshold
@@ -28,6 +36,7 @@ class StrategyFormatter:
                 if condition.type == 'buy_conditions'
             ],
             status=self.strategy.status,
+            version=self.strategy.version,
         )
 
 
@@ -56,3 +65,131 @@ class RedisUtils:
 
     def get_strategy_cached_name(self):
         return f'strategies_{self.user_id}'
+
+    def get_single_strategy_cached_name(self, strategy_id: int):
+        return f'strategy_{self.user_id}_{strategy_id}'
+
+    def get_user_events_channel_name(self):
+        return f'user_events_{self.user_id}'
+
+    @staticmethod
+    def get_strategies_version_name(username: str):
+        # keyed by username, which the JWT carries, so reads need no user lookup
+        return f'strategies_version_{username}'
+
+
+class StrategyVersion:
+    """
+    Per-user counter bumped on every strategy write, the source of strategy
+    ETags. A missing counter restarts from the current time in nanoseconds,
+    so a lost key can never reproduce an ETag a client already holds.
+    """
+
+    def __init__(self, redis: Redis, username: str, reader=None):
+        self.redis = redis
+        self.reader = reader or redis
+        self.key = RedisUtils.get_strategies_version_name(username)
+
+    async def get(self) -> int:
+        version = await self.reader.get(self.key)
+        if version is None:
+            await self.redis.set(self.key, time.time_ns(), nx=True)
+            version = await self.redis.get(self.key)
+        return int(version)
+
+
+class StrategyCache:
+
+    def __init__(self, redis: Redis, user_id: int, reader=None,
+                 username: str | None = None):
+        self.redis = redis
+        # reads may be served by a client-side cache, writes always go to Redis
+        self.reader = reader or redis
+        self.redis_utils = RedisUtils(user_id)
+        self.username = username
+
+    async def get_strategies_json(self) -> str | None:
+        """The cached listing as stored: JSON to send as it is."""
+        return await self.reader.get(
+            self.redis_utils.get_strategy_cached_name()
+        )
+
+    async def get_strategy(self, strategy_id: int) -> dict | None:
+        cached_value = await self.reader.get(
+            self.redis_utils.get_single_strategy_cached_name(strategy_id)
+        )
+        return json.loads(cached_value) if cached_value is not None else None
+
+    async def get_strategies_by_ids(self, strategy_ids: list[int]
+                                    ) -> dict[int, dict | None]:
+        """Cached entries of ``strategy_ids`` in one ``MGET``, ``None`` if missing."""
+        cached_values = await self.reader.mget([
+            self.redis_utils.get_single_strategy_cached_name(strategy_id)
+            for strategy_id in strategy_ids
+        ])
+        return {
+            strategy_id: json.loads(value) if value is not None else None
+            for strategy_id, value in zip(strategy_ids, cached_values)
+        }
+
+    async def set_strategies_json(self, entries: dict[int, str]) -> str:
+        """
+        Cache the listing and each strategy from their entries already
+        encoded to JSON, by strategy id; returns the listing's JSON.
+        """
+        listing = f'[{",".join(entries.values())}]'
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.set(
+            self.redis_utils.get_strategy_cached_name(),
+            listing,
+            ex=settings.STRATEGY_CACHE_TTL,
+        )
+        for strategy_id, entry in entries.items():
+            pipeline.set(
+                self.redis_utils.get_single_strategy_cached_name(strategy_id),
+                entry,
+                ex=settings.STRATEGY_CACHE_TTL,
+            )
+        await pipeline.execute()
+        return listing
+
+    async def set_strategy_entries(self, strategies: list[Strategy]):
+        pipeline = self.redis.pipeline(transaction=False)
+        for strategy in strategies:
+            pipeline.set(
+                self.redis_utils.get_single_strategy_cached_name(strategy.id),
+                json.dumps(strategy.to_dict()),
+                ex=settings.STRATEGY_CACHE_TTL,
+            )
+        await pipeline.execute()
+
+    async def set_strategy(self, strategy: Strategy):
+        await self.redis.set(
+            self.redis_utils.get_single_strategy_cached_name(strategy.id),
+            json.dumps(strategy.to_dict()),
+            ex=settings.STRATEGY_CACHE_TTL,
+        )
+
+    async def invalidate(self, *strategy_ids: int):
+        """
+        Drop cached entries and, given the username, bump its version, then
+        tell every worker's local cache about it.
+        """
+        keys = [
+            self.redis_utils.get_strategy_cached_name(),
+            *(
+                self.redis_utils.get_single_strategy_cached_name(strategy_id)
+                for strategy_id in strategy_ids
+            ),
+        ]
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.delete(*keys)
+        if self.username is not None:
+            key = RedisUtils.get_strategies_version_name(self.username)
+            # never restart a lost counter from 1, see StrategyVersion
+            pipeline.set(key, time.time_ns(), nx=True)
+            pipeline.incr(key)
+            keys.append(key)
+        # after the writes, so evicted workers re-read the new values
+        publish_invalidation(pipeline, keys)
+        await pipeline.execute()
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+
+import aio_pika
+from aio_pika import connect_robust
+
+from app.config import settings
+from app.dependencies import RABBITMQ_URL, MARKET_DATA_QUEUE_NAME
+from app.market.exeptions import BaseMarketDataError
+from app.market.store import ColumnStore
+from app.market.utils import BarBatcher
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionWorker:
+    """
+    Consumes OHLCV bars from ``MARKET_DATA_QUEUE_NAME`` and appends them to
+    the column store in batches.
+
+    Messages stay unacknowledged until the batch holding them is on disk and
+    are then acknowledged at once with ``multiple=True``. The prefetch count
+    therefore bounds the bars buffered in memory: while a batch is being
+    written the broker stops delivering once the window is full.
+
+    A failed write redelivers the whole batch, including symbols already
+    written, so only bars newer than a symbol's last stored bar are
+    appended.
+    """
+
+    def __init__(self, store: ColumnStore | None = None):
+        self.store = store or ColumnStore()
+        self.batcher = BarBatcher()
+        self._last_message: aio_pika.abc.AbstractIncomingMessage | None = None
+        self._pending = 0
+        self._lock = asyncio.Lock()
+
+    async def on_message(self, message: aio_pika.abc.AbstractIncomingMessage):
+        try:
+            self.batcher.add(message.body)
+        except BaseMarketDataError as e:
+            logger.warning('Rejected market data message: %s', e)
+            await message.reject()
+            return
+        self._last_message = message
+        self._pending += 1
+        if (
+                self.batcher.rows >= settings.INGEST_BATCH_SIZE
+                or self._pending >= settings.INGEST_PREFETCH_COUNT // 2
+        ):
+            await self.flush()
+
+    def _write(self, batches: dict):
+        for symbol, columns in batches.items():
+            last = self.store.last_date(symbol)
+            if last is not None:
+                # bars of a redelivered batch that are already stored
+                newer = columns['date'] > last
+                if not newer.all():
+                    columns = {
+                        name: column[newer] for name, column in columns.items()
+                    }
+            if len(columns['date']):
+                self.store.append(symbol, columns)
+
+    async def flush(self):
+        async with self._lock:
+            if self._last_message is None:
+                return
+            message, self._last_message, self._pending = (
+                self._last_message, None, 0
+            )
+            batches = self.batcher.drain()
+            try:
+                await asyncio.to_thread(self._write, batches)
+            except OSError:
+                logger.exception('Failed to write market data batch')
+                await message.nack(multiple=True)
+                return
+            await message.ack(multiple=True)
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(settings.INGEST_FLUSH_INTERVAL)
+            await self.flush()
+
+    async def run(self):
+        connection = await connect_robust(RABBITMQ_URL)
+        async with connection:
+            channel = await connection.channel()
+            await channel.set_qos(prefetch_count=settings.INGEST_PREFETCH_COUNT)
+            queue = await channel.declare_queue(
+                MARKET_DATA_QUEUE_NAME, durable=True
+            )
+            await queue.consume(self.on_message)
+            await self._flush_periodically()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(IngestionWorker().run())
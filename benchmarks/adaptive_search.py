@@ -0,0 +1,114 @@
+"""
+Adaptive threshold search against the exhaustive grid it samples from.
+
+    python -m benchmarks.adaptive_search --candles 20000 --side 60 --runs 8
+
+For ``--runs`` synthetic random walks, evaluates every point of a
+``period x side x side`` grid in process, then runs ``AdaptiveSearch``
+over the same grid through ``LocalBroker`` and the process pool, as
+``OPTIMIZATION_BROKER=local`` does. Prints the evaluations each one
+needed, the best P&L each found and where the adaptive optimum ranks in
+the exhaustive one.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+
+# pool processes import this module again and inherit the parent's
+# directories, so only the first one picks them, before the settings load
+if 'ADAPTIVE_SEARCH_BENCHMARK_DIR' not in os.environ:
+    root = os.environ['ADAPTIVE_SEARCH_BENCHMARK_DIR'] = tempfile.mkdtemp()
+    os.environ['MARKET_DATA_DIR'] = os.path.join(root, 'market_data')
+    os.environ['INDICATOR_CACHE_DIR'] = os.path.join(root, 'indicators')
+
+from app.market.store import ColumnStore  # noqa: E402
+from app.optimization.adaptive import AdaptiveSearch  # noqa: E402
+from app.optimization.broker import LocalBroker  # noqa: E402
+from app.optimization.grid import (  # noqa: E402
+    Grid,
+    dataset_reference,
+    evaluate,
+    load_reference,
+)
+from app.optimization.worker import ShardWorker  # noqa: E402
+from app.strategy.robustness import shutdown_pool  # noqa: E402
+
+
+def build_dataset(symbol: str, candles: int, seed: int):
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.standard_normal(candles).cumsum()
+    ColumnStore().append(symbol, {
+        'date': np.arange(candles, dtype=np.int64) * 60 + 1_700_000_000,
+        'open': close, 'high': close, 'low': close, 'close': close,
+        'volume': np.ones(candles),
+    })
+
+
+def exhaustive(reference: dict, grid: Grid) -> np.ndarray:
+    """P&L of every grid point, by point index."""
+    close, digest = load_reference(
+        reference['dataset'], reference['timeframe'], reference['rows']
+    )
+    rows = evaluate(close, digest, grid, np.arange(grid.size), grid.size)
+    profits = np.empty(grid.size)
+    for row in rows:
+        profits[row['index']] = row['profit_loss']
+    return profits
+
+
+async def run(args):
+    grid = Grid(
+        [1, 2, 3, 5, 8],
+        np.round(np.linspace(0, 3, args.side), 6).tolist(),
+        np.round(np.linspace(-3, 0, args.side), 6).tolist(),
+    )
+    broker = LocalBroker()
+    stop_worker = await ShardWorker(broker).start()
+    print(f'{grid.size} grid points x {args.candles} candles')
+    print(f'{"run":>4} {"grid best":>10} {"adaptive":>10} {"of best":>8} '
+          f'{"rank":>6} {"evaluations":>12} {"fewer":>7} {"time":>7}')
+    fewer = []
+    for number in range(args.runs):
+        symbol = f'BENCH{number}'
+        build_dataset(symbol, args.candles, number)
+        reference = dataset_reference(symbol, None)
+        profits = exhaustive(reference, grid)
+
+        started = time.perf_counter()
+        state = await AdaptiveSearch(
+            broker, grid, reference, 1, args.budget, args.population,
+            seed=number,
+        ).run()
+        elapsed = time.perf_counter() - started
+        assert state['status'] == 'complete', state['error']
+        found = state['results'][0]['profit_loss']
+        rank = int((profits > found).sum()) + 1
+        fewer.append(grid.size / state['points_done'])
+        print(f'{number:>4} {profits.max():>10.2f} {found:>10.2f} '
+              f'{found / profits.max():>8.0%} {rank:>6} '
+              f'{state["points_done"]:>12} '
+              f'{fewer[-1]:>6.0f}x {elapsed:>6.2f}s')
+    await stop_worker()
+    print(f'median {np.median(fewer):.0f}x fewer evaluations')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--candles', type=int, default=20_000)
+    parser.add_argument('--side', type=int, default=60)
+    parser.add_argument('--runs', type=int, default=8)
+    parser.add_argument('--budget', type=int, default=2_000)
+    parser.add_argument('--population', type=int, default=32)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args))
+    finally:
+        shutdown_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Cold-start budget: time from a fresh interpreter to the first response.
+
+    python -m benchmarks.cold_start --runs 5 --budget 1.0
+
+Each run starts a new Python process that imports ``app.main`` and sends
+``GET /health/live`` straight to the ASGI app (no server, no lifespan). The
+script exits with status 1 when the median time to first response exceeds
+``--budget`` seconds or when importing the app executed numpy or pandas.
+Settings come from the environment, as for the app itself.
+"""
+import argparse
+import statistics
+import sys
+
+from app.cold_start import measure
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=1.0,
+                        help='median seconds to the first response')
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    import_time = statistics.median(run['import'] for run in runs)
+    first_response = statistics.median(run['first_response'] for run in runs)
+    loaded = sorted({name for run in runs for name in run['loaded']})
+    print(f'import app.main: {import_time:.3f}s, '
+          f'first response: {first_response:.3f}s '
+          f'(median of {args.runs}, budget {args.budget:.3f}s)')
+
+    failed = False
+    if loaded:
+        print(f'FAIL: imported eagerly: {", ".join(loaded)}')
+        failed = True
+    if any(run['status'] != 200 for run in runs):
+        print('FAIL: /health/live did not answer 200')
+        failed = True
+    if first_response > args.budget:
+        print('FAIL: over budget')
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
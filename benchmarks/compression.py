@@ -0,0 +1,86 @@
+"""
+Bandwidth and CPU cost of compressing simulation payloads.
+
+    python -m benchmarks.compression --candles 200000
+
+Builds a ``/simulate`` body of OHLCV candles and reports, per encoding and
+level, the compressed size and the time spent compressing it on the client
+and decompressing it through ``CompressionMiddleware``'s streaming decoder
+in 64 KiB receive chunks, the way the server sees it.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.compression import StreamCompressor, StreamDecompressor
+from app.config import settings
+
+RECEIVE_CHUNK = 64 * 1024
+
+
+def build_body(candles: int) -> bytes:
+    rng = np.random.default_rng(0)
+    close = 100 + rng.standard_normal(candles).cumsum()
+    dates = np.arange(1_700_000_000, 1_700_000_000 + candles * 60, 60)
+    rows = [
+        {
+            'date': int(date),
+            'open': round(float(price), 4),
+            'high': round(float(price) + 0.5, 4),
+            'low': round(float(price) - 0.5, 4),
+            'close': round(float(price), 4),
+            'volume': round(float(volume), 2),
+        }
+        for date, price, volume in zip(
+            dates, close, rng.uniform(0, 1000, candles)
+        )
+    ]
+    return json.dumps(rows).encode()
+
+
+def measure(body: bytes, encoding: str) -> tuple[int, float, float]:
+    started = time.perf_counter()
+    compressed = StreamCompressor(encoding).compress(body, final=True)
+    compress_time = time.perf_counter() - started
+
+    decompressor = StreamDecompressor(encoding, len(body))
+    started = time.perf_counter()
+    size = 0
+    for offset in range(0, len(compressed), RECEIVE_CHUNK):
+        size += len(decompressor.decompress(
+            compressed[offset:offset + RECEIVE_CHUNK]
+        ))
+    size += len(decompressor.flush())
+    decompress_time = time.perf_counter() - started
+    assert size == len(body)
+    return len(compressed), compress_time, decompress_time
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--candles', type=int, default=200_000)
+    parser.add_argument('--zstd-levels', type=int, nargs='+',
+                        default=[1, 3, 9, 19])
+    parser.add_argument('--gzip-levels', type=int, nargs='+',
+                        default=[1, 6, 9])
+    args = parser.parse_args()
+
+    body = build_body(args.candles)
+    megabytes = len(body) / 1e6
+    print(f'identity: {megabytes:.1f} MB for {args.candles:,} candles')
+
+    cases = [('zstd', level) for level in args.zstd_levels]
+    cases += [('gzip', level) for level in args.gzip_levels]
+    for encoding, level in cases:
+        setattr(settings, f'COMPRESSION_{encoding.upper()}_LEVEL', level)
+        size, compress_time, decompress_time = measure(body, encoding)
+        print(f'{encoding} level {level:>2}: {size / 1e6:7.2f} MB '
+              f'(ratio {len(body) / size:5.1f}x), '
+              f'compress {megabytes / compress_time:7.1f} MB/s, '
+              f'decompress {megabytes / decompress_time:7.1f} MB/s')
+
+
+if __name__ == '__main__':
+    main()
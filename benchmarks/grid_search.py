@@ -0,0 +1,107 @@
+"""
+Distributed grid search in local mode: coordinator, stand-in broker and a
+shard worker on the process pool, all on this host.
+
+    python -m benchmarks.grid_search --candles 100000 --points 20000
+
+Writes a synthetic dataset to a temporary ``MARKET_DATA_DIR``, runs the
+search through ``GridSearch`` and ``LocalBroker`` exactly as
+``OPTIMIZATION_BROKER=local`` does, checks the top-K against a single
+in-process ``evaluate`` over the whole grid and prints points per second.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+
+# pool processes import this module again and inherit the parent's
+# directories, so only the first one picks them, before the settings load
+if 'GRID_SEARCH_BENCHMARK_DIR' not in os.environ:
+    root = os.environ['GRID_SEARCH_BENCHMARK_DIR'] = tempfile.mkdtemp()
+    os.environ['MARKET_DATA_DIR'] = os.path.join(root, 'market_data')
+    os.environ['INDICATOR_CACHE_DIR'] = os.path.join(root, 'indicators')
+
+from app.config import settings  # noqa: E402
+from app.market.store import ColumnStore  # noqa: E402
+from app.optimization.broker import LocalBroker  # noqa: E402
+from app.optimization.coordinator import GridSearch  # noqa: E402
+from app.optimization.grid import (  # noqa: E402
+    Grid,
+    dataset_reference,
+    evaluate_shard,
+)
+from app.optimization.worker import ShardWorker  # noqa: E402
+from app.strategy.robustness import pool_size, shutdown_pool  # noqa: E402
+
+TOP_K = 10
+
+
+def build_dataset(candles: int):
+    rng = np.random.default_rng(0)
+    close = 100 + rng.standard_normal(candles).cumsum()
+    ColumnStore().append('BENCH', {
+        'date': np.arange(candles, dtype=np.int64) * 60 + 1_700_000_000,
+        'open': close, 'high': close, 'low': close, 'close': close,
+        'volume': np.ones(candles),
+    })
+
+
+def build_grid(points: int) -> Grid:
+    periods = [1, 2, 5, 10]
+    side = max(1, int((points / len(periods)) ** 0.5))
+    return Grid(
+        periods,
+        np.round(np.linspace(0, 2, side), 6).tolist(),
+        np.round(np.linspace(-2, 0, side), 6).tolist(),
+    )
+
+
+async def run(args):
+    build_dataset(args.candles)
+    settings.OPTIMIZATION_SHARD_SIZE = args.shard_size
+    grid = build_grid(args.points)
+    reference = dataset_reference('BENCH', None)
+
+    broker = LocalBroker()
+    stop_worker = await ShardWorker(broker).start()
+    # warm the pool and the indicator cache
+    await GridSearch(broker, Grid(grid.period, grid.buy[:1], grid.sell[:1]),
+                     reference, TOP_K).run()
+
+    started = time.perf_counter()
+    state = await GridSearch(broker, grid, reference, TOP_K).run()
+    elapsed = time.perf_counter() - started
+    await stop_worker()
+
+    started = time.perf_counter()
+    expected = evaluate_shard(reference, grid.to_dict(), 0, grid.size, TOP_K)
+    single = time.perf_counter() - started
+    assert state['status'] == 'complete', state['error']
+    assert [row['index'] for row in state['results']] == [
+        row['index'] for row in expected
+    ]
+
+    print(f'{grid.size} points x {args.candles} candles, '
+          f'{state["shards"]} shards, {pool_size()} processes')
+    print(f'one process:  {single:8.2f}s ({grid.size / single:,.0f} points/s)')
+    print(f'local search: {elapsed:8.2f}s ({grid.size / elapsed:,.0f} points/s, '
+          f'{single / elapsed:.1f}x)')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--candles', type=int, default=100_000)
+    parser.add_argument('--points', type=int, default=20_000)
+    parser.add_argument('--shard-size', type=int, default=500)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args))
+    finally:
+        shutdown_pool()
+
+
+if __name__ == '__main__':
+    main()
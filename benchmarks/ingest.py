@@ -0,0 +1,83 @@
+"""
+Throughput of market-data ingestion without the broker round trip.
+
+    python -m benchmarks.ingest --bars 2000000 --bars-per-message 1000
+
+Encodes bars as message bodies, then times parsing, batching and appending
+them to a temporary column store the way ``app.worker`` does.
+"""
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+
+from app.market.store import ColumnStore
+from app.market.utils import BarBatcher
+
+
+def build_messages(bars: int, per_message: int, symbols: int, columnar: bool):
+    rng = np.random.default_rng(0)
+    messages = []
+    start = 1_700_000_000
+    for offset in range(0, bars, per_message):
+        count = min(per_message, bars - offset)
+        symbol = f'SYM{(offset // per_message) % symbols}'
+        close = 100 + rng.standard_normal(count).cumsum()
+        columns = {
+            'date': list(range(start + offset, start + offset + count)),
+            'open': close.tolist(),
+            'high': (close + 1).tolist(),
+            'low': (close - 1).tolist(),
+            'close': close.tolist(),
+            'volume': rng.uniform(0, 1000, count).tolist(),
+        }
+        if columnar:
+            body = {'symbol': symbol, **columns}
+        else:
+            body = [
+                {'symbol': symbol, **{name: values[i] for name, values in
+                                      columns.items()}}
+                for i in range(count)
+            ]
+        messages.append(json.dumps(body).encode())
+    return messages
+
+
+def run(messages, batch_size: int) -> tuple[int, float]:
+    with tempfile.TemporaryDirectory() as root:
+        store = ColumnStore(root)
+        batcher = BarBatcher()
+        written = 0
+        started = time.perf_counter()
+        for body in messages:
+            batcher.add(body)
+            if batcher.rows >= batch_size:
+                for symbol, columns in batcher.drain().items():
+                    written += store.append(symbol, columns)
+        for symbol, columns in batcher.drain().items():
+            written += store.append(symbol, columns)
+        return written, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--bars', type=int, default=2_000_000)
+    parser.add_argument('--bars-per-message', type=int, default=1_000)
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=50_000)
+    args = parser.parse_args()
+
+    for columnar in (True, False):
+        messages = build_messages(
+            args.bars, args.bars_per_message, args.symbols, columnar
+        )
+        written, elapsed = run(messages, args.batch_size)
+        label = 'columnar' if columnar else 'row'
+        print(f'{label} messages: {written:,} bars in {elapsed:.2f}s, '
+              f'{written / elapsed:,.0f} bars/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Memory budget of ``/simulate`` per pipeline stage, at growing history sizes.
+
+    python -m benchmarks.memory_budget --candles 10000 100000 1000000 5000000
+
+For each size, a synthetic random walk is streamed as a JSON body in 64 KiB
+chunks through ``parse_candles`` and ``_run_simulation``, as the route does
+(without HTTP or the database, on a cold indicator cache), then turned into
+ledger records as the background write does (see ``app.memory_budget``). The
+stages are the ones reported by the profiler (``parse``, ``frame``,
+``indicators``, ``load_strategy``, ``trade_loop``, ``metrics``) plus
+``trade_records``.
+
+Each stage gets the peak Python memory it added (``tracemalloc``, which
+NumPy and pandas allocations report to) and the growth of the process's
+peak RSS (Linux only, on a separate untraced run). The script exits with
+status 1 when a stage, or the whole pipeline, added more traced memory than
+its budget: a multiple of the raw arrays (``candles x 6 columns x 8 bytes``)
+plus ``--slack`` MiB for fixed costs that dominate small histories.
+Tracing is slow: the default sizes take about ten minutes, so only 10k and
+100k candles are checked by the test suite (``tests/test_memory_budget.py``).
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from app.market.indicators import indicator_cache
+from app.memory_budget import (
+    BUDGETS,
+    MIB,
+    SLACK,
+    allowed,
+    measure,
+    raw_size,
+    warm_up,
+)
+
+
+def parse_budget(value: str) -> tuple[str, float]:
+    name, _, ratio = value.partition('=')
+    if name not in BUDGETS:
+        raise argparse.ArgumentTypeError(
+            f'unknown stage {name!r}, one of: {", ".join(BUDGETS)}'
+        )
+    try:
+        return name, float(ratio)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'{value!r} is not stage=ratio')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--candles', type=int, nargs='+',
+                        default=[10_000, 100_000, 1_000_000, 5_000_000])
+    parser.add_argument('--budget', type=parse_budget, action='append',
+                        default=[], metavar='STAGE=RATIO',
+                        help='override a budget, in multiples of the raw arrays')
+    parser.add_argument('--slack', type=float, default=SLACK,
+                        help='MiB allowed on top of every budget')
+    args = parser.parse_args()
+    budgets = {**BUDGETS, **dict(args.budget)}
+    # a cold indicator cache of its own
+    indicator_cache.root = Path(tempfile.mkdtemp())
+
+    warm_up()
+
+    failed = []
+    try:
+        for candles in args.candles:
+            stages, rss, pipeline = measure(candles)
+            raw = raw_size(candles)
+            print(f'\n{candles} candles, raw arrays {raw / MIB:.1f} MiB')
+            print(f'{"stage":>14} {"traced MiB":>11} {"x raw":>6} '
+                  f'{"budget":>7} {"RSS MiB":>8}')
+            for name, used in [*stages.items(), ('pipeline', pipeline)]:
+                over = used > allowed(name, candles, budgets, args.slack)
+                if over:
+                    failed.append(f'{name} at {candles} candles')
+                grown = rss.get(name)
+                print(f'{name:>14} {used / MIB:>11.1f} {used / raw:>6.2f} '
+                      f'{budgets[name]:>7.2f} '
+                      f'{"-" if grown is None else f"{grown / MIB:.1f}":>8}'
+                      f'{"  FAIL" if over else ""}')
+    finally:
+        shutil.rmtree(indicator_cache.root, ignore_errors=True)
+
+    if failed:
+        print(f'\nFAIL: over budget: {", ".join(failed)}')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
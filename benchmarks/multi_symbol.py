@@ -0,0 +1,101 @@
+"""
+Multi-symbol simulation against one ``/simulate`` per symbol.
+
+    python -m benchmarks.multi_symbol --symbols 20 --candles 5000
+
+The sequential path is what N calls to ``/simulate/{dataset}`` run per
+symbol (frame, momentum column, trade loop, summary), without HTTP or the
+database. The packed path runs ``simulate_packed`` once over all symbols,
+then ``simulate_series`` on the process pool. Results are checked to match.
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.config import settings
+from app.strategy.multi_symbol import (
+    PackedSeries,
+    simulate_packed,
+    simulate_series,
+)
+from app.strategy.robustness import shutdown_pool
+from app.strategy.router import _columns_to_frame
+from app.strategy.services import SimulationService
+
+BUY, SELL = 0.5, -0.5
+
+
+def build_frames(symbols: int, candles: int) -> dict[str, dict]:
+    rng = np.random.default_rng(0)
+    dates = np.arange(candles, dtype=np.int64) * 60 + 1_700_000_000
+    frames = {}
+    for number in range(symbols):
+        close = 100 + rng.standard_normal(candles).cumsum()
+        frames[f'SYM{number}'] = {
+            'date': dates, 'open': close, 'high': close, 'low': close,
+            'close': close, 'volume': np.ones(candles),
+        }
+    return frames
+
+
+def sequential(frames: dict[str, dict]) -> list[dict]:
+    st_dict = {
+        'buy_conditions': {'threshold': BUY},
+        'sell_conditions': {'threshold': SELL},
+    }
+    strategy = SimpleNamespace(id=1)
+    results = []
+    for columns in frames.values():
+        df = _columns_to_frame(columns)
+        df['momentum'] = df['close'] - df['close'].shift(1)
+        trades, balance = SimulationService._run_trades(df, 'momentum', st_dict)
+        results.append(SimulationService._summarize(strategy, trades, balance))
+    return results
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--candles', type=int, default=5_000)
+    args = parser.parse_args()
+
+    frames = build_frames(args.symbols, args.candles)
+    expected, sequential_time = timed(sequential, frames)
+    packed, pack_time = timed(PackedSeries.pack, frames)
+    results, packed_time = timed(
+        simulate_packed, packed.closes, packed.offsets, BUY, SELL
+    )
+    assert np.allclose(
+        results[:, 1], [result['profit_loss'] for result in expected]
+    )
+    assert results[:, 0].tolist() == [
+        result['total_trades'] for result in expected
+    ]
+
+    settings.MULTI_SYMBOL_PARALLEL_CANDLES = 0
+    asyncio.run(simulate_series(packed, BUY, SELL))  # start the pool
+    _, pool_time = timed(
+        lambda: asyncio.run(simulate_series(packed, BUY, SELL))
+    )
+    shutdown_pool()
+
+    print(f'{args.symbols} symbols x {args.candles} candles')
+    print(f'sequential /simulate path: {sequential_time:8.3f}s')
+    print(f'packed, one process:       {pack_time + packed_time:8.3f}s '
+          f'({sequential_time / (pack_time + packed_time):.0f}x, '
+          f'pack {pack_time:.3f}s)')
+    print(f'packed, process pool:      {pack_time + pool_time:8.3f}s '
+          f'({sequential_time / (pack_time + pool_time):.0f}x)')
+
+
+if __name__ == '__main__':
+    main()
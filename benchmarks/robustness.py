@@ -0,0 +1,59 @@
+"""
+Throughput of robustness variants against the number of pool processes.
+
+    python -m benchmarks.robustness --candles 100000 --variants 2000
+
+Runs the same seeded block bootstrap on pools of 1, 2, 4, ... processes up
+to the number of cores and prints variants per second and the speedup over
+one process. Each pool is warmed up before it is timed.
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app.strategy.robustness import pool_context, simulate_variants
+
+
+async def measure(diffs: np.ndarray, workers: int, method: str,
+                  variants: int) -> float:
+    with ProcessPoolExecutor(workers, mp_context=pool_context()) as pool:
+        await simulate_variants(diffs, 0.5, -0.5, method, workers, 0, 20, pool)
+        started = time.perf_counter()
+        await simulate_variants(diffs, 0.5, -0.5, method, variants, 0, 20, pool)
+        return time.perf_counter() - started
+
+
+async def run(args):
+    rng = np.random.default_rng(0)
+    diffs = rng.standard_normal(args.candles - 1)
+    counts = [1]
+    while counts[-1] * 2 <= os.cpu_count():
+        counts.append(counts[-1] * 2)
+    if counts[-1] != os.cpu_count():
+        counts.append(os.cpu_count())
+
+    single = None
+    for workers in counts:
+        elapsed = await measure(diffs, workers, args.method, args.variants)
+        single = single or elapsed
+        print(f'{workers:3d} processes: {args.variants / elapsed:8.1f} variants/s, '
+              f'speedup {single / elapsed:4.2f}x '
+              f'({single / elapsed / workers * 100:3.0f}% of linear)')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--candles', type=int, default=100_000)
+    parser.add_argument('--variants', type=int, default=2_000)
+    parser.add_argument('--method', default='block',
+                        choices=('bootstrap', 'block', 'permutation'))
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
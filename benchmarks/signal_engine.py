@@ -0,0 +1,90 @@
+"""
+Throughput of the live signal engine.
+
+    python -m benchmarks.signal_engine --strategies 100000 --ticks 10000
+
+Loads N active strategies (one buy and one sell momentum condition each)
+spread over a set of symbols, then replays random-walk ticks and reports
+ticks per second against a naive scan over every strategy of the symbol.
+"""
+import argparse
+import random
+import time
+
+from app.signal.engine import BUY_CONDITIONS, SELL_CONDITIONS, SignalEngine
+
+
+def build_rows(strategies: int, symbols: int, rng: random.Random):
+    for strategy_id in range(strategies):
+        symbol = f'SYM{strategy_id % symbols}'
+        yield (strategy_id, strategy_id % 1000, symbol, 'momentum',
+               BUY_CONDITIONS, rng.uniform(-5, 5))
+        yield (strategy_id, strategy_id % 1000, symbol, 'momentum',
+               SELL_CONDITIONS, rng.uniform(-5, 5))
+
+
+def build_ticks(ticks: int, symbols: int, volatility: float,
+                rng: random.Random):
+    prices = [100.0] * symbols
+    result = []
+    for _ in range(ticks):
+        symbol = rng.randrange(symbols)
+        prices[symbol] += rng.gauss(0, volatility)
+        result.append((f'SYM{symbol}', prices[symbol]))
+    return result
+
+
+def naive(rows, ticks):
+    by_symbol = {}
+    for strategy_id, _, symbol, _, type_, threshold in rows:
+        by_symbol.setdefault(symbol, []).append((strategy_id, type_, threshold))
+    last, momentum, matched = {}, {}, 0
+    for symbol, price in ticks:
+        previous = momentum.get(symbol)
+        if symbol in last:
+            momentum[symbol] = price - last[symbol]
+        last[symbol] = price
+        current = momentum.get(symbol)
+        if previous is None or current is None:
+            continue
+        for _, type_, threshold in by_symbol.get(symbol, ()):
+            if type_ == BUY_CONDITIONS:
+                matched += previous <= threshold < current
+            else:
+                matched += current < threshold <= previous
+    return matched
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--strategies', type=int, default=100_000)
+    parser.add_argument('--ticks', type=int, default=10_000)
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument('--volatility', type=float, default=0.25)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = list(build_rows(args.strategies, args.symbols, rng))
+    ticks = build_ticks(args.ticks, args.symbols, args.volatility, rng)
+
+    engine = SignalEngine()
+    started = time.perf_counter()
+    engine.load(rows)
+    print(f'load: {len(engine)} strategies in '
+          f'{time.perf_counter() - started:.3f}s')
+
+    started = time.perf_counter()
+    matched = sum(len(engine.on_tick(symbol, price)) for symbol, price in ticks)
+    elapsed = time.perf_counter() - started
+    print(f'indexed: {len(ticks) / elapsed:,.0f} ticks/s, {matched} signals')
+
+    started = time.perf_counter()
+    naive_matched = naive(rows, ticks)
+    elapsed = time.perf_counter() - started
+    print(f'naive scan: {len(ticks) / elapsed:,.0f} ticks/s, '
+          f'{naive_matched} signals')
+
+
+if __name__ == '__main__':
+    main()
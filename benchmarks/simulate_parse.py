@@ -0,0 +1,86 @@
+"""
+Peak memory and time of turning a ``/simulate`` body into columns.
+
+    python -m benchmarks.simulate_parse --candles 1000000
+
+Compares the previous path (one ``HistoricalData`` per row, ``model_dump``
+and a ``DataFrame``) with ``CandleStreamParser`` fed in 64 KiB chunks.
+Peaks are measured with ``tracemalloc``, which slows both paths down.
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from typing import List
+
+import numpy as np
+import pandas as pd
+from pydantic import TypeAdapter
+
+from app.market.parser import CandleStreamParser
+from app.strategy.schemas import HistoricalData
+
+RECEIVE_CHUNK = 64 * 1024
+
+
+def build_body(candles: int) -> bytes:
+    rng = np.random.default_rng(0)
+    close = 100 + rng.standard_normal(candles).cumsum()
+    dates = np.arange(candles, dtype='int64') * 60 + 1_700_000_000
+    return json.dumps([
+        {
+            'date': str(np.datetime64(int(date), 's')),
+            'open': price,
+            'high': price + 0.5,
+            'low': price - 0.5,
+            'close': price,
+            'volume': 100.0,
+        }
+        for date, price in zip(dates, close.tolist())
+    ]).encode()
+
+
+def pydantic_path(body: bytes):
+    data = TypeAdapter(List[HistoricalData]).validate_json(body)
+    df = pd.DataFrame([item.model_dump() for item in data])
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def streaming_path(body: bytes):
+    parser = CandleStreamParser(len(body))
+    for offset in range(0, len(body), RECEIVE_CHUNK):
+        parser.feed(body[offset:offset + RECEIVE_CHUNK])
+    return parser.close()
+
+
+def measure(function, body: bytes) -> tuple[float, float]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = function(body)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--candles', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    body = build_body(args.candles)
+    raw_arrays = args.candles * 6 * 8
+    print(f'body {len(body) / 1e6:.1f} MB, raw arrays {raw_arrays / 1e6:.1f} MB')
+    for name, function in (
+            ('pydantic rows', pydantic_path),
+            ('streaming columns', streaming_path),
+    ):
+        peak, elapsed = measure(function, body)
+        print(f'{name}: peak {peak / 1e6:8.1f} MB '
+              f'({peak / raw_arrays:4.1f}x raw arrays), {elapsed:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
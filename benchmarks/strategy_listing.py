@@ -0,0 +1,126 @@
+"""
+Strategy listing (``GET /strategies/`` on a cache miss): ORM objects and
+response models against Core rows encoded as they stream in.
+
+    python -m benchmarks.strategy_listing --strategies 20000 --conditions 4
+
+Inserts one user's strategies with their conditions into the configured
+database, or ``--url``, inside a transaction that is rolled back, so
+nothing is left behind (the schema must be migrated). The ORM path loads
+``get_user_strategies``, formats each strategy into a ``StrategyResponse``
+and encodes the list as FastAPI does; the Core path encodes the entries of
+``stream_user_strategies``. Prints time, throughput and peak Python memory
+of both and checks they produce the same JSON.
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.auth.models import User
+from app.dependencies import DATABASE_URL
+from app.strategy.models import Condition, Strategy
+from app.strategy.services import StrategyService
+from app.strategy.utils import StrategyFormatter
+
+
+async def build_strategies(session: AsyncSession, strategies: int,
+                           conditions: int) -> int:
+    user = User('listing-benchmark', 'x')
+    session.add(user)
+    await session.flush()
+    result = await session.execute(
+        insert(Strategy).returning(Strategy.id),
+        [
+            {'name': f'strategy {number}', 'asset_type': 'crypto',
+             'timeframe': '1h', 'status': 'active', 'user_id': user.id,
+             'version': 1}
+            for number in range(strategies)
+        ],
+    )
+    await session.execute(insert(Condition), [
+        {'indicator': 'momentum', 'threshold': number / 10,
+         'type': ('buy_conditions', 'sell_conditions')[number % 2],
+         'strategy_id': strategy_id}
+        for strategy_id in result.scalars().all()
+        for number in range(conditions)
+    ])
+    return user.id
+
+
+async def orm_listing(session: AsyncSession, user_id: int) -> str:
+    strategies = await StrategyService(session).get_user_strategies(user_id)
+    response = [
+        StrategyFormatter(strategy).format_strategy_response()
+        for strategy in strategies
+    ]
+    return json.dumps(jsonable_encoder(response))
+
+
+async def core_listing(session: AsyncSession, user_id: int) -> str:
+    entries = {
+        strategy_id: json.dumps(entry)
+        async for strategy_id, entry
+        in StrategyService(session).stream_user_strategies(user_id)
+    }
+    return f'[{",".join(entries.values())}]'
+
+
+async def measure(listing, session: AsyncSession,
+                  user_id: int) -> tuple[str, float, int]:
+    # a fresh identity map, as a new request would have
+    session.expunge_all()
+    started = time.perf_counter()
+    body = await listing(session, user_id)
+    elapsed = time.perf_counter() - started
+    # memory on a run of its own, tracing slows everything down
+    session.expunge_all()
+    tracemalloc.start()
+    await listing(session, user_id)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return body, elapsed, peak
+
+
+async def run(args):
+    engine = create_async_engine(args.url)
+    try:
+        async with AsyncSession(engine) as session:
+            user_id = await build_strategies(
+                session, args.strategies, args.conditions
+            )
+            results = {}
+            for name, listing in (('orm', orm_listing),
+                                  ('core', core_listing)):
+                # warm up the statement caches, then measure
+                await measure(listing, session, user_id)
+                results[name] = await measure(listing, session, user_id)
+            await session.rollback()
+    finally:
+        await engine.dispose()
+
+    assert json.loads(results['orm'][0]) == json.loads(results['core'][0])
+    print(f'{engine.dialect.driver}: {args.strategies} strategies x '
+          f'{args.conditions} conditions')
+    for name, (_, elapsed, peak) in results.items():
+        print(f'{name:>5}: {elapsed:8.3f}s '
+              f'({args.strategies / elapsed:>9,.0f} strategies/s), '
+              f'peak {peak / 2 ** 20:7.1f} MiB')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--strategies', type=int, default=20_000)
+    parser.add_argument('--conditions', type=int, default=4)
+    parser.add_argument('--url', default=DATABASE_URL)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
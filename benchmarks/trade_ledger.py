@@ -0,0 +1,77 @@
+"""
+Time to store the trade ledger of one simulation run.
+
+    python -m benchmarks.trade_ledger --trades 100000
+
+Writes a synthetic run with ``SimulationRunService.write_trades`` (``COPY``
+on asyncpg, batched multi-row inserts elsewhere) into the configured
+database, or ``--url``, inside a transaction that is rolled back, so
+nothing is left behind. The schema must be migrated.
+"""
+import argparse
+import asyncio
+import time
+
+import pandas as pd
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.auth.models import User
+from app.dependencies import DATABASE_URL
+from app.strategy.models import Strategy
+from app.strategy.services import SimulationRunService
+
+
+def build_trades(count: int) -> list[dict]:
+    dates = pd.date_range('2024-01-01', periods=count, freq='min')
+    trades = []
+    for number, date in enumerate(dates):
+        trade = {'action': 'buy', 'date': date, 'price': 100.0 + number % 7}
+        if number % 2:
+            trade.update(action='sell', profit=float(number % 7 - 3))
+        trades.append(trade)
+    return trades
+
+
+async def run(args):
+    engine = create_async_engine(args.url)
+    trades = build_trades(args.trades)
+    try:
+        async with AsyncSession(engine) as session:
+            user = User('ledger-benchmark', 'x')
+            session.add(user)
+            await session.flush()
+            strategy = Strategy(
+                name='ledger', asset_type='x', status='active',
+                user_id=user.id, version=1,
+            )
+            session.add(strategy)
+            await session.flush()
+            run_service = SimulationRunService(session)
+            simulation_run = await run_service.add_run(
+                strategy,
+                {'total_trades': len(trades), 'profit_loss': 0.0,
+                 'win_rate': 0.0, 'max_drawdown': 0.0},
+                'benchmark', None, len(trades),
+            )
+
+            started = time.perf_counter()
+            await run_service.write_trades(simulation_run.id, trades)
+            elapsed = time.perf_counter() - started
+            await session.rollback()
+    finally:
+        await engine.dispose()
+
+    print(f'{engine.dialect.driver}: {len(trades)} trades in {elapsed:.3f}s '
+          f'({len(trades) / elapsed:,.0f} rows/s)')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--trades', type=int, default=100_000)
+    parser.add_argument('--url', default=DATABASE_URL)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Walk-forward analysis against re-simulating every window from scratch.
+
+    python -m benchmarks.walk_forward --candles 200000 --train 20000 --test 5000
+
+The sequential path is what one upload per window would do: copy the
+window, compute its momentum columns and evaluate the grid on the train
+part, then the best point on the test part. The pooled path is
+``walk_forward``: momentum computed once over the whole series, windows
+sliced as views in the process pool. Momentum near the start of a window
+differs (undefined for a fresh window), so only the timings are compared.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+
+# pool processes import this module again and inherit the parent's
+# directories, so only the first one picks them, before the settings load
+if 'WALK_FORWARD_BENCHMARK_DIR' not in os.environ:
+    root = os.environ['WALK_FORWARD_BENCHMARK_DIR'] = tempfile.mkdtemp()
+    os.environ['INDICATOR_CACHE_DIR'] = os.path.join(root, 'indicators')
+
+from app.market.indicators import content_digest, momentum  # noqa: E402
+from app.optimization.grid import Grid, evaluate  # noqa: E402
+from app.optimization.walk_forward import walk_forward, windows  # noqa: E402
+from app.strategy.robustness import pool_size, shutdown_pool  # noqa: E402
+
+
+def sequential(close: np.ndarray, grid: Grid,
+               bounds: list[tuple[int, int, int]]) -> list[dict]:
+    rows = []
+    for start, split, stop in bounds:
+        train, test = close[start:split].copy(), close[split:stop].copy()
+        best = evaluate(train, None, grid, np.arange(grid.size), 1, {
+            period: momentum(train, period)[1:] for period in grid.period
+        })[0]
+        rows.append(evaluate(
+            test, None, grid, np.array([best['index']]), 1,
+            {best['period']: momentum(test, best['period'])[1:]},
+        )[0])
+    return rows
+
+
+async def pooled(close: np.ndarray, grid: Grid, args) -> list[dict]:
+    return await walk_forward(
+        close, content_digest(close), grid, args.train, args.test, args.step,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--candles', type=int, default=200_000)
+    parser.add_argument('--train', type=int, default=20_000)
+    parser.add_argument('--test', type=int, default=5_000)
+    parser.add_argument('--step', type=int, default=5_000)
+    parser.add_argument('--side', type=int, default=10)
+    args = parser.parse_args()
+
+    close = 100 + np.random.default_rng(0).standard_normal(args.candles).cumsum()
+    grid = Grid(
+        [1, 2, 3, 5, 8],
+        np.round(np.linspace(0, 2, args.side), 6).tolist(),
+        np.round(np.linspace(-2, 0, args.side), 6).tolist(),
+    )
+    bounds = windows(args.candles, args.train, args.test, args.step)
+    print(f'{len(bounds)} windows x {grid.size} grid points, '
+          f'{pool_size()} pool processes')
+
+    try:
+        # first use starts the pool
+        asyncio.run(pooled(close[:args.train + args.test], grid, args))
+        for name, run in (
+                ('sequential', lambda: sequential(close, grid, bounds)),
+                ('pooled', lambda: asyncio.run(pooled(close, grid, args))),
+        ):
+            started = time.perf_counter()
+            rows = run()
+            elapsed = time.perf_counter() - started
+            print(f'{name:>10}: {elapsed:7.2f}s '
+                  f'({len(rows) / elapsed:6.1f} windows/s), out-of-sample '
+                  f'P&L {sum(row["profit_loss"] for row in rows):.2f}')
+    finally:
+        shutdown_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+import multiprocessing
+import os
+
+from app.config import settings
+from app.lazy import NUMERIC_MODULES, load
+
+# gunicorn app.main:app -c gunicorn.conf.py
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'uvicorn.workers.UvicornWorker'
+# Import the app once in the master and fork the workers from it. Database,
+# Redis and RabbitMQ connections are opened per worker in the lifespan, which
+# also warms the pools before the worker serves its first request.
+preload_app = True
+timeout = int(os.getenv('WORKER_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+
+def on_starting(server):
+    # Workers forked from the master inherit the numerical stack already
+    # loaded, so restarted workers do not pay for it again.
+    if settings.PRELOAD_NUMERIC:
+        load(*NUMERIC_MODULES)
@@ -0,0 +1,28 @@
+"""add strategy timeframe
+
+Revision ID: b3f1c2d4e5a6
+Revises: 423a56ae4b43
+Create Date: 2026-10-19 10:12:04.118230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f1c2d4e5a6'
+down_revision: Union[str, None] = '423a56ae4b43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('strategy', sa.Column('timeframe', sa.String(length=10), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('strategy', 'timeframe')
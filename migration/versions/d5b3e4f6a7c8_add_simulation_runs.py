@@ -0,0 +1,58 @@
+"""add simulation runs
+
+Revision ID: d5b3e4f6a7c8
+Revises: c4a2d3e5f6b7
+Create Date: 2026-10-19 16:27:45.913402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5b3e4f6a7c8'
+down_revision: Union[str, None] = 'c4a2d3e5f6b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('simulation_run',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('strategy_id', sa.Integer(), nullable=False),
+    sa.Column('strategy_version', sa.Integer(), nullable=False),
+    sa.Column('source', sa.String(length=50), nullable=False),
+    sa.Column('timeframe', sa.String(length=10), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('status', sa.Enum('writing', 'complete', 'failed', name='run_status_enum'), nullable=False),
+    sa.Column('candles', sa.Integer(), nullable=False),
+    sa.Column('total_trades', sa.Integer(), nullable=False),
+    sa.Column('profit_loss', sa.Float(), nullable=False),
+    sa.Column('win_rate', sa.Float(), nullable=False),
+    sa.Column('max_drawdown', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['strategy_id'], ['strategy.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_simulation_run_strategy_id_id', 'simulation_run', ['strategy_id', 'id'], unique=False)
+    op.create_table('simulation_trade',
+    sa.Column('run_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('action', sa.Enum('buy', 'sell', name='trade_action_enum'), nullable=False),
+    sa.Column('date', sa.DateTime(), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('profit', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['run_id'], ['simulation_run.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('run_id', 'seq')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('simulation_trade')
+    op.drop_index('ix_simulation_run_strategy_id_id', table_name='simulation_run')
+    op.drop_table('simulation_run')
+    sa.Enum(name='trade_action_enum').drop(op.get_bind())
+    sa.Enum(name='run_status_enum').drop(op.get_bind())
@@ -0,0 +1,91 @@
+"""add strategy archive
+
+Revision ID: e6c4f5a7b8d9
+Revises: d5b3e4f6a7c8
+Create Date: 2026-10-19 18:42:10.528736
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6c4f5a7b8d9'
+down_revision: Union[str, None] = 'd5b3e4f6a7c8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('strategy', sa.Column('closed_at', sa.DateTime(), nullable=True))
+    # already closed strategies start their archival delay now
+    op.execute("UPDATE strategy SET closed_at = now() WHERE status = 'closed'")
+    op.create_index('ix_strategy_closed_at', 'strategy', ['closed_at'], unique=False, postgresql_where=sa.text("status = 'closed'"))
+    op.create_table('strategy_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.String(length=250), nullable=True),
+    sa.Column('asset_type', sa.String(length=50), nullable=False),
+    sa.Column('timeframe', sa.String(length=10), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('closed_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_strategy_archive_user_id'), 'strategy_archive', ['user_id'], unique=False)
+    op.create_table('condition_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('indicator', sa.String(length=100), nullable=False),
+    sa.Column('threshold', sa.Float(), nullable=False),
+    sa.Column('type', postgresql.ENUM('buy_conditions', 'sell_conditions', name='action_type_enum', create_type=False), nullable=False),
+    sa.Column('strategy_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['strategy_id'], ['strategy_archive.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_condition_archive_strategy_id'), 'condition_archive', ['strategy_id'], unique=False)
+    op.create_table('simulation_run_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('strategy_id', sa.Integer(), nullable=False),
+    sa.Column('strategy_version', sa.Integer(), nullable=False),
+    sa.Column('source', sa.String(length=50), nullable=False),
+    sa.Column('timeframe', sa.String(length=10), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('status', postgresql.ENUM('writing', 'complete', 'failed', name='run_status_enum', create_type=False), nullable=False),
+    sa.Column('candles', sa.Integer(), nullable=False),
+    sa.Column('total_trades', sa.Integer(), nullable=False),
+    sa.Column('profit_loss', sa.Float(), nullable=False),
+    sa.Column('win_rate', sa.Float(), nullable=False),
+    sa.Column('max_drawdown', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['strategy_id'], ['strategy_archive.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_simulation_run_archive_strategy_id_id', 'simulation_run_archive', ['strategy_id', 'id'], unique=False)
+    op.create_table('simulation_trade_archive',
+    sa.Column('run_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('action', postgresql.ENUM('buy', 'sell', name='trade_action_enum', create_type=False), nullable=False),
+    sa.Column('date', sa.DateTime(), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('profit', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['run_id'], ['simulation_run_archive.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('run_id', 'seq')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('simulation_trade_archive')
+    op.drop_index('ix_simulation_run_archive_strategy_id_id', table_name='simulation_run_archive')
+    op.drop_table('simulation_run_archive')
+    op.drop_index(op.f('ix_condition_archive_strategy_id'), table_name='condition_archive')
+    op.drop_table('condition_archive')
+    op.drop_index(op.f('ix_strategy_archive_user_id'), table_name='strategy_archive')
+    op.drop_table('strategy_archive')
+    op.drop_index('ix_strategy_closed_at', table_name='strategy', postgresql_where=sa.text("status = 'closed'"))
+    op.drop_column('strategy', 'closed_at')
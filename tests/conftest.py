@@ -0,0 +1,19 @@
+import os
+
+# the settings the app requires at import, for a run without a .env; the
+# tests never reach the database or the secret they point to
+for name, value in {
+    'DB_USER': 'test',
+    'DB_PASSWORD': 'test',
+    'DB_HOST': 'localhost',
+    'DB_NAME': 'test',
+    'DB_PORT': '5432',
+    'SECRET_KEY': 'test',
+    'ALGORITHM': 'HS256',
+    'ACCESS_TOKEN_EXPIRE_MINUTES': '15',
+    'REFRESH_TOKEN_EXPIRE_MINUTES': '60',
+    'DEBUG': '0',
+}.items():
+    os.environ.setdefault(name, value)
+# off by default in production, counted in every test run
+os.environ.setdefault('SQL_INSTRUMENTATION', '1')
@@ -0,0 +1,107 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.optimization import worker
+from app.optimization.adaptive import AdaptiveSearch
+from app.optimization.broker import OPTIMIZATION_QUEUE_NAME, LocalBroker
+from app.optimization.grid import Grid
+from app.optimization.worker import ShardWorker
+
+REFERENCE = {'dataset': 'TEST', 'timeframe': None, 'rows': 0}
+GRID = Grid([1], list(range(30)), list(range(30)))
+
+evaluated = []
+
+
+def shard_of(profit):
+    def evaluate_shard(reference, grid, start, stop, top_k, points=None):
+        indices = range(start, stop) if points is None else points
+        evaluated.extend(indices)
+        shape = Grid.from_dict(grid).shape
+        return [
+            {'index': index,
+             'profit_loss': profit(*np.unravel_index(index, shape))}
+            for index in indices
+        ]
+
+    return evaluate_shard
+
+
+async def search(grid: Grid = GRID, **kwargs) -> AdaptiveSearch:
+    broker = LocalBroker()
+    with ThreadPoolExecutor(2) as pool:
+        shard_worker = ShardWorker(broker, pool)
+        await broker.declare(OPTIMIZATION_QUEUE_NAME)
+        cancel = await broker.consume(
+            OPTIMIZATION_QUEUE_NAME, shard_worker.on_shard, prefetch=2
+        )
+        try:
+            adaptive = AdaptiveSearch(
+                broker, grid, REFERENCE, top_k=3, seed=46, **kwargs
+            )
+            await adaptive.run()
+            return adaptive
+        finally:
+            await cancel()
+
+
+@pytest.fixture(autouse=True)
+def no_patience_limits(monkeypatch):
+    evaluated.clear()
+    monkeypatch.setattr(settings, 'OPTIMIZATION_ADAPTIVE_PATIENCE', 1_000)
+    monkeypatch.setattr(settings, 'OPTIMIZATION_ADAPTIVE_RESTARTS', 1_000)
+
+
+def test_search_stops_at_its_budget(monkeypatch):
+    monkeypatch.setattr(worker, 'evaluate_shard', shard_of(lambda *_: 0.0))
+
+    adaptive = asyncio.run(search(budget=57, population=10))
+
+    state = adaptive.state()
+    assert state['status'] == 'complete'
+    assert state['points_done'] == 57
+    # no point is evaluated twice
+    assert len(set(evaluated)) == len(evaluated) == 57
+
+
+def test_budget_is_capped_by_the_grid(monkeypatch):
+    monkeypatch.setattr(worker, 'evaluate_shard', shard_of(lambda *_: 0.0))
+    grid = Grid([1], [0, 1], [0, 1, 2])
+
+    adaptive = asyncio.run(search(grid, budget=1_000, population=4))
+
+    assert adaptive.state()['points_done'] == grid.size
+
+
+def test_stalled_search_stops_after_its_restarts(monkeypatch):
+    monkeypatch.setattr(worker, 'evaluate_shard', shard_of(lambda *_: 0.0))
+    monkeypatch.setattr(settings, 'OPTIMIZATION_ADAPTIVE_PATIENCE', 2)
+    monkeypatch.setattr(settings, 'OPTIMIZATION_ADAPTIVE_RESTARTS', 1)
+
+    adaptive = asyncio.run(search(budget=900, population=5))
+
+    state = adaptive.state()
+    assert state['status'] == 'complete'
+    # one generation to set the best, two without improving it, twice
+    assert state['generations'] == 5
+    assert state['points_done'] < 900
+
+
+def test_search_converges_on_the_optimum(monkeypatch):
+    monkeypatch.setattr(worker, 'evaluate_shard', shard_of(
+        lambda period, buy, sell: -float(abs(buy - 20) + abs(sell - 7))
+    ))
+
+    adaptive = asyncio.run(search(
+        budget=300, population=20, start=(0.0, 29.0)
+    ))
+
+    best = adaptive.state()['results'][0]
+    assert np.unravel_index(best['index'], GRID.shape) == (0, 20, 7)
+    assert best['profit_loss'] == 0
+    # the strategy's own thresholds are in the first generation
+    assert np.ravel_multi_index((0, 0, 29), GRID.shape) in evaluated
@@ -0,0 +1,147 @@
+import asyncio
+
+import fakeredis
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app import dependencies
+from app.admission import (
+    GLOBAL_LIMITED,
+    USER_LIMITED,
+    AdmissionMiddleware,
+    TokenBucketAdmission,
+    charge,
+    detach,
+)
+from app.config import settings
+
+released = []
+
+app = FastAPI()
+app.add_middleware(AdmissionMiddleware)
+
+
+@app.post('/strategies/{strategy_id}/simulate')
+async def simulate(request: Request):
+    return len(await request.body())
+
+
+@app.post('/strategies/{strategy_id}/simulate/{dataset}')
+async def simulate_dataset(request: Request, candles: int):
+    await charge(request, candles)
+    return candles
+
+
+@app.post('/strategies/{strategy_id}/optimize/{dataset}')
+async def optimize(request: Request):
+    released.append(detach(request))
+    return None
+
+
+@pytest.fixture(autouse=True)
+def budgets(monkeypatch):
+    monkeypatch.setattr(settings, 'ADMISSION_BYTES_PER_CANDLE', 1)
+    monkeypatch.setattr(settings, 'ADMISSION_USER_CAPACITY', 1_000)
+    monkeypatch.setattr(settings, 'ADMISSION_GLOBAL_CAPACITY', 1_500)
+    # slow enough that nothing refills during a test
+    monkeypatch.setattr(settings, 'ADMISSION_REFILL_SECONDS', 100_000)
+    released.clear()
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(dependencies, 'redis_client', redis)
+    return redis
+
+
+@pytest.fixture
+def client(redis):
+    with TestClient(app) as client:
+        yield client
+
+
+def tokens(client: TestClient, redis, key: str) -> float:
+    value = client.portal.call(redis.hget, key, 'tokens')
+    return None if value is None else float(value)
+
+
+def test_acquire_and_release(redis):
+    async def run():
+        admission = TokenBucketAdmission(redis)
+        assert await admission.acquire('alice', 600) == (0, 0.0)
+        status, retry_after = await admission.acquire('alice', 600)
+        assert status == USER_LIMITED and retry_after > 0
+        # bob has a bucket of his own, but not enough of the global one
+        status, _ = await admission.acquire('bob', 1_000)
+        assert status == GLOBAL_LIMITED
+        await admission.release('alice', 600)
+        assert await admission.acquire('alice', 600) == (0, 0.0)
+
+    asyncio.run(run())
+
+
+def test_upload_cost_is_released_after_the_response(client, redis):
+    response = client.post('/strategies/1/simulate', content=b'x' * 400)
+
+    assert response.status_code == 200
+    assert tokens(client, redis, 'admission_user_anonymous') == 1_000
+
+
+def test_upload_over_user_capacity_is_too_large(client):
+    response = client.post('/strategies/1/simulate', content=b'x' * 1_001)
+
+    assert response.status_code == 413
+
+
+def test_exhausted_budgets_are_rejected_before_the_route(client, redis):
+    admission = TokenBucketAdmission(redis)
+    client.portal.call(admission.acquire, 'anonymous', 900)
+
+    response = client.post('/strategies/1/simulate', content=b'x' * 200)
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+
+    client.portal.call(admission.release, 'anonymous', 900)
+    client.portal.call(admission.acquire, 'carol', 1_000)
+    client.portal.call(admission.acquire, 'dave', 450)
+    response = client.post('/strategies/1/simulate', content=b'x' * 100)
+    assert response.status_code == 503
+
+
+def test_dataset_candles_are_charged_by_the_route(client, redis):
+    admission = TokenBucketAdmission(redis)
+    client.portal.call(admission.acquire, 'anonymous', 500)
+
+    assert client.post(
+        '/strategies/1/simulate/BTC', params={'candles': 400}
+    ).status_code == 200
+    assert client.post(
+        '/strategies/1/simulate/BTC', params={'candles': 600}
+    ).status_code == 429
+    assert client.post(
+        '/strategies/1/simulate/BTC', params={'candles': 2_000}
+    ).status_code == 413
+    # the charges were released with their responses
+    assert tokens(client, redis, 'admission_user_anonymous') == pytest.approx(
+        500, abs=1
+    )
+
+
+def test_detached_ticket_is_released_by_its_holder(client, redis):
+    response = client.post('/strategies/1/optimize/BTC', content=b'x' * 300)
+
+    assert response.status_code == 200
+    assert tokens(client, redis, 'admission_user_anonymous') == pytest.approx(
+        700, abs=1
+    )
+    client.portal.call(released[0])
+    assert tokens(client, redis, 'admission_user_anonymous') == 1_000
+
+
+def test_other_paths_are_not_charged(client, redis):
+    response = client.post('/strategies/1/backtest', content=b'x' * 5)
+
+    assert response.status_code == 404
+    assert tokens(client, redis, 'admission_user_anonymous') is None
@@ -0,0 +1,49 @@
+import asyncio
+
+import fakeredis
+
+from app.cache import InvalidationBus, publish_invalidation
+
+
+async def started(bus: InvalidationBus):
+    bus.start()
+    while not bus._ready:
+        await asyncio.sleep(0.01)
+
+
+def test_published_write_evicts_the_local_copy():
+    async def run():
+        redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        bus = InvalidationBus(redis, maxsize=16)
+        await started(bus)
+        try:
+            await redis.set('strategy_1', 'old')
+            assert await bus.get('strategy_1') == 'old'
+
+            async with redis.pipeline() as pipeline:
+                pipeline.set('strategy_1', 'new')
+                publish_invalidation(pipeline, ['strategy_1'])
+                await pipeline.execute()
+            for _ in range(100):
+                if await bus.get('strategy_1') == 'new':
+                    break
+                await asyncio.sleep(0.01)
+            return await bus.get('strategy_1')
+        finally:
+            await bus.stop()
+
+    assert asyncio.run(run()) == 'new'
+
+
+def test_stop_waits_for_the_listener_to_close():
+    async def run():
+        bus = InvalidationBus(fakeredis.FakeAsyncRedis(decode_responses=True), 16)
+        await started(bus)
+        await bus.stop()
+        return bus
+
+    bus = asyncio.run(run())
+
+    assert bus._task is None
+    # the listener's cleanup ran before stop returned
+    assert not bus._ready
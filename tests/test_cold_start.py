@@ -0,0 +1,9 @@
+from app.cold_start import measure
+
+
+def test_app_imports_without_numpy_or_pandas():
+    # wall-clock time depends on the machine: only the benchmark checks it
+    run = measure()
+
+    assert run['status'] == 200
+    assert run['loaded'] == []
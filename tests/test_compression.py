@@ -0,0 +1,126 @@
+import gzip
+
+import pytest
+import zstandard
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.compression import CompressionMiddleware
+from app.config import settings
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware)
+
+COMPRESS = {
+    'gzip': gzip.compress,
+    'zstd': zstandard.ZstdCompressor().compress,
+}
+
+
+@app.post('/echo')
+async def echo(request: Request):
+    return PlainTextResponse(await request.body())
+
+
+@app.get('/text')
+async def text(size: int):
+    return PlainTextResponse('x' * size)
+
+
+@app.get('/events')
+async def events():
+    async def stream():
+        for number in range(3):
+            yield f'data: {number}\n\n' * 500
+
+    return StreamingResponse(stream(), media_type='text/event-stream')
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize('encoding', COMPRESS)
+def test_request_body_is_decompressed(client, encoding):
+    body = b'{"close": 1.5}' * 1_000
+
+    response = client.post(
+        '/echo', content=COMPRESS[encoding](body),
+        headers={'Content-Encoding': encoding, 'Accept-Encoding': 'identity'},
+    )
+
+    assert response.status_code == 200
+    assert response.content == body
+
+
+@pytest.mark.parametrize('encoding', COMPRESS)
+def test_corrupt_request_body_is_rejected(client, encoding):
+    compressed = bytearray(COMPRESS[encoding](b'candles' * 1_000))
+    compressed[len(compressed) // 2:] = b'\xff' * (len(compressed) // 2 + 1)
+
+    response = client.post(
+        '/echo', content=bytes(compressed),
+        headers={'Content-Encoding': encoding},
+    )
+
+    assert response.status_code == 400
+    assert response.json()['detail'] == (
+        f'Request body is not valid {encoding} data.'
+    )
+
+
+@pytest.mark.parametrize('encoding', COMPRESS)
+def test_truncated_request_body_is_rejected(client, encoding):
+    compressed = COMPRESS[encoding](bytes(range(256)) * 100)
+
+    response = client.post(
+        '/echo', content=compressed[:-8],
+        headers={'Content-Encoding': encoding},
+    )
+
+    assert response.status_code == 400
+
+
+def test_unsupported_encoding_is_rejected(client):
+    response = client.post(
+        '/echo', content=b'data', headers={'Content-Encoding': 'br'}
+    )
+
+    assert response.status_code == 415
+
+
+def test_decompressed_size_is_bounded(client, monkeypatch):
+    monkeypatch.setattr(settings, 'COMPRESSION_MAX_REQUEST_SIZE', 10_000)
+
+    response = client.post(
+        '/echo', content=gzip.compress(b'0' * 10_001),
+        headers={'Content-Encoding': 'gzip'},
+    )
+
+    assert response.status_code == 413
+
+
+def test_only_responses_over_the_threshold_are_compressed(client):
+    size = settings.COMPRESSION_MIN_SIZE
+    headers = {'Accept-Encoding': 'zstd;q=0, gzip'}
+
+    small = client.get('/text', params={'size': size - 1}, headers=headers)
+    assert 'Content-Encoding' not in small.headers
+    assert small.text == 'x' * (size - 1)
+
+    large = client.get('/text', params={'size': size}, headers=headers)
+    assert large.headers['Content-Encoding'] == 'gzip'
+    assert large.headers['Vary'] == 'Accept-Encoding'
+    assert int(large.headers['Content-Length']) < size
+    assert large.text == 'x' * size
+
+
+def test_event_streams_are_not_compressed(client):
+    with client.stream(
+            'GET', '/events', headers={'Accept-Encoding': 'gzip'}
+    ) as response:
+        assert 'Content-Encoding' not in response.headers
+        assert response.read().startswith(b'data: 0\n\n')
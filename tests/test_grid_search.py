@@ -0,0 +1,90 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.config import settings
+from app.optimization import coordinator, worker
+from app.optimization.broker import OPTIMIZATION_QUEUE_NAME, LocalBroker
+from app.optimization.coordinator import GridSearch
+from app.optimization.grid import Grid
+from app.optimization.worker import ShardWorker
+
+REFERENCE = {'dataset': 'TEST', 'timeframe': None, 'rows': 0}
+
+
+def slow_shard(seconds: float):
+    def evaluate_shard(reference, grid, start, stop, top_k, points=None):
+        time.sleep(seconds)
+        return [{'index': start, 'profit_loss': float(start)}]
+
+    return evaluate_shard
+
+
+async def search(grid: Grid) -> dict:
+    broker = LocalBroker()
+    with ThreadPoolExecutor(1) as pool:
+        shard_worker = ShardWorker(broker, pool)
+        await broker.declare(OPTIMIZATION_QUEUE_NAME)
+        # one shard at a time, the others wait in the queue
+        cancel = await broker.consume(
+            OPTIMIZATION_QUEUE_NAME, shard_worker.on_shard, prefetch=1
+        )
+        try:
+            return await GridSearch(broker, grid, REFERENCE, top_k=3).run()
+        finally:
+            await cancel()
+
+
+@pytest.fixture(autouse=True)
+def quick_checks(monkeypatch):
+    monkeypatch.setattr(coordinator, 'CHECK_INTERVAL', 0.05)
+    monkeypatch.setattr(settings, 'OPTIMIZATION_SHARD_SIZE', 1)
+
+
+def test_queued_shards_do_not_time_out(monkeypatch):
+    # ten shards of 0.2 s each behind one worker take twice the timeout
+    monkeypatch.setattr(worker, 'evaluate_shard', slow_shard(0.2))
+    monkeypatch.setattr(settings, 'OPTIMIZATION_SHARD_TIMEOUT', 1.0)
+
+    state = asyncio.run(search(Grid([1], list(range(10)), [0])))
+
+    assert state['status'] == 'complete'
+    assert state['retries'] == 0
+    assert [row['index'] for row in state['results']] == [9, 8, 7]
+
+
+def test_started_shard_is_retried_after_the_timeout(monkeypatch):
+    monkeypatch.setattr(worker, 'evaluate_shard', slow_shard(0.5))
+    monkeypatch.setattr(settings, 'OPTIMIZATION_SHARD_TIMEOUT', 0.1)
+
+    state = asyncio.run(search(Grid([1], [0], [0])))
+
+    # published again, then the late result of the first attempt is taken
+    assert state['status'] == 'complete'
+    assert state['retries'] == 1
+
+
+def test_consumer_cancel_returns_while_a_callback_runs():
+    async def run():
+        broker = LocalBroker()
+        name = await broker.declare()
+        handled = []
+
+        async def callback(message):
+            # e.g. a Redis client swallowing the cancellation mid-command
+            try:
+                await asyncio.sleep(0.1)
+            except asyncio.CancelledError:
+                pass
+            handled.append(message.body)
+
+        cancel = await broker.consume(name, callback)
+        await broker.publish(name, b'result')
+        await asyncio.sleep(0)
+        await asyncio.wait_for(cancel(), 1)
+        await asyncio.sleep(0.2)
+        return handled
+
+    assert asyncio.run(run()) == [b'result']
@@ -0,0 +1,120 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import dependencies
+from app.auth.models import User
+from app.config import settings
+from app.dependencies import get_session
+from app.instrumentation import (
+    QueryBudget,
+    QueryBudgetExceeded,
+    QueryStatsMiddleware,
+)
+from app.models import Base
+from app.strategy.models import Condition, Strategy
+
+STRATEGIES = 6
+
+
+async def create_database(url: str):
+    engine = create_async_engine(url)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as session:
+        user = User('bob', 'password')
+        session.add(user)
+        await session.flush()
+        for number in range(STRATEGIES):
+            strategy = Strategy(
+                name=f'strategy {number}', asset_type='crypto',
+                user_id=user.id,
+            )
+            strategy.conditions = [
+                Condition(indicator='momentum', threshold=1,
+                          type='buy_conditions'),
+                Condition(indicator='momentum', threshold=-1,
+                          type='sell_conditions'),
+            ]
+            session.add(strategy)
+        await session.commit()
+    await engine.dispose()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    dependencies.init_database()
+    yield
+    await dependencies.close_database()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(QueryStatsMiddleware)
+
+
+@app.get('/joined', dependencies=[Depends(QueryBudget(1))])
+async def joined(session: AsyncSession = Depends(get_session)):
+    strategies = await session.scalars(
+        select(Strategy.id).join(Condition).distinct()
+    )
+    return len(strategies.all())
+
+
+@app.get('/one-by-one', dependencies=[Depends(QueryBudget(1))])
+async def one_by_one(session: AsyncSession = Depends(get_session)):
+    ids = (await session.scalars(select(Strategy.id))).all()
+    for strategy_id in ids:
+        await session.scalars(
+            select(Condition).where(Condition.strategy_id == strategy_id)
+        )
+    return len(ids)
+
+
+@app.get('/lazy', dependencies=[Depends(QueryBudget(2))])
+async def lazy(session: AsyncSession = Depends(get_session)):
+    condition = await session.scalar(select(Condition).limit(1))
+    strategy = await session.run_sync(lambda _: condition.strategy)
+    return strategy.name
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    url = f'sqlite+aiosqlite:///{tmp_path / "test.db"}'
+    asyncio.run(create_database(url))
+    monkeypatch.setattr(dependencies, 'DATABASE_URL', url)
+    monkeypatch.setattr(settings, 'SQL_INSTRUMENTATION', True)
+    monkeypatch.setattr(settings, 'SQL_STRICT', True)
+    with TestClient(app) as client:
+        yield client
+
+
+def test_route_within_budget(client):
+    response = client.get('/joined')
+
+    assert response.status_code == 200
+    assert response.json() == STRATEGIES
+    assert 'desc="1 queries"' in response.headers['Server-Timing']
+
+
+def test_budget_overrun_fails_under_strict(client):
+    with pytest.raises(QueryBudgetExceeded, match='7 queries against a budget'):
+        client.get('/one-by-one')
+
+
+def test_lazy_load_fails_under_strict(client):
+    with pytest.raises(QueryBudgetExceeded, match=r'Lazy loads: .*Condition'):
+        client.get('/lazy')
+
+
+def test_overrun_is_only_logged_without_strict(client, monkeypatch, caplog):
+    monkeypatch.setattr(settings, 'SQL_STRICT', False)
+
+    response = client.get('/one-by-one')
+
+    assert response.status_code == 200
+    assert 'Query budget of 1 exceeded with 7 queries' in caplog.text
@@ -0,0 +1,29 @@
+import pytest
+
+from app.market.indicators import indicator_cache
+from app.memory_budget import allowed, measure, warm_up
+
+# the larger sizes are the benchmark's: ``python -m benchmarks.memory_budget``
+CANDLES = [10_000, 100_000]
+
+
+@pytest.fixture(scope='module', autouse=True)
+def warm_pipeline(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(
+            indicator_cache, 'root', tmp_path_factory.mktemp('indicators')
+        )
+        warm_up()
+        yield
+
+
+@pytest.mark.parametrize('candles', CANDLES)
+def test_pipeline_within_memory_budget(candles):
+    stages, _, pipeline = measure(candles)
+
+    over = {
+        name: used
+        for name, used in [*stages.items(), ('pipeline', pipeline)]
+        if used > allowed(name, candles)
+    }
+    assert over == {}
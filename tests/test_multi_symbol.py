@@ -0,0 +1,89 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.market.indicators import indicator_cache
+from app.strategy.multi_symbol import (
+    MAX_DRAWDOWN,
+    PROFIT_LOSS,
+    TOTAL_TRADES,
+    WINS,
+    PackedSeries,
+    simulate_packed,
+)
+from app.strategy.router import _run_simulation
+from app.strategy.services import SimulationService
+
+# buy under sell included: trades then follow the one-at-a-time loop
+THRESHOLDS = [(0.5, -0.5), (0.0, 0.0), (-0.3, 0.3), (-1.0, 1.0)]
+
+
+def strategy(buy: float, sell: float) -> SimpleNamespace:
+    return SimpleNamespace(id=1, timeframe=None, to_dict=lambda: {
+        'buy_conditions': [{'indicator': 'momentum', 'threshold': buy}],
+        'sell_conditions': [{'indicator': 'momentum', 'threshold': sell}],
+    })
+
+
+def frames() -> dict[str, dict[str, np.ndarray]]:
+    rng = np.random.default_rng(40)
+    frames = {}
+    for symbol, candles in [('A', 400), ('B', 1), ('C', 2), ('D', 250)]:
+        close = 100 + rng.standard_normal(candles).cumsum()
+        frames[symbol] = {
+            'date': 1_700_000_000 + np.arange(candles) * 60,
+            'open': close, 'high': close, 'low': close, 'close': close,
+            'volume': np.ones(candles),
+        }
+    return frames
+
+
+@pytest.fixture(autouse=True)
+def cold_indicators(tmp_path, monkeypatch):
+    monkeypatch.setattr(indicator_cache, 'root', tmp_path)
+
+
+@pytest.mark.parametrize('buy, sell', THRESHOLDS)
+def test_packed_symbols_match_one_simulation_each(buy, sell):
+    series = frames()
+    packed = PackedSeries.pack(series)
+
+    results = simulate_packed(packed.closes, packed.offsets, buy, sell)
+
+    for symbol, row in zip(packed.symbols, results):
+        service = SimulationService(None, strategy=strategy(buy, sell))
+        expected = asyncio.run(_run_simulation(service, series[symbol]))
+        assert row[TOTAL_TRADES] == expected['total_trades']
+        assert row[PROFIT_LOSS] == pytest.approx(expected['profit_loss'])
+        assert row[MAX_DRAWDOWN] == pytest.approx(expected['max_drawdown'])
+        if expected['total_trades']:
+            assert row[WINS] / row[TOTAL_TRADES] * 100 == pytest.approx(
+                expected['win_rate']
+            )
+
+
+def test_symbols_result_totals_the_packed_rows():
+    service = SimulationService(None, strategy=strategy(-0.3, 0.3))
+
+    result = asyncio.run(service.simulate_symbols(frames()))
+
+    assert [entry['symbol'] for entry in result['symbols']] == [
+        'A', 'B', 'C', 'D',
+    ]
+    assert [entry['candles'] for entry in result['symbols']] == [
+        400, 1, 2, 250,
+    ]
+    total = result['total']
+    assert total['candles'] == 653
+    assert total['total_trades'] == sum(
+        entry['total_trades'] for entry in result['symbols']
+    )
+    assert total['profit_loss'] == pytest.approx(
+        sum(entry['profit_loss'] for entry in result['symbols'])
+    )
+    assert total['max_drawdown'] == min(
+        entry['max_drawdown'] for entry in result['symbols']
+        if entry['total_trades'] >= 2
+    )
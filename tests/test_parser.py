@@ -0,0 +1,127 @@
+import asyncio
+import json
+
+import pytest
+
+from app.market import parser
+from app.market.exeptions import InvalidBarsError
+from app.market.parser import CandleStreamParser, parse_candles
+
+START = 1_700_000_000
+
+
+def candle(number: int, **fields) -> dict:
+    price = 100.0 + number
+    return {
+        'date': START + number * 60, 'open': price, 'high': price + 1,
+        'low': price - 1, 'close': price, 'volume': 10.0, **fields,
+    }
+
+
+def parse(*chunks: bytes) -> dict:
+    candle_parser = CandleStreamParser()
+    for chunk in chunks:
+        candle_parser.feed(chunk)
+    return candle_parser.close()
+
+
+def as_lists(columns: dict) -> dict:
+    return {name: column.tolist() for name, column in columns.items()}
+
+
+def test_any_chunk_boundary_gives_the_same_columns():
+    # a '}' inside a string and a character split across chunks
+    body = json.dumps([
+        candle(0, note='a}, b'), candle(1, note='café'), candle(2),
+    ], ensure_ascii=False).encode()
+    expected = as_lists(parse(body))
+
+    for split in range(1, len(body)):
+        assert as_lists(parse(body[:split], body[split:])) == expected
+    assert as_lists(parse(*(body[i:i + 1] for i in range(len(body))))) == (
+        expected
+    )
+    assert expected['close'] == [100.0, 101.0, 102.0]
+    assert expected['date'] == [START, START + 60, START + 120]
+
+
+def test_streamed_rows_are_flushed_in_batches(monkeypatch):
+    monkeypatch.setattr(parser, 'BATCH_ROWS', 4)
+    body = json.dumps([candle(number) for number in range(50)]).encode()
+
+    async def stream():
+        for start in range(0, len(body), 97):
+            yield body[start:start + 97]
+
+    columns = asyncio.run(parse_candles(stream(), size_hint=len(body)))
+
+    assert columns['close'].tolist() == [100.0 + n for n in range(50)]
+    assert len(columns['volume']) == 50
+
+
+def test_empty_array():
+    assert as_lists(parse(b' [ ', b' ] ')) == {
+        'date': [], 'open': [], 'high': [], 'low': [], 'close': [],
+        'volume': [],
+    }
+
+
+@pytest.mark.parametrize('close', ['null', 'NaN'])
+def test_missing_price_is_rejected(close):
+    body = json.dumps([candle(0), candle(1)]).replace('101.0', close, 2)
+
+    with pytest.raises(InvalidBarsError, match='missing values'):
+        parse(body.encode())
+
+
+@pytest.mark.parametrize('date', [None, 'NaT'])
+def test_missing_date_is_rejected(date):
+    body = json.dumps([candle(0, date='2024-01-02'), candle(1, date=date)])
+
+    with pytest.raises(InvalidBarsError, match='does not have date'):
+        parse(body.encode())
+
+
+def test_string_dates_are_read_as_utc():
+    body = json.dumps([
+        candle(0, date='2024-01-02T10:00:00'),
+        candle(1, date='2024-01-02T12:01:00+02:00'),
+    ])
+
+    dates = parse(body.encode())['date'].tolist()
+
+    assert dates == [1_704_189_600, 1_704_189_660]
+
+
+def test_other_date_formats_go_through_pandas():
+    body = json.dumps([candle(0, date='01/02/2024 10:00')])
+
+    assert parse(body.encode())['date'].tolist() == [1_704_189_600]
+
+
+@pytest.mark.parametrize('dates, message', [
+    (['2024-01-02', START], 'all strings or all epoch seconds'),
+    ([True, False], 'strings or epoch seconds'),
+])
+def test_mixed_dates_are_rejected(dates, message):
+    body = json.dumps([
+        candle(number, date=date) for number, date in enumerate(dates)
+    ])
+
+    with pytest.raises(InvalidBarsError, match=message):
+        parse(body.encode())
+
+
+@pytest.mark.parametrize('chunks, message', [
+    ([b'{"date": 1}'], 'Expected a JSON array'),
+    ([f'[{json.dumps(candle(0))} {json.dumps(candle(1))}]'.encode()],
+     'separated by commas'),
+    ([b'[', json.dumps(candle(0)).encode()], 'not terminated'),
+    ([b'[]', b' []'], 'after the candle array'),
+    ([b'[1]'], 'must be an object'),
+    ([b'[{"date": 1, "open": 1}]'], "missing 'high'"),
+    ([b'[\xff]'], 'Bars are in incorrect format'),
+])
+def test_malformed_bodies_are_rejected(chunks, message):
+    with pytest.raises(InvalidBarsError, match=message):
+        parse(*chunks)
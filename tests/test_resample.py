@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.market.resample import TimeframeCache, resample
+from app.market.store import ColumnStore
+
+START = 1_700_000_000 - 1_700_000_000 % 3_600
+
+
+def bars(rows: int, offset: int = 0) -> dict[str, np.ndarray]:
+    close = np.arange(offset, offset + rows, dtype=np.float64)
+    return {
+        'date': START + np.arange(offset, offset + rows, dtype=np.int64) * 60,
+        'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+        'volume': np.ones(rows),
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ColumnStore(tmp_path)
+    store.append('BTC', bars(150))
+    return store
+
+
+def test_resample_aggregates_buckets():
+    frame = resample(bars(150), '1h')
+
+    assert frame['date'].tolist() == [START, START + 3_600, START + 7_200]
+    assert frame['open'].tolist() == [0, 60, 120]
+    assert frame['high'].tolist() == [60, 120, 150]
+    assert frame['low'].tolist() == [-1, 59, 119]
+    assert frame['close'].tolist() == [59, 119, 149]
+    assert frame['volume'].tolist() == [60, 60, 30]
+
+
+def test_frame_is_cached_and_rebuilt_when_the_dataset_grows(store):
+    cache = TimeframeCache(store)
+
+    frame, rows = cache.get_frame_rows('BTC', '1h')
+    assert rows == 150
+    assert (store.root / 'BTC' / 'tf_1h' / 'meta.json').exists()
+
+    store.append('BTC', bars(60, offset=150))
+    frame, rows = cache.get_frame_rows('BTC', '1h')
+
+    assert rows == 210
+    assert frame['close'].tolist() == [59, 119, 179, 209]
+
+
+def test_frame_missing_columns_is_rebuilt(store):
+    cache = TimeframeCache(store)
+    cache.get_frame('BTC', '1h')
+    # as seen by a reader while another thread swaps the frame
+    (store.root / 'BTC' / 'tf_1h' / 'date.bin').unlink()
+
+    frame = cache.get_frame('BTC', '1h')
+
+    assert frame['close'].tolist() == [59, 119, 149]
+
+
+def test_concurrent_builds_of_one_frame(store):
+    with ThreadPoolExecutor(8) as pool:
+        frames = list(pool.map(
+            lambda _: TimeframeCache(store).get_frame('BTC', '15m'), range(32)
+        ))
+
+    expected = resample(bars(150), '15m')['close'].tolist()
+    assert all(frame['close'].tolist() == expected for frame in frames)
+    assert not list((store.root / 'BTC').glob('*.tmp'))
@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from app.signal.engine import SignalEngine, ThresholdIndex
+
+
+@pytest.fixture
+def index():
+    index = ThresholdIndex()
+    index.load([(1.0, 1), (0.0, 2), (1.0, 3), (-1.0, 4)])
+    return index
+
+
+def test_crossed_up_includes_a_threshold_left_from(index):
+    # value > threshold became true: previous <= threshold < current
+    assert index.crossed_up(0.0, 1.0) == [(0.0, 2)]
+    assert index.crossed_up(-1.0, 1.5) == [(-1.0, 4), (0.0, 2), (1.0, 1),
+                                           (1.0, 3)]
+    assert index.crossed_up(1.0, 0.5) == []
+
+
+def test_crossed_down_includes_a_threshold_left_from(index):
+    # value < threshold became true: current < threshold <= previous
+    assert index.crossed_down(1.0, 0.0) == [(1.0, 1), (1.0, 3)]
+    assert index.crossed_down(0.5, -2.0) == [(-1.0, 4), (0.0, 2)]
+    assert index.crossed_down(-1.0, -1.0) == []
+
+
+def test_crossings_match_a_scan():
+    rng = random.Random(26)
+    index = ThresholdIndex()
+    conditions = [(float(rng.randint(-5, 5)), number) for number in range(40)]
+    index.load(conditions[:20])
+    for threshold, strategy_id in conditions[20:]:
+        index.add(threshold, strategy_id)
+    for threshold, strategy_id in conditions[::3]:
+        index.remove(threshold, strategy_id)
+        conditions.remove((threshold, strategy_id))
+
+    for _ in range(500):
+        previous = float(rng.randint(-6, 6))
+        current = float(rng.randint(-6, 6))
+        assert index.crossed_up(previous, current) == sorted(
+            entry for entry in conditions if previous <= entry[0] < current
+        )
+        assert index.crossed_down(previous, current) == sorted(
+            entry for entry in conditions if current < entry[0] <= previous
+        )
+
+
+def test_remove_takes_only_the_given_strategy(index):
+    index.remove(1.0, 3)
+    index.remove(1.0, 99)
+
+    assert len(index) == 3
+    assert index.crossed_up(0.5, 2.0) == [(1.0, 1)]
+
+
+def test_engine_signals_crossings_of_momentum():
+    engine = SignalEngine()
+    engine.load([
+        (1, 10, 'BTC', 'momentum', 'buy_conditions', 1),
+        (1, 10, 'BTC', 'momentum', 'sell_conditions', -1),
+        (2, 20, 'BTC', 'unknown', 'buy_conditions', 0),
+    ])
+    engine.add_strategy(3, 30, 'ETH', [('momentum', 'buy_conditions', 0)])
+
+    assert engine.on_tick('BTC', 100.0) == []
+    # momentum 0.5, the first value: nothing to cross from
+    assert engine.on_tick('BTC', 100.5) == []
+    [buy] = engine.on_tick('BTC', 102.5)
+    assert buy.to_dict() == {
+        'strategy_id': 1, 'user_id': 10, 'symbol': 'BTC', 'action': 'buy',
+        'indicator': 'momentum', 'threshold': 1.0, 'value': 2.0,
+        'price': 102.5,
+    }
+    [sell] = engine.on_tick('BTC', 100.0)
+    assert (sell.action, sell.value) == ('sell', -2.5)
+
+    engine.remove_strategy(1)
+    assert len(engine) == 1
+    assert engine.on_tick('BTC', 103.0) == []
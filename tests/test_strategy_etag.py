@@ -0,0 +1,131 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import fakeredis
+import jwt
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import dependencies
+from app.auth.models import User
+from app.config import settings
+from app.models import Base
+from app.strategy.router import strategy_etag
+from app.strategy.utils import RedisUtils
+
+reads = []
+
+
+async def create_database(url: str):
+    engine = create_async_engine(url)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as session:
+        session.add(User('bob', 'password'))
+        await session.commit()
+    await engine.dispose()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    dependencies.init_database()
+    yield
+    await dependencies.close_database()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.get('/strategies/{strategy_id}', dependencies=[Depends(strategy_etag)])
+async def get_strategy(strategy_id: int):
+    reads.append(strategy_id)
+    return strategy_id
+
+
+def bearer(username: str) -> dict:
+    token = jwt.encode(
+        {'sub': username}, settings.SECRET_KEY, algorithm=settings.ALGORITHM
+    )
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(dependencies, 'redis_client', redis)
+    return redis
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, redis):
+    url = f'sqlite+aiosqlite:///{tmp_path / "test.db"}'
+    asyncio.run(create_database(url))
+    monkeypatch.setattr(dependencies, 'DATABASE_URL', url)
+    reads.clear()
+    with TestClient(app) as client:
+        yield client
+
+
+def test_matching_etag_is_not_modified(client):
+    response = client.get('/strategies/1', headers=bearer('bob'))
+    etag = response.headers['ETag']
+    assert etag.startswith('W/"bob-') and etag.endswith('-1"')
+
+    response = client.get(
+        '/strategies/1', headers={**bearer('bob'), 'If-None-Match': etag}
+    )
+
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert reads == [1]
+
+
+def test_strong_form_of_the_etag_matches(client):
+    etag = client.get('/strategies/1', headers=bearer('bob')).headers['ETag']
+
+    response = client.get(
+        '/strategies/1',
+        headers={**bearer('bob'), 'If-None-Match': etag.removeprefix('W/')},
+    )
+
+    assert response.status_code == 304
+
+
+def test_write_changes_the_etag(client, redis):
+    etag = client.get('/strategies/1', headers=bearer('bob')).headers['ETag']
+    client.portal.call(
+        redis.incr, RedisUtils.get_strategies_version_name('bob')
+    )
+
+    response = client.get(
+        '/strategies/1', headers={**bearer('bob'), 'If-None-Match': etag}
+    )
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_forged_token_cannot_probe_the_version(client, redis):
+    token = jwt.encode({'sub': 'bob'}, 'not the key', algorithm='HS256')
+
+    response = client.get(
+        '/strategies/1',
+        headers={'Authorization': f'Bearer {token}', 'If-None-Match': '*'},
+    )
+
+    assert response.status_code == 401
+    assert 'ETag' not in response.headers
+    assert client.portal.call(
+        redis.get, RedisUtils.get_strategies_version_name('bob')
+    ) is None
+
+
+def test_invalid_token_is_rejected_before_the_etag(client):
+    response = client.get(
+        '/strategies/1',
+        headers={'Authorization': 'Bearer nonsense', 'If-None-Match': '*'},
+    )
+
+    assert response.status_code == 401